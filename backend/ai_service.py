@@ -1,30 +1,128 @@
 import os
-from google import genai
+import sys
+import time
+import hashlib
+import threading
+from collections import deque
 from dotenv import load_dotenv
 
+# Share the process-wide Gemini client manager with the MCP server package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from server.gemini_client import get_client_manager
+from server.batch_quiz import BatchQuizGenerator
+
+from answer_cache import create_answer_cache
+
 load_dotenv()
 
+class LatencyTracker:
+    """Rolling window of streamed-answer timings: time to first token and total time, in ms."""
+
+    def __init__(self, window=1000):
+        self.first_token = deque(maxlen=window)
+        self.total = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, first_token_ms, total_ms):
+        with self._lock:
+            self.first_token.append(first_token_ms)
+            self.total.append(total_ms)
+
+    @staticmethod
+    def _percentile(values, pct):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1)
+
+    def stats(self):
+        with self._lock:
+            first_token, total = list(self.first_token), list(self.total)
+        return {
+            'samples': len(first_token),
+            'time_to_first_token_ms': {'p50': self._percentile(first_token, 0.5), 'p95': self._percentile(first_token, 0.95)},
+            'total_ms': {'p50': self._percentile(total, 0.5), 'p95': self._percentile(total, 0.95)}
+        }
+
+# Shared by every GeminiService instance in the process
+answer_cache = create_answer_cache()
+stream_latency = LatencyTracker()
+
 class GeminiService:
     def __init__(self, model_name="gemini-2.0-flash-exp"):
-        self.api_key = os.getenv("GEMINI_API_KEY")
+        # Cheap to construct per request: the genai client, its connection pool
+        # and the in-flight limit all live in the shared manager.
+        self.manager = get_client_manager()
+        self.api_key = self.manager.api_key
         if not self.api_key:
             # Fallback or raise error. 
             # For now, print warning but don't crash init if we want to allow app to start without it
             print("Warning: GEMINI_API_KEY environment variable is not set.")
             self.api_key = None
         
-        if self.api_key:
-            self.client = genai.Client(api_key=self.api_key)
-        else:
-            self.client = None
-            
+        self.client = self.manager.client
         self.model_name = model_name
 
     def generate_quiz(self, topic: str, count: int = 5, difficulty: str = "Medium") -> str:
         if not self.client:
              return None
 
-        prompt = (
+        try:
+            response = self.manager.generate_content(
+                model=self.model_name,
+                contents=self._quiz_prompt(topic, count, difficulty)
+            )
+            return response.text
+        except Exception as e:
+            print(f"Error calling Gemini API: {str(e)}")
+            return None
+
+    def generate_quiz_batch(self, specs, max_questions_per_call=40, max_concurrency=4):
+        """
+        Questions for many (topic, count, difficulty) specs, packed into as few model calls as
+        possible (see server/batch_quiz.py). Returns one list of validated questions per spec.
+        """
+        if not self.client:
+            return [[] for _ in specs]
+
+        generator = BatchQuizGenerator(
+            self.manager.generate_content,
+            self.model_name,
+            max_questions_per_call=max_questions_per_call,
+            max_concurrency=max_concurrency
+        )
+        return generator.generate(specs)
+
+    async def generate_quiz_async(self, topic: str, count: int = 5, difficulty: str = "Medium") -> str:
+        """generate_quiz for the ASGI app (asgi.py): awaits the API instead of holding a thread."""
+        if not self.client:
+             return None
+
+        try:
+            response = await self.manager.generate_content_async(
+                model=self.model_name,
+                contents=self._quiz_prompt(topic, count, difficulty)
+            )
+            return response.text
+        except Exception as e:
+            print(f"Error calling Gemini API: {str(e)}")
+            return None
+
+    def stream_quiz(self, topic: str, count: int = 5, difficulty: str = "Medium"):
+        """Yields the raw quiz JSON text in pieces as Gemini produces it (see quiz_parser.QuizStreamParser)."""
+        if not self.client:
+            return
+
+        for chunk in self.manager.generate_content_stream(
+            model=self.model_name,
+            contents=self._quiz_prompt(topic, count, difficulty)
+        ):
+            if chunk.text:
+                yield chunk.text
+
+    @staticmethod
+    def _quiz_prompt(topic: str, count: int, difficulty: str) -> str:
+        return (
             f"Generate {count} multiple-choice quiz questions about '{topic}'. "
             f"Difficulty: {difficulty}. "
             f"Return the result as a strictly formatted JSON array. "
@@ -33,24 +131,121 @@ class GeminiService:
             f"Do not include any markdown formatting, code blocks, or explanations outside the JSON."
         )
 
+    def ask_pdf(self, context: str, question: str, doc_hash: str = None) -> str:
+        """
+        Answers a question based on the provided PDF context.
+        Answers are cached per (document, question, model); pass doc_hash when the
+        document's hash is already known, otherwise the context is hashed.
+        """
+        if not self.client:
+             return "AI Service Unavailable"
+
+        doc_hash = doc_hash or hashlib.sha256(context.encode('utf-8')).hexdigest()
+        cached = answer_cache.get(doc_hash, question, self.model_name)
+        if cached is not None:
+            return cached
+
         try:
-            response = self.client.models.generate_content(
+            response = self.manager.generate_content(
                 model=self.model_name,
-                contents=prompt
+                contents=self._pdf_prompt(context, question)
             )
+            if response.text:
+                answer_cache.set(doc_hash, question, self.model_name, response.text)
             return response.text
         except Exception as e:
-            print(f"Error calling Gemini API: {str(e)}")
-            return None
+            print(f"Error calling Gemini API for Q&A: {str(e)}")
+            return "Sorry, I encountered an error creating the response."
 
-    def ask_pdf(self, context: str, question: str) -> str:
+    def stream_pdf_answer(self, context: str, question: str, doc_hash: str = None):
         """
-        Answers a question based on the provided PDF context.
+        Streaming variant of ask_pdf: yields the answer text in pieces as Gemini produces them.
+        A cached answer is yielded in one piece. Closing the generator stops the upstream stream.
         """
+        if not self.client:
+            yield "AI Service Unavailable"
+            return
+
+        doc_hash = doc_hash or hashlib.sha256(context.encode('utf-8')).hexdigest()
+        cached = answer_cache.get(doc_hash, question, self.model_name)
+        if cached is not None:
+            yield cached
+            return
+
+        start = time.perf_counter()
+        first_token_ms = None
+        pieces = []
+        for chunk in self.manager.generate_content_stream(
+            model=self.model_name,
+            contents=self._pdf_prompt(context, question)
+        ):
+            if not chunk.text:
+                continue
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+            pieces.append(chunk.text)
+            yield chunk.text
+
+        if pieces:
+            stream_latency.record(first_token_ms, (time.perf_counter() - start) * 1000)
+            answer_cache.set(doc_hash, question, self.model_name, ''.join(pieces))
+
+    async def ask_pdf_async(self, context: str, question: str, doc_hash: str = None) -> str:
+        """ask_pdf for the ASGI app; shares the answer cache with the sync path."""
         if not self.client:
              return "AI Service Unavailable"
 
-        prompt = f"""
+        doc_hash = doc_hash or hashlib.sha256(context.encode('utf-8')).hexdigest()
+        cached = answer_cache.get(doc_hash, question, self.model_name)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.manager.generate_content_async(
+                model=self.model_name,
+                contents=self._pdf_prompt(context, question)
+            )
+            if response.text:
+                answer_cache.set(doc_hash, question, self.model_name, response.text)
+            return response.text
+        except Exception as e:
+            print(f"Error calling Gemini API for Q&A: {str(e)}")
+            return "Sorry, I encountered an error creating the response."
+
+    async def stream_pdf_answer_async(self, context: str, question: str, doc_hash: str = None):
+        """Async generator counterpart of stream_pdf_answer."""
+        if not self.client:
+            yield "AI Service Unavailable"
+            return
+
+        doc_hash = doc_hash or hashlib.sha256(context.encode('utf-8')).hexdigest()
+        cached = answer_cache.get(doc_hash, question, self.model_name)
+        if cached is not None:
+            yield cached
+            return
+
+        start = time.perf_counter()
+        first_token_ms = None
+        pieces = []
+        async for chunk in self.manager.generate_content_stream_async(
+            model=self.model_name,
+            contents=self._pdf_prompt(context, question)
+        ):
+            if not chunk.text:
+                continue
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+            pieces.append(chunk.text)
+            yield chunk.text
+
+        if pieces:
+            stream_latency.record(first_token_ms, (time.perf_counter() - start) * 1000)
+            answer_cache.set(doc_hash, question, self.model_name, ''.join(pieces))
+
+    @staticmethod
+    def _pdf_prompt(context: str, question: str) -> str:
+        # Limit context to ~30k chars to stay safely within token limits for Flash 2.0 (though it handles 1M, better safe/faster)
+        return f"""
 You are a helpful AI tutor for the 'LearnEx' platform.
 Answer the student's question based ONLY on the provided context.
 If the answer is not in the context, say "I cannot find the answer in the provided document."
@@ -62,14 +257,3 @@ CONTEXT:
 
 QUESTION: {question}
 """
-        # Limit context to ~30k chars to stay safely within token limits for Flash 2.0 (though it handles 1M, better safe/faster)
-
-        try:
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=prompt
-            )
-            return response.text
-        except Exception as e:
-            print(f"Error calling Gemini API for Q&A: {str(e)}")
-            return "Sorry, I encountered an error creating the response."
@@ -0,0 +1,129 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+from quiz_cache import MemoryCacheStore
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+# Words that flip a question's meaning; "t" is what normalizing "isn't" leaves behind
+NEGATIONS = frozenset({'not', 'no', 'never', 'none', 'nor', 'neither', 'without', 'cannot', 't'})
+
+
+def normalize_question(question):
+    """Lower-cased, punctuation-free, single-spaced form of a question."""
+    return ' '.join(_PUNCTUATION.sub(' ', str(question or '').lower()).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def guard_tokens(text):
+    """Numbers and negations in a normalized question: similar questions must share them exactly."""
+    return frozenset(word for word in text.split() if word in NEGATIONS or any(c.isdigit() for c in word))
+
+
+def similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class AnswerCache:
+    """
+    Cache of document Q&A answers keyed on (document hash, normalized question, model).
+
+    Only exact matches are served by default. With `similarity_threshold` above 0, a question
+    can also be served by a previously answered one on the same document whose character-trigram
+    similarity is at least that high and which has exactly the same numbers and negations
+    ("revenue in 2018" never gets the 2019 answer). Hit counters are split so both paths can
+    be sized separately.
+    """
+
+    def __init__(self, max_entries=1024, ttl=24 * 3600, similarity_threshold=0.0, max_per_document=256):
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.max_per_document = max_per_document
+        self.store = MemoryCacheStore(max_entries=max_entries)
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._questions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(doc_hash, normalized, model_name):
+        return hashlib.sha256(f"{doc_hash}|{model_name}|{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, doc_hash, question, model_name):
+        normalized = normalize_question(question)
+        answer = self.store.get(self._key(doc_hash, normalized, model_name))
+        if answer is not None:
+            with self._lock:
+                self.hits += 1
+            return answer
+
+        if self.similarity_threshold > 0:
+            answer = self._get_similar(doc_hash, normalized, model_name)
+            if answer is not None:
+                with self._lock:
+                    self.similar_hits += 1
+                return answer
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _get_similar(self, doc_hash, normalized, model_name):
+        grams, guards = trigrams(normalized), guard_tokens(normalized)
+        with self._lock:
+            candidates = list(self._questions.get((doc_hash, model_name), {}).items())
+
+        best_key, best_score = None, self.similarity_threshold
+        for key, (other, other_guards) in candidates:
+            if other_guards != guards:
+                continue
+            score = similarity(grams, other)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        return self.store.get(best_key) if best_key else None
+
+    def set(self, doc_hash, question, model_name, answer):
+        normalized = normalize_question(question)
+        key = self._key(doc_hash, normalized, model_name)
+        self.store.set(key, answer, self.ttl)
+
+        with self._lock:
+            questions = self._questions.setdefault((doc_hash, model_name), OrderedDict())
+            questions[key] = (trigrams(normalized), guard_tokens(normalized))
+            questions.move_to_end(key)
+            while len(questions) > self.max_per_document:
+                questions.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.similar_hits + self.misses
+        return {
+            'entries': len(self.store),
+            'hits': self.hits,
+            'similar_hits': self.similar_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.similar_hits) / total, 4) if total else 0.0,
+            'ttl': self.ttl,
+            'similarity_threshold': self.similarity_threshold
+        }
+
+
+def create_answer_cache():
+    """
+    Builds the cache from ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL and ANSWER_CACHE_SIMILARITY
+    (similar-question matching; off unless set to a threshold such as 0.85).
+    """
+    return AnswerCache(
+        max_entries=int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', 1024)),
+        ttl=int(os.getenv('ANSWER_CACHE_TTL', 24 * 3600)),
+        similarity_threshold=float(os.getenv('ANSWER_CACHE_SIMILARITY', 0))
+    )
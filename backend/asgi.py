@@ -0,0 +1,287 @@
+"""
+ASGI entry point for the backend.
+
+The AI and PDF routes (/api/quiz/generate, /api/chat, /api/chat/stream, /api/pdf/extract)
+are served natively on the event loop: Gemini calls are awaited through client.aio and PDF
+pages are awaited from the extraction process pool, so a slow upstream call costs a
+coroutine instead of a thread. Database work still uses Flask-SQLAlchemy and runs in the
+thread pool. Every other route is the unchanged Flask app behind WsgiToAsgi.
+
+    uvicorn asgi:application --workers 4
+    python serve.py --mode async --workers 4
+"""
+import json
+import time
+
+import anyio
+from flask import request as flask_request
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import create_app
+from ai_service import GeminiService
+from blueprints.quiz import (QuizGenerationError, quiz_cache, question_bank, finish_quiz_generation,
+                             create_quiz_set, template_quiz_questions, parse_question_count, parse_topic,
+                             QuizDeadlineError, quiz_ai_deadline)
+from blueprints.study import pdf_extractor, store_document, resolve_chat_context
+from pdf_extract import PdfTooLargeError
+from server.quiz_parser import QuizStreamParser
+
+flask_app = create_app()
+
+# Preflight requests fall through to Flask (and Flask-CORS); native responses need the headers themselves
+CORS = [Middleware(CORSMiddleware, allow_origins=['*'], allow_headers=['*'], allow_methods=['*'],
+                   expose_headers=['ETag', 'X-Next-Cursor'])]
+
+
+class FlaskErrorResponse(Exception):
+    """Carries the response the Flask app gives for a request it would reject."""
+
+    def __init__(self, response):
+        super().__init__(response.status)
+        self.response = response
+
+
+def authenticate(request):
+    """
+    The JWT identity of the request, checked by the same code as @jwt_required(). On failure
+    raises FlaskErrorResponse with the response the Flask app gives (its JWT loaders' status and body).
+    """
+    headers = {'Authorization': request.headers.get('authorization', '')}
+    with flask_app.test_request_context(headers=headers):
+        try:
+            verify_jwt_in_request()
+            return int(get_jwt_identity())
+        except Exception as e:
+            raise FlaskErrorResponse(flask_app.make_response(flask_app.handle_user_exception(e)))
+
+
+async def json_body(request):
+    """
+    The request's JSON, parsed by Flask's request.get_json(). Malformed JSON or another
+    Content-Type raises FlaskErrorResponse with Flask's 400 or 415.
+    """
+    body = await request.body()
+    headers = {'Content-Type': request.headers.get('content-type', '')}
+    with flask_app.test_request_context(method='POST', data=body, headers=headers):
+        try:
+            return flask_request.get_json()
+        except Exception as e:
+            raise FlaskErrorResponse(flask_app.make_response(flask_app.handle_user_exception(e)))
+
+
+async def run_in_app_context(fn, *args, **kwargs):
+    """Runs blocking (database) work in the thread pool inside a Flask app context."""
+    def call():
+        # Flask-SQLAlchemy removes the scoped session when the context is torn down
+        with flask_app.app_context():
+            return fn(*args, **kwargs)
+    return await anyio.to_thread.run_sync(call)
+
+
+def route(path, methods):
+    """Registers a native handler: authenticates it and answers auth and body errors as Flask would."""
+    def decorator(handler):
+        async def endpoint(request):
+            try:
+                return await handler(request, authenticate(request))
+            except FlaskErrorResponse as e:
+                return Response(e.response.get_data(), status_code=e.response.status_code,
+                                media_type=e.response.mimetype)
+        return Route(path, endpoint, methods=methods, middleware=CORS)
+    return decorator
+
+
+async def fetch_quiz_questions_async(topic, count, difficulty, use_cache=True):
+    """blueprints.quiz.fetch_quiz_questions with the Gemini calls awaited."""
+    gemini = GeminiService()
+    if not gemini.client:
+        raise QuizGenerationError('AI Service not configured', 503)
+
+    if use_cache:
+        quiz_data = await run_in_app_context(quiz_cache.get, topic, count, difficulty, gemini.model_name)
+        if quiz_data is not None:
+            return quiz_data
+
+    parser = QuizStreamParser(limit=count)
+    raw = []
+    # The first call, then one top-up for whatever it left missing
+    for _ in range(2):
+        text = await gemini.generate_quiz_async(topic, count - len(parser.questions), difficulty) or ''
+        raw.append(text)
+        parser.feed(text)
+        parser.close()
+        if parser.full:
+            break
+
+    return await run_in_app_context(
+        finish_quiz_generation, parser, raw, topic, count, difficulty, gemini.model_name, use_cache
+    )
+
+
+async def fetch_quiz_questions_by_deadline_async(topic, count, difficulty):
+    """
+    fetch_quiz_questions_async, cancelled with QuizDeadlineError after quiz_ai_deadline() seconds
+    (the Flask route's deadline; an awaited call can simply be dropped).
+    """
+    deadline = quiz_ai_deadline()
+    try:
+        with anyio.fail_after(deadline if deadline > 0 else None):
+            return await fetch_quiz_questions_async(topic, count, difficulty)
+    except TimeoutError:
+        raise QuizDeadlineError()
+
+
+@route('/api/quiz/generate', methods=['POST'])
+async def generate_quiz(request, user_id):
+    data = await json_body(request)
+    difficulty = data.get('difficulty', 'Medium')
+    try:
+        topic = parse_topic(data.get('topic'))
+        count = parse_question_count(data.get('count'))
+    except ValueError as e:
+        return JSONResponse({'message': str(e)}, status_code=400)
+
+    try:
+        quiz_data = await run_in_app_context(question_bank.sample, topic, difficulty, count)
+        if len(quiz_data) < count:
+            try:
+                generated = await fetch_quiz_questions_by_deadline_async(topic, count, difficulty)
+            except QuizGenerationError as e:
+                # Same fallback as serve_quiz_questions: top up from templates, no AI call
+                quiz_data += await run_in_app_context(template_quiz_questions, topic, count - len(quiz_data))
+                if not quiz_data:
+                    raise
+                print(f"Serving template questions for '{topic}': {e.message}")
+            else:
+                quiz_data = generated
+                try:
+                    await run_in_app_context(question_bank.add, topic, difficulty, quiz_data)
+                except Exception as e:
+                    print(f"Could not add generated questions to the bank: {e}")
+    except QuizGenerationError as e:
+        body = {'message': e.message}
+        if e.raw is not None:
+            body['raw'] = e.raw
+        return JSONResponse(body, status_code=e.status_code)
+
+    try:
+        quiz_id = await run_in_app_context(
+            lambda: create_quiz_set(quiz_data, user_id=user_id, topic=topic, difficulty=difficulty).id
+        )
+    except Exception as e:
+        return JSONResponse({'message': f'Error saving data: {str(e)}'}, status_code=500)
+    return JSONResponse({'message': 'Quiz generated successfully', 'quiz_id': quiz_id, 'count': len(quiz_data)})
+
+
+async def chat_request(request, user_id):
+    """Returns (question, context, doc_hash, error_response) for the chat routes."""
+    data = await json_body(request)
+    question = data.get('question')
+    if not question:
+        return None, None, None, JSONResponse({'message': 'Question is required'}, status_code=400)
+
+    if data.get('document_id') is None:
+        # Raw context: nothing to look up, so skip the thread hop
+        context, doc_hash = resolve_chat_context(data, user_id)
+    else:
+        context, doc_hash = await run_in_app_context(resolve_chat_context, data, user_id)
+    if context is None:
+        return None, None, None, JSONResponse({'message': 'Document not found'}, status_code=404)
+    return question, context, doc_hash, None
+
+
+@route('/api/chat', methods=['POST'])
+async def chat_with_ai(request, user_id):
+    question, context, doc_hash, error = await chat_request(request, user_id)
+    if error:
+        return error
+
+    gemini = GeminiService()
+    if not gemini.client:
+        return JSONResponse({'message': 'AI Service not configured'}, status_code=503)
+
+    answer = await gemini.ask_pdf_async(context, question, doc_hash=doc_hash)
+    return JSONResponse({'answer': answer})
+
+
+@route('/api/chat/stream', methods=['POST'])
+async def stream_chat_with_ai(request, user_id):
+    question, context, doc_hash, error = await chat_request(request, user_id)
+    if error:
+        return error
+
+    gemini = GeminiService()
+    if not gemini.client:
+        return JSONResponse({'message': 'AI Service not configured'}, status_code=503)
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    async def events():
+        start = time.perf_counter()
+        first_token_ms = None
+        pieces = gemini.stream_pdf_answer_async(context, question, doc_hash=doc_hash)
+        try:
+            async for text in pieces:
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - start) * 1000, 1)
+                yield sse('token', {'text': text})
+        except Exception as e:
+            yield sse('error', {'message': f"Error processing your question: {str(e)}"})
+            return
+        finally:
+            # Runs on client disconnect too, closing the upstream stream
+            await pieces.aclose()
+        yield sse('done', {
+            'time_to_first_token_ms': first_token_ms,
+            'total_ms': round((time.perf_counter() - start) * 1000, 1)
+        })
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@route('/api/pdf/extract', methods=['POST'])
+async def extract_pdf_text(request, user_id):
+    form = await request.form()
+    file = form.get('file')
+    if file is None or isinstance(file, str):
+        return JSONResponse({'message': 'No file part'}, status_code=400)
+    if not file.filename:
+        return JSONResponse({'message': 'No selected file'}, status_code=400)
+
+    try:
+        result = await pdf_extractor.extract_async(file.file)
+        document_id = await run_in_app_context(
+            lambda: store_document(user_id, file.filename, result).id
+        )
+    except PdfTooLargeError as e:
+        return JSONResponse({'message': str(e)}, status_code=413)
+    except Exception as e:
+        return JSONResponse({'message': f'Error processing PDF: {str(e)}'}, status_code=500)
+    finally:
+        await file.close()
+
+    return JSONResponse({
+        'text': result['text'],
+        'pages': result['pages'],
+        'sha256': result['sha256'],
+        'document_id': document_id,
+        'message': 'PDF processed successfully'
+    })
+
+
+def create_asgi_app():
+    routes = [generate_quiz, chat_with_ai, stream_chat_with_ai, extract_pdf_text]
+    return Starlette(routes=routes + [Mount('/', app=WsgiToAsgi(flask_app))])
+
+
+application = create_asgi_app()
@@ -0,0 +1,159 @@
+"""
+Load test: concurrent /api/chat throughput in sync (Werkzeug) vs async (uvicorn + asgi.py) mode.
+
+Both servers run as subprocesses against a local fake Gemini (fake_gemini_server.py) with a
+fixed upstream latency, so the numbers reflect how each mode waits on I/O, not the model.
+Every request asks a distinct question so the answer cache never short-circuits it.
+
+    python bench_async.py --requests 400 --concurrency 100 --latency 0.5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+import aiohttp
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+FAKE_GEMINI = os.path.join(os.path.dirname(BACKEND), 'fake_gemini_server.py')
+
+
+def wait_until_up(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def thread_count(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith('Threads:'):
+                return int(line.split()[1])
+    return 0
+
+
+async def run_load(url, token, total, concurrency, label):
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # aiohttp rather than httpx: httpx's async pool slows down badly with hundreds of connections
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.post(f"{url}/api/chat", headers=headers, json={
+                    'question': f"[{label}] What does line {i} say?",
+                    'context': f"Line {i} says hello."
+                }) as response:
+                    await response.read()
+                    if response.status == 200:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+    return {'elapsed': elapsed, 'rps': len(latencies) / elapsed, 'p50': pct(0.5), 'p95': pct(0.95), 'errors': errors}
+
+
+def bench_mode(mode, args, gemini_url, db_path, port):
+    env = dict(
+        os.environ,
+        GEMINI_API_KEY='fake-key',
+        GEMINI_BASE_URL=gemini_url,
+        GEMINI_MAX_IN_FLIGHT='10000',
+        DATABASE_URL=f'sqlite:///{db_path}',
+        QUESTION_BANK_SCHEDULER='0',
+    )
+    command = [sys.executable, os.path.join(BACKEND, 'serve.py'), '--mode', mode,
+               '--workers', str(args.workers), '--port', str(port)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(url, process)
+        httpx.post(f"{url}/api/register", json={'username': 'bench', 'email': 'bench@example.com', 'password': 'bench-password'})
+        token = httpx.post(f"{url}/api/login", json={'email': 'bench@example.com', 'password': 'bench-password'}).json()['access_token']
+
+        asyncio.run(run_load(url, token, min(20, args.requests), min(20, args.concurrency), f'{mode}-warmup'))
+
+        peak = [0]
+        done = [False]
+
+        async def sample_threads():
+            while not done[0]:
+                peak[0] = max(peak[0], thread_count(process.pid))
+                await asyncio.sleep(0.05)
+
+        async def measured():
+            sampler = asyncio.create_task(sample_threads())
+            try:
+                return await run_load(url, token, args.requests, args.concurrency, mode)
+            finally:
+                done[0] = True
+                await sampler
+
+        cpu_before = cpu_seconds(process.pid)
+        result = asyncio.run(measured())
+        result['threads'] = peak[0]
+        result['cpu_ms'] = (cpu_seconds(process.pid) - cpu_before) * 1000 / args.requests
+        return result
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.5, help='fake Gemini latency per call (s)')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--modes', default='sync,async')
+    args = parser.parse_args()
+
+    # Its own process, so the fake upstream does not share a GIL with the load generator
+    gemini_url = 'http://127.0.0.1:5599/'
+    gemini = subprocess.Popen([sys.executable, FAKE_GEMINI, '--port', '5599', '--latency', str(args.latency)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_up(gemini_url, gemini)
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.latency * 1000:.0f} ms upstream latency, "
+          f"{args.workers} worker(s)\n")
+    print(f"{'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7} {'threads':>8} {'cpu ms/req':>11}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for offset, mode in enumerate(args.modes.split(',')):
+            db_path = os.path.join(tmp, f'{mode}.db')
+            subprocess.run([sys.executable, '-c', 'from app import create_app\nfrom extensions import db\nwith create_app(blueprints=False).app_context(): db.create_all()'],
+                           cwd=BACKEND, env=dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}'), check=True)
+            r = bench_mode(mode, args, gemini_url, db_path, 5600 + offset)
+            print(f"{mode:<6} {r['rps']:>8.1f} {r['p50']:>8.0f} {r['p95']:>8.0f} {r['errors']:>7} {r['threads']:>8} {r['cpu_ms']:>11.1f}")
+
+    gemini.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Question import / answer insert benchmark: per-object ORM adds vs. one executemany INSERT.
+
+    python bench_bulk_insert.py --questions 1000 --rounds 20
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+
+def make_items(n):
+    return [
+        {
+            'question': f"Benchmark question number {i}?",
+            'options': ['Alpha', 'Beta', 'Gamma', 'Delta'],
+            'answer': 'Beta'
+        }
+        for i in range(n)
+    ]
+
+
+def report(label, rows, elapsed):
+    print(f"{label:<34} {rows / elapsed:>12,.0f} rows/s  ({elapsed * 1000:.1f} ms for {rows:,} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app import create_app
+    from extensions import db
+    from models import User, Quiz, Question, QuizAttempt, QuizAttemptAnswer
+    from blueprints.quiz import create_quiz_set
+
+    app = create_app()
+
+    items = make_items(args.questions)
+    total = args.questions * args.rounds
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password='x')
+        db.session.add(user)
+        db.session.commit()
+
+        # Before: one tracked ORM object per question
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            quiz = Quiz(user_id=user.id)
+            db.session.add(quiz)
+            db.session.flush()
+            for item in items:
+                db.session.add(Question(
+                    quiz_id=quiz.id,
+                    question_text=item['question'],
+                    options=item['options'],
+                    correct_answer=item['answer']
+                ))
+            db.session.commit()
+        report('questions: ORM add() per row', total, time.perf_counter() - start)
+
+        # After: create_quiz_set's single executemany
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            create_quiz_set(items, user_id=user.id)
+        report('questions: bulk insert', total, time.perf_counter() - start)
+
+        answers = [
+            {'question_text': item['question'], 'user_answer': 'Beta', 'correct_answer': 'Beta', 'is_correct': True}
+            for item in items
+        ]
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            attempt = QuizAttempt(user_id=user.id, score=1, total_questions=len(answers), time_taken=1.0, level='Easy')
+            db.session.add(attempt)
+            db.session.flush()
+            for ans in answers:
+                db.session.add(QuizAttemptAnswer(attempt_id=attempt.id, **ans))
+            db.session.commit()
+        report('answers: ORM add() per row', total, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            attempt = QuizAttempt(user_id=user.id, score=1, total_questions=len(answers), time_taken=1.0, level='Easy')
+            db.session.add(attempt)
+            db.session.flush()
+            db.session.execute(db.insert(QuizAttemptAnswer), [{'attempt_id': attempt.id, **ans} for ans in answers])
+            db.session.commit()
+        report('answers: bulk insert', total, time.perf_counter() - start)
+
+    os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Leaderboard benchmark: rank and page lookups against the materialized board.
+
+Simulates --attempts quiz attempts spread over --users users (default 100k / 10M),
+loads the resulting per-user totals into a throwaway SQLite database and times
+"my rank", keyset page and submit-time update queries.
+
+    python bench_leaderboard.py --users 100000 --attempts 10000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+LEVELS = ['Easy', 'Moderate', 'Hard']
+
+
+def timed(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed / repeat * 1000:8.3f} ms/op  ({repeat} ops)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--attempts', type=int, default=10_000_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['DATABASE_URL'] = f"sqlite:///{db_file.name}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app import create_app
+    from extensions import db
+    from models import LeaderboardScore
+    from blueprints.quiz import leaderboard, board_key
+
+    app = create_app()
+
+    print(f"Simulating {args.attempts:,} attempts for {args.users:,} users...")
+    start = time.perf_counter()
+    points = [0] * args.users
+    attempts = [0] * args.users
+    levels = {level: [0] * args.users for level in LEVELS}
+    chunk = 1_000_000
+    for offset in range(0, args.attempts, chunk):
+        n = min(chunk, args.attempts - offset)
+        users = random.choices(range(args.users), k=n)
+        scores = random.choices(range(-5, 26), k=n)
+        level_picks = random.choices(LEVELS, k=n)
+        for user, score, level in zip(users, scores, level_picks):
+            points[user] += score
+            attempts[user] += 1
+            levels[level][user] += score
+    print(f"  simulated in {time.perf_counter() - start:.1f}s")
+
+    with app.app_context():
+        db.create_all()
+
+        start = time.perf_counter()
+        rows = [
+            {'board': board_key('all'), 'user_id': u + 1, 'points': points[u], 'attempts': attempts[u]}
+            for u in range(args.users) if attempts[u]
+        ]
+        for level in LEVELS:
+            rows.extend(
+                {'board': board_key('all', level), 'user_id': u + 1, 'points': levels[level][u], 'attempts': 1}
+                for u in range(args.users) if attempts[u]
+            )
+        db.session.bulk_insert_mappings(LeaderboardScore, rows)
+        db.session.commit()
+        print(f"  loaded {len(rows):,} board rows in {time.perf_counter() - start:.1f}s\n")
+
+        key = board_key('all')
+        start = time.perf_counter()
+        leaderboard.index(key)
+        print(f"{'rank index build (cold)':<32} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        sample_users = [random.randint(1, args.users) for _ in range(args.queries)]
+        it = iter(sample_users * 2)
+        timed('my rank', lambda: leaderboard.rank(key, next(it)), args.queries)
+        timed('first page (20)', lambda: leaderboard.page(key, limit=20), 200)
+
+        _, cursor = leaderboard.page(key, limit=5000)
+        timed('keyset page after 5k rows', lambda: leaderboard.page(key, limit=20, cursor=cursor), 200)
+
+        def naive_rank():
+            user_points = db.session.query(LeaderboardScore.points).filter_by(board=key, user_id=next(it)).scalar()
+            LeaderboardScore.query.filter(LeaderboardScore.board == key, LeaderboardScore.points > (user_points or 0)).count()
+        it = iter(sample_users * 2)
+        timed('my rank via COUNT(*) (baseline)', naive_rank, min(args.queries, 200))
+
+        def submit():
+            user_id = random.randint(1, args.users)
+            updates = leaderboard.record(user_id, random.choice(LEVELS), random.randint(-5, 25), 30.0)
+            db.session.commit()
+            leaderboard.apply(user_id, updates)
+        timed('record attempt + commit', submit, 500)
+
+    os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Login storm benchmark: bcrypt on the request threads vs. the bounded process pool.
+
+A threaded server (serve.py --mode sync) takes --logins concurrent logins while a probe
+calls the cheap GET /api/user every 50 ms, so the table shows both login throughput and
+what a storm does to everyone else. "inline" is the old behaviour (PASSWORD_HASH_WORKERS=0,
+no queue limit); "pool" rejects logins with 429 once --queue hashes are pending, and the
+clients retry those after 0.5 s. Login latency includes the retries.
+
+    python bench_login.py --logins 200 --concurrency 50 --rounds 10
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+import aiohttp
+
+from bench_async import wait_until_up
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else float('nan')
+
+
+async def storm(url, token, total, concurrency):
+    latencies, probes, statuses = [], [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency + 1),
+                                     timeout=aiohttp.ClientTimeout(total=300)) as session:
+        async def login(i):
+            async with semaphore:
+                start = time.perf_counter()
+                delay = 0.5
+                while True:
+                    async with session.post(f"{url}/api/login", json={
+                        'email': f'user{i % 20}@example.com', 'password': 'bench-password'
+                    }) as response:
+                        await response.read()
+                        statuses[response.status] = statuses.get(response.status, 0) + 1
+                    if response.status != 429:
+                        break
+                    # Back off like a well-behaved client: Retry-After, doubling, with jitter
+                    delay = max(delay * 2, float(response.headers.get('Retry-After', 1)))
+                    await asyncio.sleep(min(delay, 8) * random.uniform(0.5, 1.5))
+                if response.status == 200:
+                    latencies.append(time.perf_counter() - start)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                async with session.get(f"{url}/api/user", headers={'Authorization': f'Bearer {token}'}) as response:
+                    await response.read()
+                probes.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    return {
+        'ok_per_s': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'retries': statuses.get(429, 0),
+        'probe_p50': percentile(probes, 0.5),
+        'probe_p95': percentile(probes, 0.95),
+    }
+
+
+def bench_variant(name, args, db_path, port):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', BCRYPT_LOG_ROUNDS=str(args.rounds),
+               QUESTION_BANK_SCHEDULER='0')
+    if name == 'inline':
+        env.update(PASSWORD_HASH_WORKERS='0', PASSWORD_HASH_QUEUE='1000000')
+    else:
+        env.update(PASSWORD_HASH_QUEUE=str(args.queue))
+        if args.workers:
+            env['PASSWORD_HASH_WORKERS'] = str(args.workers)
+
+    command = [sys.executable, os.path.join(BACKEND, 'serve.py'), '--mode', 'sync', '--workers', '1',
+               '--port', str(port)]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(url, process)
+        for i in range(20):
+            httpx.post(f"{url}/api/register", timeout=60, json={
+                'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'bench-password'
+            })
+        token = httpx.post(f"{url}/api/login", timeout=60, json={
+            'email': 'user0@example.com', 'password': 'bench-password'
+        }).json()['access_token']
+        return asyncio.run(storm(url, token, args.logins, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=10, help='bcrypt cost (BCRYPT_LOG_ROUNDS)')
+    parser.add_argument('--workers', type=int, default=None, help='hashing processes (default: CPU count)')
+    parser.add_argument('--queue', type=int, default=16, help='PASSWORD_HASH_QUEUE for the pool variant')
+    parser.add_argument('--variants', default='inline,pool')
+    args = parser.parse_args()
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, bcrypt cost {args.rounds}, {os.cpu_count()} CPU(s)\n")
+    print(f"{'variant':<8} {'ok/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'429s':>7} {'probe p50':>10} {'probe p95':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for offset, name in enumerate(args.variants.split(',')):
+            r = bench_variant(name, args, os.path.join(tmp, f'{name}.db'), 5700 + offset)
+            print(f"{name:<8} {r['ok_per_s']:>7.1f} {r['p50']:>8.0f} {r['p95']:>8.0f} {r['retries']:>7} "
+                  f"{r['probe_p50']:>10.0f} {r['probe_p95']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
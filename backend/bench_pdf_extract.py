@@ -0,0 +1,101 @@
+"""
+PDF extraction benchmark on a synthetic text-heavy document.
+
+Compares the previous in-memory, serial, `+=` extraction with PdfExtractor
+(cold, page-parallel) and a repeated upload of the same file (cache hit).
+
+    python bench_pdf_extract.py --pages 500
+"""
+import io
+import os
+import sys
+import time
+import argparse
+
+
+def make_pdf(pages, lines_per_page=45):
+    """Builds a minimal multi-page PDF with plain Helvetica text on every page."""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 2 * pages + 1  # the /Pages object comes right after every page
+    page_ids = []
+    for p in range(pages):
+        lines = [
+            f"Page {p + 1} line {i + 1}: the quick brown fox studies photosynthesis and algebra."
+            for i in range(lines_per_page)
+        ]
+        text = "BT /F1 10 Tf 40 800 Td 14 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = text.encode('latin-1')
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font, content)
+        ))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref))
+    return out.getvalue()
+
+
+def baseline(data):
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from pdf_extract import PdfExtractor
+
+    data = make_pdf(args.pages)
+    print(f"Synthetic PDF: {args.pages} pages, {len(data) / 1024 / 1024:.1f} MB, {args.workers} workers\n")
+
+    start = time.perf_counter()
+    expected = baseline(data)
+    print(f"{'baseline (BytesIO, serial, +=)':<34} {time.perf_counter() - start:8.2f} s")
+
+    extractor = PdfExtractor(workers=args.workers)
+    # Start the pool outside the timed region; it is created once per server process
+    extractor.executor.submit(len, '').result()
+
+    start = time.perf_counter()
+    result = extractor.extract(io.BytesIO(data))
+    print(f"{'PdfExtractor, cold':<34} {time.perf_counter() - start:8.2f} s")
+    assert result['text'] == expected and not result['cached']
+
+    start = time.perf_counter()
+    result = extractor.extract(io.BytesIO(data))
+    print(f"{'PdfExtractor, same file again':<34} {time.perf_counter() - start:8.2f} s")
+    assert result['cached']
+
+    extractor.executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
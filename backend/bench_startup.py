@@ -0,0 +1,77 @@
+"""
+Cold-start benchmark: wall time and peak RSS of a fresh interpreter that builds the app.
+
+Each case runs in a new process (median of --runs). The "script" case is what seed_courses.py,
+create_user.py and check_users.py do: create_app(blueprints=False) plus one query. Pass
+--compare-rev to also time `import app` from an older commit (e.g. the pre-factory monolith).
+
+    python bench_startup.py --runs 10 --compare-rev HEAD~1
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+CASES = {
+    'python': 'pass',
+    'script': (
+        'from app import create_app\nfrom models import User\n'
+        'with create_app(blueprints=False).app_context(): User.query.count()'
+    ),
+    'server': 'from app import create_app\ncreate_app()',
+}
+
+REPORT_RSS = '\nimport resource\nprint(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)'
+
+
+def measure(code, cwd, env, runs):
+    """Median (ms, MB) over `runs` fresh interpreters."""
+    times, peaks = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, '-c', code + REPORT_RSS], cwd=cwd, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        times.append((time.perf_counter() - start) * 1000)
+        peaks.append(int(out.split()[-1]) / 1024)  # ru_maxrss is in KiB on Linux
+    return statistics.median(times), statistics.median(peaks)
+
+
+def export_backend(rev, dest):
+    """Writes the backend/ and server/ trees of `rev` into `dest`; returns its backend dir."""
+    root = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=BACKEND,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    archive = subprocess.run(['git', 'archive', rev, 'backend', 'server'], cwd=root,
+                             capture_output=True, check=True).stdout
+    subprocess.run(['tar', '-x', '-C', dest], input=archive, check=True)
+    return os.path.join(dest, 'backend')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--compare-rev', help='Git revision whose `import app` is timed as well.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        subprocess.run([sys.executable, '-c', 'from app import create_app\nfrom extensions import db\n'
+                        'with create_app(blueprints=False).app_context(): db.create_all()'],
+                       cwd=BACKEND, env=env, check=True)
+
+        cases = [(name, code, BACKEND) for name, code in CASES.items()]
+        if args.compare_rev:
+            cases.append((f'import app @ {args.compare_rev}', 'import app', export_backend(args.compare_rev, tmp)))
+
+        print(f"{'case':<28} {'ms':>8} {'MB':>8}")
+        for name, code, cwd in cases:
+            ms, mb = measure(code, cwd, env, args.runs)
+            print(f"{name:<28} {ms:>8.0f} {mb:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
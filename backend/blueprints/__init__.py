@@ -0,0 +1 @@
+"""Route groups, registered on the app by app.create_app()."""
@@ -0,0 +1,199 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import (JWTManager, create_access_token, create_refresh_token, jwt_required,
+                                get_jwt_identity, get_jwt)
+from extensions import db
+from models import User
+from password_hasher import create_password_hasher, HasherBusyError
+from user_cache import create_user_cache, user_profile, password_version
+
+bp = Blueprint('auth', __name__)
+jwt = JWTManager()
+user_cache = create_user_cache()
+password_hasher = create_password_hasher()
+
+@jwt.invalid_token_loader
+def invalid_token_callback(error):
+    return jsonify({
+        'message': 'Signature verification failed',
+        'error': 'invalid_token'
+    }), 422
+
+@jwt.unauthorized_loader
+def missing_token_callback(error):
+    return jsonify({
+        'description': 'Request does not contain an access token.',
+        'error': 'authorization_required'
+    }), 401
+
+def issue_tokens(user, refresh=True):
+    """
+    Access tokens embed the profile claims (username, email, notification flag) and the
+    settings version; refresh tokens embed the password version instead.
+    """
+    profile = user_profile(user)
+    user_cache.set(user.id, profile)
+    claims = {key: profile[key] for key in ('username', 'email', 'notifications_enabled')}
+    claims['sv'] = profile['settings_version']
+    tokens = {'access_token': create_access_token(identity=str(user.id), additional_claims=claims)}
+    if refresh:
+        tokens['refresh_token'] = create_refresh_token(identity=str(user.id),
+                                                       additional_claims={'pv': password_version(user)})
+    return tokens
+
+def busy_response(error):
+    return jsonify({'message': str(error)}), 429, {'Retry-After': '1'}
+
+def current_user_profile():
+    """
+    The signed-in user's profile, from this process's cache when it is at least as new as the
+    token's settings version; otherwise loaded (and cached) from the database. None if deleted.
+    """
+    user_id = int(get_jwt_identity())
+    profile = user_cache.get(user_id, min_version=get_jwt().get('sv', 0))
+    if profile is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        profile = user_profile(user)
+        user_cache.set(user_id, profile)
+    return profile
+
+# 1. Authentication Endpoints
+
+@bp.route('/api/register', methods=['POST'])
+def register():
+    data = request.get_json()
+    username = data.get('username')
+    email = data.get('email')
+    password = data.get('password')
+
+    if not username or not email or not password:
+        return jsonify({'message': 'Missing required fields'}), 400
+
+    if User.query.filter_by(username=username).first():
+        return jsonify({'message': 'Username already exists'}), 400
+    
+    if User.query.filter_by(email=email).first():
+        return jsonify({'message': 'Email already exists'}), 400
+
+    # Hand the pooled connection back for the (much slower) hash
+    db.session.rollback()
+    try:
+        hashed_password = password_hasher.hash(password)
+    except HasherBusyError as e:
+        return busy_response(e)
+    user = User(username=username, email=email, password=hashed_password)
+    db.session.add(user)
+    db.session.commit()
+
+    return jsonify({'message': 'User registered successfully'}), 201
+
+@bp.route('/api/login', methods=['POST'])
+def login():
+    data = request.get_json()
+    email = data.get('email')
+    password = data.get('password')
+
+    if password_hasher.busy:
+        # Turn a login storm away before it costs a query as well
+        return busy_response(HasherBusyError())
+
+    user = User.query.filter_by(email=email).first()
+    if user is not None:
+        # Hand the pooled connection back for the (much slower) hash; `user` keeps its loaded values
+        db.session.expunge(user)
+        db.session.rollback()
+
+    try:
+        valid = bool(user and password) and password_hasher.check(user.password, password)
+    except HasherBusyError as e:
+        return busy_response(e)
+
+    if valid:
+        if password_hasher.needs_rehash(user.password):
+            # BCRYPT_LOG_ROUNDS changed since this hash was made; the password is at hand, so upgrade it.
+            # password_version stays put, so the user's other sessions keep their refresh tokens.
+            try:
+                user.password = password_hasher.hash(password)
+                db.session.execute(db.update(User).where(User.id == user.id).values(password=user.password))
+                db.session.commit()
+            except HasherBusyError:
+                pass  # Left for a later login
+        return jsonify({
+            **issue_tokens(user),
+            'username': user.username,
+            'email': user.email
+        }), 200
+    else:
+        return jsonify({'message': 'Login Unsuccessful. Please check email and password'}), 401
+
+@bp.route('/api/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_token():
+    """New access token for a refresh token; no password check, so no bcrypt."""
+    user = db.session.get(User, int(get_jwt_identity()))
+    # A password change since the refresh token was issued revokes it
+    if user is None or get_jwt().get('pv') != password_version(user):
+        return jsonify({'message': 'Session expired, please log in again'}), 401
+    return jsonify({**issue_tokens(user, refresh=False), 'username': user.username}), 200
+
+@bp.route('/api/user', methods=['GET'])
+@jwt_required()
+def get_user_profile():
+    profile = current_user_profile()
+    if profile is None:
+        return jsonify({'message': 'User not found'}), 404
+    return jsonify({
+        'username': profile['username'],
+        'email': profile['email'],
+        'notifications_enabled': profile['notifications_enabled']
+    }), 200
+
+@bp.route('/api/user/cache/stats', methods=['GET'])
+@jwt_required()
+def get_user_cache_stats():
+    return jsonify(user_cache.stats()), 200
+
+@bp.route('/api/user/settings', methods=['PUT'])
+@jwt_required()
+def update_user_settings():
+    current_user_id = int(get_jwt_identity())
+    user = User.query.get_or_404(current_user_id)
+    data = request.get_json()
+    
+    if 'notifications_enabled' in data:
+        user.notifications_enabled = data['notifications_enabled']
+    user.settings_version = (user.settings_version or 0) + 1
+    
+    db.session.commit()
+    # issue_tokens replaces this process's cached profile; the new access token's version
+    # makes other workers drop theirs when this client next calls them
+    return jsonify({'message': 'Settings updated successfully', **issue_tokens(user, refresh=False)}), 200
+
+@bp.route('/api/change-password', methods=['POST'])
+@jwt_required()
+def change_password():
+    current_user_id = int(get_jwt_identity())
+    user = User.query.get_or_404(current_user_id)
+    data = request.get_json()
+    
+    current_password = data.get('current_password')
+    new_password = data.get('new_password')
+    
+    if not current_password or not new_password:
+        return jsonify({'message': 'Missing required fields'}), 400
+        
+    try:
+        if not password_hasher.check(user.password, current_password):
+            return jsonify({'message': 'Incorrect current password'}), 401
+        hashed_password = password_hasher.hash(new_password)
+    except HasherBusyError as e:
+        return busy_response(e)
+        
+    user.password = hashed_password
+    user.password_version = (user.password_version or 0) + 1
+    db.session.commit()
+    
+    # Refresh tokens issued before the change no longer work; hand this client new ones
+    return jsonify({'message': 'Password updated successfully', **issue_tokens(user)}), 200
+
@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import selectinload, defer
+from models import Course, Lesson
+
+bp = Blueprint('courses', __name__)
+
+@bp.route('/api/courses', methods=['GET'])
+@jwt_required()
+def get_courses():
+    courses = Course.query.all()
+    return jsonify([c.to_dict() for c in courses]), 200
+
+@bp.route('/api/courses/<int:course_id>', methods=['GET'])
+@jwt_required()
+def get_course(course_id):
+    # Lessons in one extra query, without their bodies: /api/lessons/<id> serves the content
+    course = Course.query.options(
+        selectinload(Course.lessons).options(defer(Lesson.content))
+    ).filter_by(id=course_id).first_or_404()
+    return jsonify({
+        **course.to_dict(),
+        'lessons': [l.to_dict(include_content=False) for l in course.lessons]
+    }), 200
+
+@bp.route('/api/lessons/<int:lesson_id>', methods=['GET'])
+@jwt_required()
+def get_lesson(lesson_id):
+    lesson = Lesson.query.options(selectinload(Lesson.questions)).filter_by(id=lesson_id).first_or_404()
+    return jsonify({
+        **lesson.to_dict(),
+        'questions': [q.to_dict() for q in lesson.questions]
+    }), 200
+
@@ -0,0 +1,999 @@
+from flask import Blueprint, current_app, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+import os
+import json
+import click
+import contextlib
+import base64
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import joinedload, defer
+from ai_service import GeminiService
+from quiz_cache import create_quiz_cache
+from quiz_jobs import create_job_queue, QueueFullError
+from question_bank import QuestionBank, BankScheduler, configured_targets
+from leaderboard import create_leaderboard, board_key, boards_for_attempt, WINDOWS
+from server.quiz_parser import QuizStreamParser
+from server.template_quiz import TemplateQuizGenerator, COURSE_TEMPLATES, course_records
+from extensions import db
+from models import (User, Course, Lesson, Quiz, Question, QuizAttempt, QuizAttemptAnswer, UserStats, UserLevelStats,
+                    LeaderboardScore, CachedQuiz, BankQuestion)
+
+# CLI commands stay top-level (`flask bank-warmup`) rather than under a `quiz` group
+bp = Blueprint('quiz', __name__, cli_group=None)
+
+quiz_cache = create_quiz_cache(db, CachedQuiz)
+question_bank = QuestionBank(db, BankQuestion)
+leaderboard = create_leaderboard(db, LeaderboardScore)
+
+# --- Helpers ---
+
+def create_quiz_set(items, user_id=None, topic=None, difficulty=None):
+    """Stores a list of {question, options, answer} dicts as a new quiz set and returns it."""
+    quiz = Quiz(user_id=user_id, topic=topic, difficulty=difficulty)
+    db.session.add(quiz)
+    db.session.flush() # Get ID
+
+    # One executemany INSERT instead of tracking an ORM object per question
+    if items:
+        db.session.execute(db.insert(Question), [
+            {
+                'quiz_id': quiz.id,
+                'question_text': item.get('question'),
+                'options': item.get('options'),
+                'correct_answer': item.get('answer')
+            }
+            for item in items
+        ])
+
+    db.session.commit()
+    return quiz
+
+def get_active_quiz(user_id):
+    """The user's most recent quiz set, falling back to the latest shared one."""
+    quiz = Quiz.query.filter_by(user_id=user_id).order_by(Quiz.id.desc()).first()
+    if quiz is None:
+        quiz = Quiz.query.filter_by(user_id=None).order_by(Quiz.id.desc()).first()
+    return quiz
+
+class QuizGenerationError(Exception):
+    def __init__(self, message, status_code=500, raw=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.raw = raw
+
+class QuizDeadlineError(QuizGenerationError):
+    """The AI service missed QUIZ_AI_DEADLINE; `questions` are the ones streamed before it."""
+    def __init__(self, questions=()):
+        super().__init__('AI service is taking too long', 504)
+        self.questions = list(questions)
+
+def quiz_ai_deadline():
+    """Seconds to wait for generated questions before serving templates (QUIZ_AI_DEADLINE, 0 waits for good)."""
+    return float(os.getenv('QUIZ_AI_DEADLINE', 30))
+
+def fetch_quiz_questions(topic, count, difficulty, use_cache=True, on_questions=None):
+    """
+    Returns parsed questions for a topic, served from the quiz cache when possible.
+    With `on_questions`, the response is streamed and the callback receives each batch of
+    questions as soon as it parses (every returned question is passed to it exactly once).
+    A response that is truncated or partly invalid keeps its valid questions and only the
+    missing ones are requested again. Raises QuizGenerationError when the AI service is
+    unavailable or nothing usable comes back.
+    """
+    gemini = GeminiService()
+    if not gemini.client:
+        raise QuizGenerationError('AI Service not configured', 503)
+
+    notify = on_questions or (lambda questions: None)
+    if use_cache:
+        quiz_data = quiz_cache.get(topic, count, difficulty, gemini.model_name)
+        if quiz_data is not None:
+            notify(quiz_data)
+            return quiz_data
+
+    parser = QuizStreamParser(limit=count)
+    raw = []
+    if on_questions:
+        try:
+            with contextlib.closing(gemini.stream_quiz(topic, count, difficulty)) as pieces:
+                for piece in pieces:
+                    raw.append(piece)
+                    questions = parser.feed(piece)
+                    if questions:
+                        notify(questions)
+                    if parser.full:
+                        break
+        except Exception as e:
+            print(f"Error streaming quiz from Gemini API: {str(e)}")
+    else:
+        raw.append(gemini.generate_quiz(topic, count, difficulty) or '')
+        parser.feed(raw[-1])
+    parser.close()
+
+    if not parser.full:
+        # Ask only for what is missing instead of regenerating the whole quiz
+        text = gemini.generate_quiz(topic, count - len(parser.questions), difficulty) or ''
+        raw.append(text)
+        questions = parser.feed(text)
+        parser.close()
+        if questions:
+            notify(questions)
+
+    return finish_quiz_generation(parser, raw, topic, count, difficulty, gemini.model_name, use_cache)
+
+def finish_quiz_generation(parser, raw, topic, count, difficulty, model_name, use_cache=True):
+    """Final step of fetch_quiz_questions (and its async twin): report, validate and cache."""
+    if parser.rejected:
+        print(f"Dropped {len(parser.rejected)} unusable generated question(s): {', '.join(sorted(set(parser.rejected)))}")
+    if not parser.questions:
+        raise QuizGenerationError('Failed to parse AI response', raw=''.join(raw))
+
+    quiz_data = parser.questions
+    if use_cache and parser.full:
+        quiz_cache.set(topic, count, difficulty, model_name, quiz_data)
+    return quiz_data
+
+# Upper bound on questions per generated quiz; larger requests are clamped
+MAX_QUIZ_QUESTIONS = 50
+
+def parse_question_count(value, default=5):
+    """The requested number of questions, clamped to 1..MAX_QUIZ_QUESTIONS. Raises ValueError if it is not a number."""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        raise ValueError('count must be a number')
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('count must be a number')
+    return max(1, min(count, MAX_QUIZ_QUESTIONS))
+
+def parse_topic(value, default='General Knowledge'):
+    """The requested quiz topic, stripped. Raises ValueError if it is given but blank or not a string."""
+    if value is None:
+        return default
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('topic must be a non-empty string')
+    return value.strip()
+
+def run_quiz_ai_call(app, job):
+    """
+    Worker-side body of fetch_quiz_questions_by_deadline: one model call whose questions are
+    streamed into the job and then added to the bank, even if the waiting request gave up on it.
+    """
+    with app.app_context():
+        params = job.params
+        try:
+            questions = fetch_quiz_questions(params['topic'], params['count'], params['difficulty'],
+                                             on_questions=job.add_questions if params['stream'] else None)
+        except QuizGenerationError as e:
+            job.fail(e.message, e)
+            return
+        if not params['stream']:
+            job.add_questions(questions)
+        try:
+            question_bank.add(params['topic'], params['difficulty'], questions)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Could not add generated questions to the bank: {e}")
+        job.finish(None)
+
+def fetch_quiz_questions_by_deadline(topic, count, difficulty, on_questions=None):
+    """
+    fetch_quiz_questions on the app's AI call queue (QUIZ_AI_WORKERS threads), waited for at
+    most quiz_ai_deadline() seconds; after that raises QuizDeadlineError with the questions
+    passed to `on_questions` so far. Generated questions are added to the bank, also when the
+    call finishes late. A full queue raises QuizGenerationError like an unavailable service.
+    """
+    try:
+        job = current_app.extensions['quiz_ai_calls'].submit(
+            None, {'topic': topic, 'count': count, 'difficulty': difficulty, 'stream': on_questions is not None}
+        )
+    except QueueFullError as e:
+        raise QuizGenerationError(str(e), 503)
+
+    deadline = quiz_ai_deadline()
+    give_up = time.monotonic() + deadline if deadline > 0 else None
+    arrived = []
+    while True:
+        remaining = None if give_up is None else give_up - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise QuizDeadlineError(arrived)
+        finished = job.is_finished
+        questions = job.wait_for_update(len(arrived), timeout=remaining)
+        arrived += questions
+        if questions and on_questions:
+            on_questions(questions)
+        if finished:
+            break
+
+    if job.status == 'failed':
+        raise job.exception if isinstance(job.exception, QuizGenerationError) else QuizGenerationError(job.error)
+    return arrived
+
+def template_quiz_questions(topic, count):
+    """
+    Questions built from stored data by server/template_quiz.py, with no AI call: the fallback
+    when Gemini is unconfigured or failing. Cricket topics use the Cricsheet match store when
+    one has been ingested; otherwise questions come from the definitions in the lessons whose
+    course or title match the topic, topped up with those lessons' own questions. Topics no
+    lesson matches get none, rather than questions about something else. May return fewer
+    than `count`.
+    """
+    if 'cricket' in topic.lower():
+        from server.match_store import MatchStore, DEFAULT_PATH
+        if os.path.exists(DEFAULT_PATH):
+            store = MatchStore(DEFAULT_PATH)
+            try:
+                questions = store.fact_questions(count)
+            finally:
+                store.close()
+            if questions:
+                return questions
+
+    wanted = topic.strip().lower()
+    if not wanted:
+        # Every lesson title contains the empty string
+        return []
+    lessons = db.session.query(Course.title, Lesson.title, Lesson.content, Lesson.id).join(Lesson.course).all()
+    matching = [l for l in lessons if wanted in f"{l[0]}: {l[1]}".lower() or f"{l[0]}: {l[1]}".lower() in wanted]
+    if not matching:
+        return []
+    # Wrong options may come from any course
+    every = course_records(l[:3] for l in lessons)
+    records = course_records(l[:3] for l in matching)
+    questions = TemplateQuizGenerator(records, COURSE_TEMPLATES, pool_records=every).generate(count)
+
+    if len(questions) < count:
+        stored = Question.query.filter(Question.lesson_id.in_([l[3] for l in matching])).limit(count).all()
+        questions += [q.to_dict() for q in stored][:count - len(questions)]
+    return [{'question': q['question'], 'options': q['options'], 'answer': q['answer']} for q in questions]
+
+def serve_quiz_questions(topic, count, difficulty, on_questions=None):
+    """
+    Samples a quiz from the question bank. Only when the bank cannot cover the request
+    is Gemini called, and its questions are added to the bank for next time.
+    If Gemini is unavailable, failing or slower than QUIZ_AI_DEADLINE, the questions at hand
+    are topped up from template_quiz_questions. `on_questions` is passed through to
+    fetch_quiz_questions, and also receives the fallback questions.
+    """
+    quiz_data = question_bank.sample(topic, difficulty, count)
+    if len(quiz_data) >= count:
+        if on_questions:
+            on_questions(quiz_data)
+        return quiz_data
+
+    try:
+        return fetch_quiz_questions_by_deadline(topic, count, difficulty, on_questions=on_questions)
+    except QuizGenerationError as e:
+        # Questions streamed before a missed deadline have already been passed to on_questions
+        arrived = getattr(e, 'questions', [])[:count]
+        added = quiz_data[:count - len(arrived)]
+        added += template_quiz_questions(topic, count - len(arrived) - len(added))
+        if not arrived and not added:
+            raise
+        print(f"Serving template questions for '{topic}': {e.message}")
+        if on_questions and added:
+            on_questions(added)
+        return arrived + added
+
+def warm_up_question_bank(size=None, topics=None, include_lessons=True):
+    """
+    Tops up the bank for configured topics and every lesson. Returns {(topic, difficulty): count}.
+    All short topics are generated together: QUESTION_BANK_BATCH questions per model call,
+    with up to QUESTION_BANK_CONCURRENCY calls in flight.
+    """
+    size = size or int(os.getenv('QUESTION_BANK_SIZE', 50))
+    batch_size = int(os.getenv('QUESTION_BANK_BATCH', 40))
+    concurrency = int(os.getenv('QUESTION_BANK_CONCURRENCY', 4))
+
+    gemini = GeminiService()
+    if not gemini.client:
+        print("Skipping question bank warm-up: AI Service not configured")
+        return {}
+
+    def generate_batch(specs):
+        return gemini.generate_quiz_batch(specs, max_questions_per_call=batch_size, max_concurrency=concurrency)
+
+    targets = [(topic, difficulty, None) for topic, difficulty in (topics or configured_targets())]
+    if include_lessons:
+        for lesson in Lesson.query.options(joinedload(Lesson.course), defer(Lesson.content)):
+            targets.append((f"{lesson.course.title}: {lesson.title}", 'Medium', lesson.id))
+
+    return question_bank.refill_many(targets, size, generate_batch)
+
+def start_bank_scheduler(app):
+    def warm_up():
+        with app.app_context():
+            warm_up_question_bank()
+    interval = int(os.getenv('QUESTION_BANK_REFILL_INTERVAL', 3600))
+    return BankScheduler(warm_up, interval=interval).start()
+
+@bp.cli.command('bank-warmup')
+@click.option('--topic', 'topics', multiple=True, help='Topic to fill, as "Topic" or "Topic:Difficulty". Repeatable.')
+@click.option('--size', type=int, default=None, help='Questions to keep per topic/difficulty.')
+@click.option('--no-lessons', is_flag=True, help='Skip the per-lesson topics.')
+def bank_warmup_command(topics, size, no_lessons):
+    """Pre-generate questions into the question bank."""
+    parsed = []
+    for entry in topics:
+        topic, _, difficulty = entry.partition(':')
+        parsed.append((topic.strip(), difficulty.strip() or 'Medium'))
+
+    results = warm_up_question_bank(size=size, topics=parsed or None, include_lessons=not no_lessons)
+    for (topic, difficulty), count in results.items():
+        click.echo(f"{topic} [{difficulty}]: {count} questions")
+
+@bp.cli.command('bank-scheduler')
+def bank_scheduler_command():
+    """Run the question bank refill loop in the foreground."""
+    scheduler = start_bank_scheduler(current_app._get_current_object())
+    click.echo(f"Refilling the question bank every {scheduler.interval}s. Ctrl+C to stop.")
+    try:
+        scheduler.join()
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+def lock_user_stats(user_id):
+    """
+    The user's UserStats row, locked for update, and whether this call created it (empty).
+    Two first submissions can both find no row: the loser's INSERT fails on the primary key
+    once the winner commits, and it carries on with the winner's row instead.
+    """
+    query = UserStats.query.filter_by(user_id=user_id).with_for_update()
+    stats = query.first()
+    if stats is not None:
+        return stats, False
+    try:
+        with db.session.begin_nested():
+            stats = UserStats(user_id=user_id)
+            db.session.add(stats)
+    except IntegrityError:
+        return query.one(), False
+    return stats, True
+
+def update_user_stats(attempt, correct_answers, active_date=None):
+    """Folds one new attempt into the user's summary rows. Caller commits."""
+    active_date = active_date or datetime.utcnow().date()
+    stats, created = lock_user_stats(attempt.user_id)
+    if created:
+        # First attempt since the summary tables were added: earlier attempts must count too.
+        # The new attempt and its answers are already flushed, so the rebuild includes them.
+        return rebuild_user_stats(attempt.user_id, commit=False)
+
+    stats.attempts += 1
+    stats.total_score += attempt.score
+    stats.total_questions += attempt.total_questions or 0
+    stats.correct_answers += correct_answers
+    stats.total_time += attempt.time_taken or 0
+    stats.best_score = attempt.score if stats.best_score is None else max(stats.best_score, attempt.score)
+    if attempt.time_taken is not None:
+        stats.best_time = attempt.time_taken if stats.best_time is None else min(stats.best_time, attempt.time_taken)
+    stats.last_attempt_id = attempt.id
+
+    # Daily streak: consecutive days with at least one attempt.
+    # Backdated (offline-synced) attempts can fill gaps, so those recompute from the stored days.
+    if stats.last_active_date is not None and active_date < stats.last_active_date:
+        db.session.flush()
+        recompute_streaks(stats)
+    elif stats.last_active_date != active_date:
+        if stats.last_active_date == active_date - timedelta(days=1):
+            stats.current_streak += 1
+        else:
+            stats.current_streak = 1
+        stats.last_active_date = active_date
+    stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+
+    level_key = attempt.level or 'Unknown'
+    level_stats = db.session.get(UserLevelStats, (attempt.user_id, level_key))
+    if level_stats is None:
+        level_stats = UserLevelStats(user_id=attempt.user_id, level=level_key, attempts=0,
+                                     total_score=0, total_questions=0, correct_answers=0)
+        db.session.add(level_stats)
+
+    level_stats.attempts += 1
+    level_stats.total_score += attempt.score
+    level_stats.total_questions += attempt.total_questions or 0
+    level_stats.correct_answers += correct_answers
+    return stats
+
+def recompute_streaks(stats):
+    """Sets the streak fields from the distinct days on which the user has attempts."""
+    days = sorted({
+        ts.date() for (ts,) in db.session.query(QuizAttempt.timestamp).filter(QuizAttempt.user_id == stats.user_id)
+        if ts is not None
+    })
+    current, longest, previous = 0, 0, None
+    for day in days:
+        current = current + 1 if previous == day - timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    stats.current_streak, stats.longest_streak = current, longest
+    stats.last_active_date = previous
+
+def rebuild_user_stats(user_id, commit=True):
+    """
+    Recomputes a user's summary rows from their attempts with SQL aggregates.
+    Used once for users whose history predates the summary tables, either when they
+    first read their stats or, uncommitted, when they first submit an attempt.
+    """
+    correct = db.func.sum(db.case((QuizAttemptAnswer.is_correct, 1), else_=0))
+    correct_by_attempt = db.session.query(
+        QuizAttemptAnswer.attempt_id.label('attempt_id'),
+        correct.label('correct')
+    ).group_by(QuizAttemptAnswer.attempt_id).subquery()
+
+    rows = db.session.query(
+        QuizAttempt.level,
+        db.func.count(QuizAttempt.id),
+        db.func.sum(QuizAttempt.score),
+        db.func.max(QuizAttempt.score),
+        db.func.sum(QuizAttempt.total_questions),
+        db.func.sum(db.func.coalesce(correct_by_attempt.c.correct, 0)),
+        db.func.sum(QuizAttempt.time_taken),
+        db.func.min(QuizAttempt.time_taken),
+        db.func.max(QuizAttempt.id)
+    ).outerjoin(correct_by_attempt, correct_by_attempt.c.attempt_id == QuizAttempt.id
+    ).filter(QuizAttempt.user_id == user_id).group_by(QuizAttempt.level).all()
+
+    UserLevelStats.query.filter_by(user_id=user_id).delete()
+    stats = db.session.get(UserStats, user_id) or UserStats(user_id=user_id)
+    stats.attempts, stats.total_score, stats.total_questions = 0, 0, 0
+    stats.correct_answers, stats.total_time = 0, 0.0
+    stats.best_score, stats.best_time, stats.last_attempt_id = None, None, None
+
+    for level, attempts, total_score, best_score, total_questions, correct_answers, total_time, best_time, last_id in rows:
+        db.session.add(UserLevelStats(
+            user_id=user_id, level=level or 'Unknown', attempts=attempts, total_score=total_score or 0,
+            total_questions=total_questions or 0, correct_answers=correct_answers or 0
+        ))
+        stats.attempts += attempts
+        stats.total_score += total_score or 0
+        stats.total_questions += total_questions or 0
+        stats.correct_answers += correct_answers or 0
+        stats.total_time += total_time or 0
+        stats.best_score = best_score if stats.best_score is None else max(stats.best_score, best_score)
+        if best_time is not None:
+            stats.best_time = best_time if stats.best_time is None else min(stats.best_time, best_time)
+        stats.last_attempt_id = max(stats.last_attempt_id or 0, last_id)
+
+    recompute_streaks(stats)
+
+    db.session.add(stats)
+    if commit:
+        db.session.commit()
+    return stats
+
+# 2. Quiz Data Endpoints
+
+@bp.route('/api/quiz/generate', methods=['POST'])
+@jwt_required()
+def generate_quiz():
+    data = request.get_json()
+    difficulty = data.get('difficulty', 'Medium')
+    try:
+        topic = parse_topic(data.get('topic'))
+        count = parse_question_count(data.get('count'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    try:
+        quiz_data = serve_quiz_questions(topic, count, difficulty)
+    except QuizGenerationError as e:
+        body = {'message': e.message}
+        if e.raw is not None:
+            body['raw'] = e.raw
+        return jsonify(body), e.status_code
+
+    try:
+        quiz = create_quiz_set(quiz_data, user_id=int(get_jwt_identity()), topic=topic, difficulty=difficulty)
+        return jsonify({'message': 'Quiz generated successfully', 'quiz_id': quiz.id, 'count': len(quiz_data)}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Error saving data: {str(e)}'}), 500
+
+def run_quiz_job(app, job):
+    """Worker-side body of a background generation job (see quiz_jobs.py)."""
+    with app.app_context():
+        params = job.params
+        try:
+            # Questions reach the job (and its SSE stream) as they are parsed from the model output
+            quiz_data = serve_quiz_questions(params['topic'], params['count'], params['difficulty'],
+                                             on_questions=job.add_questions)
+        except QuizGenerationError as e:
+            job.fail(e.message)
+            return
+
+        try:
+            quiz = create_quiz_set(quiz_data, user_id=job.user_id, topic=params['topic'], difficulty=params['difficulty'])
+        except Exception as e:
+            db.session.rollback()
+            job.fail(f'Error saving data: {str(e)}')
+            return
+        job.finish(quiz.id)
+
+def init_app(app):
+    # One job queue per app; its worker threads push their own app context
+    app.extensions['quiz_jobs'] = create_job_queue(lambda job: run_quiz_job(app, job))
+    # Model calls for bank misses run here rather than on a thread per request; a separate
+    # queue, since quiz jobs themselves wait on these calls
+    app.extensions['quiz_ai_calls'] = create_job_queue(lambda job: run_quiz_ai_call(app, job), prefix='QUIZ_AI',
+                                                       workers=8, max_queued=64, retention=0)
+
+@bp.route('/api/quiz/jobs', methods=['POST'])
+@jwt_required()
+def create_quiz_job():
+    data = request.get_json()
+    try:
+        topic = parse_topic(data.get('topic'))
+        count = parse_question_count(data.get('count'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    params = {
+        'topic': topic,
+        'count': count,
+        'difficulty': data.get('difficulty', 'Medium')
+    }
+
+    # Without Gemini the job still runs: serve_quiz_questions falls back to templates
+    try:
+        job = current_app.extensions['quiz_jobs'].submit(int(get_jwt_identity()), params)
+    except QueueFullError as e:
+        return jsonify({'message': str(e)}), 429
+
+    return jsonify({'job_id': job.id, 'status': job.status}), 202
+
+def get_user_job(job_id):
+    job = current_app.extensions['quiz_jobs'].get(job_id)
+    if job is None or job.user_id != int(get_jwt_identity()):
+        return None
+    return job
+
+@bp.route('/api/quiz/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_quiz_job(job_id):
+    job = get_user_job(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+@bp.route('/api/quiz/jobs/<job_id>/stream', methods=['GET'])
+@jwt_required()
+def stream_quiz_job(job_id):
+    """
+    Server-Sent Events stream of a job: one 'question' event per parsed question,
+    then a final 'done' (with quiz_id) or 'error' event.
+    """
+    job = get_user_job(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+
+    def events():
+        sent = 0
+        while True:
+            new_questions = job.wait_for_update(sent)
+            for item in new_questions:
+                yield f"event: question\ndata: {json.dumps(item)}\n\n"
+            sent += len(new_questions)
+
+            if job.is_finished and sent >= len(job.questions):
+                break
+            if not new_questions:
+                yield ": keep-alive\n\n"
+
+        if job.status == 'done':
+            yield f"event: done\ndata: {json.dumps({'quiz_id': job.quiz_id, 'count': sent})}\n\n"
+        else:
+            yield f"event: error\ndata: {json.dumps({'message': job.error})}\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/api/quiz/cache/stats', methods=['GET'])
+@jwt_required()
+def get_quiz_cache_stats():
+    return jsonify(quiz_cache.stats()), 200
+
+@bp.route('/api/quiz/data', methods=['POST'])
+def receive_quiz_data():
+    """
+    Endpoint to receive quiz data (e.g., from Gemini).
+    Expected JSON format:
+    [
+        {
+            "question": "What is 2+2?",
+            "options": ["3", "4", "5", "6"],
+            "answer": "4"
+        },
+        ...
+    ]
+    """
+    data = request.get_json()
+    
+    if not isinstance(data, list):
+        return jsonify({'message': 'Invalid data format. Expected a list of questions.'}), 400
+
+    # Each upload becomes its own quiz set. Authenticated callers own the set,
+    # anonymous uploads (e.g. seed_data.py) become the shared default quiz.
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    user_id = int(identity) if identity else None
+
+    try:
+        quiz = create_quiz_set(data, user_id=user_id)
+        return jsonify({'message': 'Quiz data received and stored successfully', 'quiz_id': quiz.id, 'count': len(data)}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Error storing data: {str(e)}'}), 500
+
+@bp.route('/api/quiz', methods=['GET'])
+@jwt_required()
+def get_quiz():
+    current_user_id = int(get_jwt_identity())
+    quiz_id = request.args.get('quiz_id', type=int)
+
+    if quiz_id is not None:
+        quiz = Quiz.query.get_or_404(quiz_id)
+        if quiz.user_id not in (None, current_user_id):
+            return jsonify({'message': 'Unauthorized'}), 403
+    else:
+        quiz = get_active_quiz(current_user_id)
+
+    if quiz is None:
+        return jsonify([]), 200
+
+    questions = Question.query.filter_by(quiz_id=quiz.id).order_by(Question.id).all()
+    return jsonify([q.to_dict() for q in questions]), 200
+
+class InvalidAttemptError(Exception):
+    pass
+
+# Scoring used by the quiz client: +5 per correct answer, -1 per wrong one
+POINTS_PER_CORRECT = 5
+POINTS_PER_WRONG = -1
+MAX_ATTEMPT_QUESTIONS = 1000
+
+def attempt_number(data, field, kind):
+    """A required numeric field of a submitted attempt as `kind` (int or float)."""
+    value = data.get(field)
+    if isinstance(value, bool):
+        raise InvalidAttemptError(f'Invalid {field}')
+    try:
+        return kind(value)
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidAttemptError(f'Invalid {field}')
+
+def attempt_timestamp(value):
+    """An attempt's ISO 8601 'timestamp' as naive UTC, the way QuizAttempt stores it."""
+    if not isinstance(value, str):
+        raise InvalidAttemptError('Invalid timestamp')
+    try:
+        taken_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise InvalidAttemptError('Invalid timestamp')
+    # Times without an offset are taken to be UTC already
+    if taken_at.tzinfo is not None:
+        taken_at = taken_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return taken_at
+
+def valid_answer(ans):
+    return (isinstance(ans, dict)
+            and isinstance(ans.get('question_text'), str)
+            and isinstance(ans.get('correct_answer'), str)
+            and isinstance(ans.get('user_answer'), (str, type(None)))
+            and (ans.get('question_id') is None or (isinstance(ans['question_id'], int)
+                                                    and not isinstance(ans['question_id'], bool))))
+
+def record_attempt(user_id, data):
+    """
+    Stores one submitted attempt with its answers and updates the stats and leaderboard.
+    Returns (attempt, board_updates); the caller commits and then passes the updates to
+    leaderboard.apply(). Raises InvalidAttemptError for malformed submissions.
+    """
+    if not isinstance(data, dict):
+        raise InvalidAttemptError('Invalid data')
+    score = attempt_number(data, 'score', int)
+    total_questions = attempt_number(data, 'total_questions', int)
+    time_taken = attempt_number(data, 'time_taken', float)
+    level = data.get('level')
+    quiz_id = data.get('quiz_id')
+    answers_data = data.get('answers') # List of {question_id, question_text, user_answer, correct_answer, is_correct}
+
+    if not 1 <= total_questions <= MAX_ATTEMPT_QUESTIONS:
+        raise InvalidAttemptError('Invalid total_questions')
+    if not total_questions * POINTS_PER_WRONG <= score <= total_questions * POINTS_PER_CORRECT:
+        raise InvalidAttemptError('Invalid score')
+    if not isinstance(level, str) or not level:
+        raise InvalidAttemptError('Invalid level')
+    if quiz_id is not None and (isinstance(quiz_id, bool) or not isinstance(quiz_id, int)):
+        raise InvalidAttemptError('Invalid quiz')
+    if not isinstance(answers_data, list) or not answers_data:
+        raise InvalidAttemptError('Invalid data')
+    if not all(valid_answer(a) for a in answers_data):
+        raise InvalidAttemptError('Invalid answers')
+
+    if quiz_id is not None:
+        quiz = db.session.get(Quiz, quiz_id)
+        if quiz is None or quiz.user_id not in (None, user_id):
+            raise InvalidAttemptError('Invalid quiz')
+
+    # Attempts synced from offline clients carry the time they were taken
+    taken_at = None
+    if data.get('timestamp') is not None:
+        taken_at = attempt_timestamp(data['timestamp'])
+
+    attempt = QuizAttempt(
+        user_id=user_id,
+        quiz_id=quiz_id,
+        score=score,
+        total_questions=total_questions,
+        time_taken=time_taken,
+        level=level,
+        timestamp=taken_at or datetime.utcnow()
+    )
+    db.session.add(attempt)
+    db.session.flush() # Get ID
+
+    # One executemany INSERT for all answers instead of an ORM object per answer
+    db.session.execute(db.insert(QuizAttemptAnswer), [
+        {
+            'attempt_id': attempt.id,
+            'question_id': ans.get('question_id'),
+            'question_text': ans.get('question_text'),
+            'user_answer': ans.get('user_answer'),
+            'correct_answer': ans.get('correct_answer'),
+            'is_correct': bool(ans.get('is_correct'))
+        }
+        for ans in answers_data
+    ])
+
+    update_user_stats(attempt, sum(1 for ans in answers_data if ans.get('is_correct')), active_date=attempt.timestamp.date())
+    try:
+        board_updates = leaderboard.record(user_id, level, score, time_taken, when=attempt.timestamp)
+    except ValueError:
+        raise InvalidAttemptError('Invalid score')
+    return attempt, board_updates
+
+@bp.route('/api/quiz/submit', methods=['POST'])
+@jwt_required()
+def submit_quiz():
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json()
+
+    try:
+        attempt, board_updates = record_attempt(current_user_id, data)
+    except InvalidAttemptError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+    
+    db.session.commit()
+    leaderboard.apply(current_user_id, board_updates)
+    return jsonify({'message': 'Quiz submitted successfully', 'attempt_id': attempt.id}), 201
+
+MAX_BATCH_ATTEMPTS = 500
+
+@bp.route('/api/quiz/submit/batch', methods=['POST'])
+@jwt_required()
+def submit_quiz_batch():
+    """
+    Stores many attempts in one request, e.g. when a mobile client syncs after being offline.
+    Expects {"attempts": [<submit payload>, ...]}; each attempt may include an ISO 'timestamp'.
+    Valid attempts are stored even if others are rejected.
+    """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    attempts_data = data.get('attempts')
+
+    if not isinstance(attempts_data, list) or not attempts_data:
+        return jsonify({'message': 'Expected a non-empty list of attempts'}), 400
+    if len(attempts_data) > MAX_BATCH_ATTEMPTS:
+        return jsonify({'message': f'At most {MAX_BATCH_ATTEMPTS} attempts per batch'}), 400
+
+    results, board_updates = [], []
+    for index, attempt_data in enumerate(attempts_data):
+        try:
+            # Savepoint per attempt so one bad entry does not discard the rest
+            with db.session.begin_nested():
+                attempt, updates = record_attempt(current_user_id, attempt_data)
+            results.append({'index': index, 'attempt_id': attempt.id})
+            board_updates += updates
+        except InvalidAttemptError as e:
+            results.append({'index': index, 'error': str(e)})
+        except (SQLAlchemyError, TypeError, ValueError) as e:
+            # The savepoint was rolled back; report the entry and keep going
+            print(f"Could not store batch attempt {index}: {e}")
+            results.append({'index': index, 'error': 'Could not store attempt'})
+
+    db.session.commit()
+    # Only attempts that survived their savepoint reach the rank indexes
+    leaderboard.apply(current_user_id, board_updates)
+    stored = sum(1 for r in results if 'attempt_id' in r)
+    return jsonify({'message': f'Stored {stored} of {len(results)} attempts', 'results': results}), 201
+
+HISTORY_FIELDS = ('id', 'quiz_id', 'score', 'total_questions', 'time_taken', 'level', 'timestamp')
+
+def history_version(user_id):
+    """Changes whenever the user records an attempt; used to build ETags."""
+    stats = db.session.get(UserStats, user_id)
+    if stats is not None:
+        return f"{stats.attempts}:{stats.last_attempt_id}"
+    count, last_id = db.session.query(db.func.count(QuizAttempt.id), db.func.max(QuizAttempt.id)).filter(
+        QuizAttempt.user_id == user_id
+    ).one()
+    return f"{count}:{last_id}"
+
+def conditional_json(tag_source, build):
+    """Answers 304 when the client's If-None-Match matches, otherwise jsonify(build()) with an ETag."""
+    tag = hashlib.sha1(tag_source.encode('utf-8')).hexdigest()
+    if request.if_none_match.contains_weak(tag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(tag, weak=True)
+    return response
+
+def encode_history_cursor(timestamp, attempt_id):
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{attempt_id}".encode()).decode()
+
+def decode_history_cursor(cursor):
+    timestamp, attempt_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(timestamp), int(attempt_id)
+
+@bp.route('/api/history', methods=['GET'])
+@jwt_required()
+def get_quiz_history():
+    """
+    Newest-first attempt history, one page at a time.
+    Query params: limit (default 50, max 200), cursor (from the X-Next-Cursor header
+    of the previous page) and fields (comma-separated subset of HISTORY_FIELDS).
+    """
+    current_user_id = int(get_jwt_identity())
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+    cursor = request.args.get('cursor')
+
+    fields = [f for f in request.args.get('fields', '').split(',') if f] or list(HISTORY_FIELDS)
+    if any(f not in HISTORY_FIELDS for f in fields):
+        return jsonify({'message': f"Unknown field. Allowed: {', '.join(HISTORY_FIELDS)}"}), 400
+
+    query = QuizAttempt.query.filter(QuizAttempt.user_id == current_user_id)
+    if cursor:
+        try:
+            timestamp, attempt_id = decode_history_cursor(cursor)
+        except Exception:
+            return jsonify({'message': 'Invalid cursor'}), 400
+        query = query.filter(db.or_(
+            QuizAttempt.timestamp < timestamp,
+            db.and_(QuizAttempt.timestamp == timestamp, QuizAttempt.id < attempt_id)
+        ))
+
+    # Only the requested columns (plus the cursor keys) are loaded
+    columns = list(dict.fromkeys(fields + ['timestamp', 'id']))
+    query = query.with_entities(*(getattr(QuizAttempt, c) for c in columns)).order_by(
+        QuizAttempt.timestamp.desc(), QuizAttempt.id.desc()
+    ).limit(limit + 1)
+
+    state = {}
+
+    def build():
+        rows = query.all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            state['next_cursor'] = encode_history_cursor(rows[-1].timestamp, rows[-1].id)
+        return [
+            {f: (getattr(row, f).isoformat() if f == 'timestamp' else getattr(row, f)) for f in fields}
+            for row in rows
+        ]
+
+    tag_source = f"history:{current_user_id}:{history_version(current_user_id)}:{limit}:{cursor}:{','.join(fields)}"
+    response = conditional_json(tag_source, build)
+    if state.get('next_cursor'):
+        response.headers['X-Next-Cursor'] = state['next_cursor']
+    return response
+
+@bp.route('/api/history/<int:attempt_id>', methods=['GET'])
+@jwt_required()
+def get_quiz_attempt_details(attempt_id):
+    current_user_id = int(get_jwt_identity())
+    attempt = QuizAttempt.query.get_or_404(attempt_id)
+    
+    if attempt.user_id != current_user_id:
+        return jsonify({'message': 'Unauthorized'}), 403
+        
+    details = {
+        'summary': attempt.to_dict(),
+        'answers': [a.to_dict() for a in attempt.answers]
+    }
+    return jsonify(details), 200
+
+@bp.route('/api/user/stats', methods=['GET'])
+@jwt_required()
+def get_user_stats():
+    current_user_id = int(get_jwt_identity())
+    stats = db.session.get(UserStats, current_user_id)
+    if stats is None:
+        stats = rebuild_user_stats(current_user_id)
+
+    def build():
+        recent = QuizAttempt.query.filter_by(user_id=current_user_id).order_by(QuizAttempt.timestamp.desc()).limit(3).all()
+        return {
+            **stats.to_dict(),
+            'recent_activity': [a.to_dict() for a in recent]
+        }
+
+    # The current streak depends on today's date as well as on the recorded attempts
+    tag_source = f"stats:{current_user_id}:{stats.attempts}:{stats.last_attempt_id}:{datetime.utcnow().date()}"
+    return conditional_json(tag_source, build)
+
+# --- Leaderboard Routes ---
+
+def requested_board():
+    window = request.args.get('window', 'all')
+    if window not in WINDOWS:
+        return None
+    return board_key(window, request.args.get('level'))
+
+@bp.route('/api/leaderboard', methods=['GET'])
+@jwt_required()
+def get_leaderboard():
+    """
+    Paginated rankings. Query params: window (all|week|month), level, limit, cursor.
+    Pass the returned next_cursor to fetch the following page.
+    """
+    current_user_id = int(get_jwt_identity())
+    key = requested_board()
+    if key is None:
+        return jsonify({'message': 'Invalid window'}), 400
+
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    try:
+        entries, next_cursor = leaderboard.page(key, limit=limit, cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    usernames = dict(
+        db.session.query(User.id, User.username).filter(User.id.in_([e['user_id'] for e in entries]))
+    ) if entries else {}
+    for entry in entries:
+        entry['username'] = usernames.get(entry['user_id'])
+
+    return jsonify({
+        'board': key,
+        'entries': entries,
+        'next_cursor': next_cursor,
+        'me': leaderboard.rank(key, current_user_id)
+    }), 200
+
+@bp.route('/api/leaderboard/me', methods=['GET'])
+@jwt_required()
+def get_my_rank():
+    key = requested_board()
+    if key is None:
+        return jsonify({'message': 'Invalid window'}), 400
+    return jsonify({'board': key, 'me': leaderboard.rank(key, int(get_jwt_identity()))}), 200
+
+@bp.cli.command('leaderboard-rebuild')
+def leaderboard_rebuild_command():
+    """Recompute every leaderboard board from the stored quiz attempts."""
+    LeaderboardScore.query.delete()
+    totals = {}
+    for user_id, level, score, time_taken, timestamp in db.session.query(
+        QuizAttempt.user_id, QuizAttempt.level, QuizAttempt.score, QuizAttempt.time_taken, QuizAttempt.timestamp
+    ).yield_per(1000):
+        for key in boards_for_attempt(level, timestamp):
+            points, attempts, best_time = totals.get((key, user_id), (0, 0, None))
+            if time_taken is not None:
+                best_time = time_taken if best_time is None else min(best_time, time_taken)
+            totals[(key, user_id)] = (points + score, attempts + 1, best_time)
+
+    db.session.bulk_insert_mappings(LeaderboardScore, [
+        {'board': key, 'user_id': user_id, 'points': points, 'attempts': attempts, 'best_time': best_time}
+        for (key, user_id), (points, attempts, best_time) in totals.items()
+    ])
+    db.session.commit()
+    leaderboard.invalidate()
+    click.echo(f"Rebuilt {len(totals)} leaderboard rows.")
+
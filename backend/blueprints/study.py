@@ -0,0 +1,171 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import os
+import json
+import time
+import contextlib
+from ai_service import GeminiService, answer_cache, stream_latency
+from pdf_extract import create_pdf_extractor, PdfTooLargeError
+from doc_index import DocumentRetriever, chunk_text
+from extensions import db
+from models import Document, DocumentChunk
+
+bp = Blueprint('study', __name__)
+
+pdf_extractor = create_pdf_extractor()
+
+def load_document_chunks(document_id):
+    rows = db.session.query(DocumentChunk.text).filter_by(document_id=document_id).order_by(DocumentChunk.position)
+    return [text for (text,) in rows]
+
+document_retriever = DocumentRetriever(load_document_chunks, cache_entries=int(os.getenv('DOCUMENT_INDEX_CACHE', 64)))
+
+# --- PDF & Chat Routes ---
+
+def store_document(user_id, filename, result):
+    """Saves extracted text as a chunked document, reusing the user's copy of an identical upload."""
+    document = Document.query.filter_by(user_id=user_id, sha256=result['sha256']).first()
+    if document is not None:
+        return document
+
+    document = Document(user_id=user_id, filename=filename, sha256=result['sha256'], page_count=result['pages'])
+    db.session.add(document)
+    db.session.flush() # Get ID
+
+    chunks = chunk_text(result['text'])
+    if chunks:
+        db.session.execute(db.insert(DocumentChunk), [
+            {'document_id': document.id, 'position': position, 'text': chunk}
+            for position, chunk in enumerate(chunks)
+        ])
+    db.session.commit()
+    return document
+
+@bp.route('/api/pdf/extract', methods=['POST'])
+@jwt_required()
+def extract_pdf_text():
+    if 'file' not in request.files:
+        return jsonify({'message': 'No file part'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'message': 'No selected file'}), 400
+
+    if file:
+        try:
+            # Spooled to disk, extracted in parallel and cached by content hash (see pdf_extract.py)
+            result = pdf_extractor.extract(file.stream)
+            document = store_document(int(get_jwt_identity()), file.filename, result)
+            return jsonify({
+                'text': result['text'],
+                'pages': result['pages'],
+                'sha256': result['sha256'],
+                'document_id': document.id,
+                'message': 'PDF processed successfully'
+            }), 200
+        except PdfTooLargeError as e:
+            return jsonify({'message': str(e)}), 413
+        except Exception as e:
+            return jsonify({'message': f'Error processing PDF: {str(e)}'}), 500
+
+def resolve_chat_context(data, user_id):
+    """
+    Returns (context, doc_hash) for a chat request, or (None, None) if the requested document
+    is not the user's. With a 'document_id' only the chunks most relevant to the question are
+    used; a raw 'context' string is still accepted.
+    """
+    question = data.get('question')
+    document_id = data.get('document_id')
+    context = data.get('context') or '' # The extracted PDF text (legacy clients)
+
+    if document_id is None:
+        return context, None
+
+    document = db.session.get(Document, document_id)
+    if document is None or document.user_id != user_id:
+        return None, None
+    chunks = document_retriever.retrieve(document.id, question, k=int(os.getenv('CHAT_TOP_K', 6)))
+    return "\n\n".join(chunks), document.sha256
+
+@bp.route('/api/chat', methods=['POST'])
+@jwt_required()
+def chat_with_ai():
+    """
+    Answers a question about a document. Send 'document_id' (from /api/pdf/extract) so only
+    the most relevant chunks go into the prompt; a raw 'context' string is still accepted.
+    """
+    data = request.get_json()
+    question = data.get('question')
+
+    if not question:
+        return jsonify({'message': 'Question is required'}), 400
+
+    context, doc_hash = resolve_chat_context(data, int(get_jwt_identity()))
+    if context is None:
+        return jsonify({'message': 'Document not found'}), 404
+    
+    gemini = GeminiService()
+    if not gemini.client:
+         return jsonify({'message': 'AI Service not configured'}), 503
+
+    answer = gemini.ask_pdf(context, question, doc_hash=doc_hash)
+    return jsonify({'answer': answer}), 200
+
+@bp.route('/api/chat/stream', methods=['POST'])
+@jwt_required()
+def stream_chat_with_ai():
+    """
+    Same request body as /api/chat, answered as Server-Sent Events: 'token' events carry
+    {"text": ...} pieces as the model produces them, then one 'done' (with timings) or 'error'.
+    """
+    data = request.get_json()
+    question = data.get('question')
+
+    if not question:
+        return jsonify({'message': 'Question is required'}), 400
+
+    context, doc_hash = resolve_chat_context(data, int(get_jwt_identity()))
+    if context is None:
+        return jsonify({'message': 'Document not found'}), 404
+
+    gemini = GeminiService()
+    if not gemini.client:
+         return jsonify({'message': 'AI Service not configured'}), 503
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def events():
+        start = time.perf_counter()
+        first_token_ms = None
+        # closing(): if the client disconnects, the WSGI server closes this generator,
+        # which closes the upstream Gemini stream and frees its in-flight slot
+        with contextlib.closing(gemini.stream_pdf_answer(context, question, doc_hash=doc_hash)) as pieces:
+            try:
+                for text in pieces:
+                    if first_token_ms is None:
+                        first_token_ms = round((time.perf_counter() - start) * 1000, 1)
+                    yield sse('token', {'text': text})
+            except Exception as e:
+                yield sse('error', {'message': f"Error processing your question: {str(e)}"})
+                return
+        yield sse('done', {
+            'time_to_first_token_ms': first_token_ms,
+            'total_ms': round((time.perf_counter() - start) * 1000, 1)
+        })
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@bp.route('/api/chat/metrics', methods=['GET'])
+@jwt_required()
+def get_chat_metrics():
+    return jsonify(stream_latency.stats()), 200
+
+@bp.route('/api/chat/cache/stats', methods=['GET'])
+@jwt_required()
+def get_chat_cache_stats():
+    return jsonify(answer_cache.stats()), 200
+
@@ -1,4 +1,7 @@
-from app import app, db, User
+from app import create_app
+from models import User
+
+app = create_app(blueprints=False)
 
 with app.app_context():
     users = User.query.all()
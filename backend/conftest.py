@@ -0,0 +1,32 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from blueprints.quiz import leaderboard
+from extensions import db
+from models import User
+
+
+@pytest.fixture
+def app():
+    """The app on a fresh in-memory database, with its tables and one user (id 1, learner@example.com)."""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'JWT_SECRET_KEY': 'backend-test-secret-key-000000000'})
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(username='learner', email='learner@example.com', password='x'))
+        db.session.commit()
+    # Rank indexes are per process; don't carry one test's boards into the next
+    leaderboard.invalidate()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def headers(app):
+    """Authorization header with an access token for user 1."""
+    with app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity='1')}"}
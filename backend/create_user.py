@@ -1,4 +1,8 @@
-from app import app, db, User, bcrypt
+from app import create_app
+from extensions import db, bcrypt
+from models import User
+
+app = create_app(blueprints=False)
 
 with app.app_context():
     if not User.query.filter_by(email='test@example.com').first():
@@ -0,0 +1,112 @@
+import re
+import math
+from collections import Counter, defaultdict
+
+from quiz_cache import MemoryCacheStore
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its of on or
+so than that the their them then there these they this to was were what when where which who why
+will with you your
+""".split())
+
+
+def tokenize(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def chunk_text(text, size=1500, overlap=200):
+    """
+    Splits text into ~`size` character chunks, preferring paragraph and sentence breaks,
+    with `overlap` characters repeated between neighbours so answers spanning a boundary survive.
+    """
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            window = text[start:end]
+            for separator in ('\n\n', '\n', '. '):
+                cut = window.rfind(separator)
+                if cut > size // 2:
+                    end = start + cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        # Start the next chunk on a word boundary inside the overlap window
+        next_start = end - overlap
+        space = text.find(' ', next_start, end)
+        start = max(space + 1 if space != -1 else next_start, start + 1)
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a document's chunks, held as an in-memory inverted index."""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.lengths = []
+
+        for position, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk))
+            self.lengths.append(sum(terms.values()))
+            for term, freq in terms.items():
+                self.postings[term].append((position, freq))
+
+        self.count = len(self.lengths)
+        self.avg_length = (sum(self.lengths) / self.count) if self.count else 0.0
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+
+    def search(self, query, k=5):
+        """Top-k chunk positions for the query as [(position, score)], best first."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for position, freq in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / (self.avg_length or 1))
+                scores[position] += idf * freq * (self.k1 + 1) / (freq + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+class DocumentRetriever:
+    """
+    Keeps recently used document indexes in memory and returns the chunks most
+    relevant to a question. `load_chunks(document_id)` supplies the chunk texts in order.
+    """
+
+    def __init__(self, load_chunks, cache_entries=64, ttl=3600):
+        self.load_chunks = load_chunks
+        self.ttl = ttl
+        self._indexes = MemoryCacheStore(max_entries=cache_entries)
+
+    def index(self, document_id):
+        entry = self._indexes.get(document_id)
+        if entry is None:
+            chunks = self.load_chunks(document_id)
+            entry = (chunks, BM25Index(chunks))
+            self._indexes.set(document_id, entry, self.ttl)
+        return entry
+
+    def retrieve(self, document_id, question, k=6):
+        """
+        Up to k relevant chunks, returned in document order. Falls back to the opening
+        chunks when nothing matches (e.g. "summarize this document").
+        """
+        chunks, index = self.index(document_id)
+        hits = index.search(question, k)
+        positions = sorted(position for position, _ in hits) or list(range(min(k, len(chunks))))
+        return [chunks[position] for position in positions]
@@ -0,0 +1,6 @@
+"""Flask extension instances, bound to the app in app.create_app()."""
+from flask_sqlalchemy import SQLAlchemy
+from flask_bcrypt import Bcrypt
+
+db = SQLAlchemy()
+bcrypt = Bcrypt()
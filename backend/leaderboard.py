@@ -0,0 +1,252 @@
+import os
+import time
+import base64
+import threading
+from datetime import datetime
+
+from flask import current_app
+
+WINDOWS = ('all', 'week', 'month')
+ALL_LEVELS = '*'
+
+
+def window_key(window, when=None):
+    """Board prefix for a time window: 'all', 'week:2025-W07' or 'month:2025-02'."""
+    when = when or datetime.utcnow()
+    if window == 'week':
+        year, week, _ = when.isocalendar()
+        return f"week:{year}-W{week:02d}"
+    if window == 'month':
+        return f"month:{when.year}-{when.month:02d}"
+    return 'all'
+
+
+def board_key(window='all', level=None, when=None):
+    return f"{window_key(window, when)}|{level or ALL_LEVELS}"
+
+
+def boards_for_attempt(level, when=None):
+    """Every board a single attempt counts towards: each window, overall and for its level."""
+    keys = []
+    for window in WINDOWS:
+        keys.append(board_key(window, None, when))
+        if level:
+            keys.append(board_key(window, level, when))
+    return keys
+
+
+def encode_cursor(points, user_id):
+    return base64.urlsafe_b64encode(f"{points}:{user_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        points, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return int(points), int(user_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+class RankIndex:
+    """
+    Number of users per point total, kept in a sparse Fenwick tree over the 32-bit range.
+    Updating a user's points and looking up a rank both touch O(log R) nodes,
+    and memory grows with the number of distinct point totals rather than users.
+    """
+
+    SIZE = 1 << 32
+    OFFSET = 1 << 31
+
+    def __init__(self):
+        self._tree = {}
+        self._points = {}
+        self.loaded_at = time.time()
+
+    MIN_POINTS = -OFFSET
+    MAX_POINTS = OFFSET - 1
+
+    @classmethod
+    def check(cls, points):
+        if not cls.MIN_POINTS <= points <= cls.MAX_POINTS:
+            raise ValueError(f'Points {points} outside the rank index range')
+        return points
+
+    def _update(self, points, delta):
+        i = self.check(points) + self.OFFSET + 1
+        while i <= self.SIZE:
+            self._tree[i] = self._tree.get(i, 0) + delta
+            i += i & -i
+
+    def _count_at_most(self, points):
+        i = self.check(points) + self.OFFSET + 1
+        total = 0
+        while i > 0:
+            total += self._tree.get(i, 0)
+            i -= i & -i
+        return total
+
+    def set(self, user_id, points):
+        previous = self._points.get(user_id)
+        if previous == points:
+            return
+        if previous is not None:
+            self._update(previous, -1)
+        self._update(points, 1)
+        self._points[user_id] = points
+
+    def rank_of_points(self, points):
+        """Competition ranking: 1 + number of users with strictly more points."""
+        return 1 + len(self._points) - self._count_at_most(points)
+
+    def rank(self, user_id):
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self.rank_of_points(points)
+
+    def points(self, user_id):
+        return self._points.get(user_id)
+
+    def __len__(self):
+        return len(self._points)
+
+
+class Leaderboard:
+    """
+    Materialized per-board scores (one row per board and user) plus in-memory rank indexes.
+    The model needs board, user_id, points, attempts and best_time columns.
+
+    Rank indexes are built lazily per board and updated in place by apply() once the
+    scores from record() are committed. Updates made by other worker processes become
+    visible once an index is older than `index_ttl` seconds: it keeps being served while
+    a background thread reloads it, so only a board's first lookup waits for a build.
+    """
+
+    def __init__(self, db, model, index_ttl=60):
+        self.db = db
+        self.model = model
+        self.index_ttl = index_ttl
+        self._indexes = {}
+        # Board -> updates applied while its reload runs, replayed onto the reloaded index
+        self._refreshing = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id, level, score, time_taken=None, when=None):
+        """
+        Adds an attempt's score to every board it counts towards and returns the
+        [(board, points)] updates. Caller commits, then passes them to apply().
+        Raises ValueError, before anything is committed, if a total leaves the rank index range.
+        """
+        updated = []
+        for key in boards_for_attempt(level, when):
+            row = self.model.query.filter_by(board=key, user_id=user_id).with_for_update().first()
+            if row is None:
+                row = self.model(board=key, user_id=user_id, points=0, attempts=0)
+                self.db.session.add(row)
+            row.points = RankIndex.check(row.points + score)
+            row.attempts += 1
+            if time_taken is not None:
+                row.best_time = time_taken if row.best_time is None else min(row.best_time, time_taken)
+            updated.append((key, row.points))
+        return updated
+
+    def apply(self, user_id, updates):
+        """Moves the user in the loaded rank indexes; only call with committed updates from record()."""
+        with self._lock:
+            for key, points in updates:
+                index = self._indexes.get(key)
+                if index is not None:
+                    index.set(user_id, points)
+                if key in self._refreshing:
+                    self._refreshing[key].append((user_id, points))
+
+    def _load(self, key):
+        index = RankIndex()
+        rows = self.db.session.query(self.model.user_id, self.model.points).filter(self.model.board == key)
+        for user_id, points in rows:
+            index.set(user_id, points)
+        return index
+
+    def _refresh(self, app, key, log):
+        try:
+            with app.app_context():
+                index = self._load(key)
+        except Exception as e:
+            print(f"Could not reload the leaderboard index for {key}: {e}")
+            index = None
+        with self._lock:
+            # invalidate() during the reload drops it; the next lookup builds afresh
+            if self._refreshing.get(key) is not log:
+                return
+            del self._refreshing[key]
+            if index is not None:
+                for user_id, points in log:
+                    index.set(user_id, points)
+                self._indexes[key] = index
+
+    def index(self, key):
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                if time.time() - index.loaded_at >= self.index_ttl and key not in self._refreshing:
+                    log = self._refreshing[key] = []
+                    threading.Thread(target=self._refresh, args=(current_app._get_current_object(), key, log),
+                                     name='leaderboard-refresh', daemon=True).start()
+                return index
+
+        index = self._load(key)
+        with self._lock:
+            return self._indexes.setdefault(key, index)
+
+    def rank(self, key, user_id):
+        index = self.index(key)
+        rank = index.rank(user_id)
+        if rank is None:
+            return None
+        return {'rank': rank, 'points': index.points(user_id), 'total': len(index)}
+
+    def page(self, key, limit=20, cursor=None):
+        """
+        One page of the board ordered by points (desc) then user id, using keyset pagination
+        on the (board, points, user_id) index. Returns (rows, next_cursor).
+        """
+        limit = max(1, limit)
+        query = self.model.query.filter(self.model.board == key)
+        if cursor:
+            points, user_id = decode_cursor(cursor)
+            query = query.filter(self.db.or_(
+                self.model.points < points,
+                self.db.and_(self.model.points == points, self.model.user_id > user_id)
+            ))
+
+        rows = query.order_by(self.model.points.desc(), self.model.user_id.asc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].points, rows[-1].user_id)
+
+        index = self.index(key)
+        entries = [
+            {
+                'rank': index.rank_of_points(row.points),
+                'user_id': row.user_id,
+                'points': row.points,
+                'attempts': row.attempts,
+                'best_time': row.best_time
+            }
+            for row in rows
+        ]
+        return entries, next_cursor
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._indexes.clear()
+                self._refreshing.clear()
+            else:
+                self._indexes.pop(key, None)
+                self._refreshing.pop(key, None)
+
+
+def create_leaderboard(db, model):
+    return Leaderboard(db, model, index_ttl=int(os.getenv('LEADERBOARD_INDEX_TTL', 60)))
@@ -0,0 +1,258 @@
+from datetime import datetime, timedelta
+from extensions import db
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(20), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password = db.Column(db.String(60), nullable=False)
+    notifications_enabled = db.Column(db.Boolean, default=True)
+    # Bumped on every settings change; access tokens carry it (see user_cache.py)
+    settings_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on every password change (not on hash upgrades); refresh tokens carry it
+    password_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def __repr__(self):
+        return f"User('{self.username}', '{self.email}')"
+
+class Course(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    image_url = db.Column(db.String(200), nullable=True)
+    lessons = db.relationship('Lesson', backref='course', lazy=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'image_url': self.image_url,
+            'lesson_count': self.lesson_count
+        }
+
+class Lesson(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)
+    questions = db.relationship('Question', backref='lesson', lazy=True)
+
+    def to_dict(self, include_content=True):
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'course_id': self.course_id
+        }
+        if include_content:
+            data['content'] = self.content
+        return data
+
+# Counted in the same SELECT as the course, instead of loading every lesson (and its content) to len() them
+Course.lesson_count = db.column_property(
+    db.select(db.func.count(Lesson.id)).where(Lesson.course_id == Course.id).correlate_except(Lesson).scalar_subquery()
+)
+
+# A quiz set groups the questions generated for (or loaded by) one user,
+# so concurrent users no longer overwrite each other's active quiz.
+# user_id is empty for sets loaded anonymously through /api/quiz/data; those act as the shared default.
+
+class Quiz(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
+    topic = db.Column(db.String(200), nullable=True)
+    difficulty = db.Column(db.String(20), nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    questions = db.relationship('Question', backref='quiz', lazy=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'topic': self.topic,
+            'difficulty': self.difficulty,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+# Storing quiz questions as individual rows to be queryable.
+# Questions belong either to a quiz set (quiz_id) or to a lesson (lesson_id).
+
+class Question(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    question_text = db.Column(db.String(500), nullable=False)
+    options = db.Column(db.JSON, nullable=False) # Storing options as JSON array
+    correct_answer = db.Column(db.String(200), nullable=False)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=True, index=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=True, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'question': self.question_text,
+            'options': self.options,
+            'answer': self.correct_answer,
+            'lesson_id': self.lesson_id,
+            'quiz_id': self.quiz_id
+        }
+
+class QuizAttempt(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # user_id is covered by ix_quiz_attempt_user_timestamp below
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=True, index=True)
+    score = db.Column(db.Integer, nullable=False)
+    total_questions = db.Column(db.Integer, nullable=False)
+    time_taken = db.Column(db.Float, nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    # Set in Python (UTC) so stored values compare consistently with the history cursor on every backend
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    answers = db.relationship('QuizAttemptAnswer', backref='attempt', lazy=True)
+
+    __table_args__ = (
+        # Serves the per-user history listing and its (timestamp, id) keyset cursor
+        db.Index('ix_quiz_attempt_user_timestamp', 'user_id', 'timestamp', 'id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'quiz_id': self.quiz_id,
+            'score': self.score,
+            'total_questions': self.total_questions,
+            'time_taken': self.time_taken,
+            'level': self.level,
+            'timestamp': self.timestamp.isoformat()
+        }
+
+class QuizAttemptAnswer(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempt.id'), nullable=False, index=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=True, index=True)
+    question_text = db.Column(db.String(500), nullable=False)
+    user_answer = db.Column(db.String(200), nullable=True)
+    correct_answer = db.Column(db.String(200), nullable=False)
+    is_correct = db.Column(db.Boolean, nullable=False)
+
+    def to_dict(self):
+        return {
+            'question_text': self.question_text,
+            'user_answer': self.user_answer,
+            'correct_answer': self.correct_answer,
+            'is_correct': self.is_correct
+        }
+
+# Per-user running totals, updated on every submission so the profile
+# page does not have to re-read the whole attempt history.
+
+class UserStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    total_score = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Integer, nullable=True)
+    total_questions = db.Column(db.Integer, nullable=False, default=0)
+    correct_answers = db.Column(db.Integer, nullable=False, default=0)
+    total_time = db.Column(db.Float, nullable=False, default=0.0)
+    best_time = db.Column(db.Float, nullable=True)
+    current_streak = db.Column(db.Integer, nullable=False, default=0)
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    last_active_date = db.Column(db.Date, nullable=True)
+    last_attempt_id = db.Column(db.Integer, nullable=True)
+
+    levels = db.relationship('UserLevelStats', lazy=True,
+                             primaryjoin='UserStats.user_id == foreign(UserLevelStats.user_id)', viewonly=True)
+
+    def to_dict(self):
+        # A streak only counts as current if the user was active today or yesterday
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        is_current = self.last_active_date is not None and self.last_active_date >= yesterday
+        return {
+            'quizzes_taken': self.attempts,
+            'average_score': round(self.total_score / self.attempts, 2) if self.attempts else 0,
+            'best_score': self.best_score,
+            'accuracy': round(self.correct_answers / self.total_questions, 4) if self.total_questions else 0,
+            'total_time': self.total_time,
+            'best_time': self.best_time,
+            'current_streak': self.current_streak if is_current else 0,
+            'longest_streak': self.longest_streak,
+            'last_active_date': self.last_active_date.isoformat() if self.last_active_date else None,
+            'levels': {l.level: l.to_dict() for l in self.levels}
+        }
+
+class UserLevelStats(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    level = db.Column(db.String(20), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    total_score = db.Column(db.Integer, nullable=False, default=0)
+    total_questions = db.Column(db.Integer, nullable=False, default=0)
+    correct_answers = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'average_score': round(self.total_score / self.attempts, 2) if self.attempts else 0,
+            'accuracy': round(self.correct_answers / self.total_questions, 4) if self.total_questions else 0
+        }
+
+class LeaderboardScore(db.Model):
+    # One row per (board, user); boards are time window + level (see leaderboard.py)
+    board = db.Column(db.String(40), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    best_time = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_leaderboard_score_board_points', 'board', 'points', 'user_id'),
+    )
+
+# Uploaded study documents, kept server-side so chat requests only
+# send a document id and the prompt only carries the relevant chunks.
+
+class Document(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    filename = db.Column(db.String(255), nullable=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    page_count = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    chunks = db.relationship('DocumentChunk', backref='document', lazy=True, order_by='DocumentChunk.position')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'sha256': self.sha256,
+            'page_count': self.page_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class DocumentChunk(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    document_id = db.Column(db.Integer, db.ForeignKey('document.id'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+
+class CachedQuiz(db.Model):
+    # Shared store for the 'db' quiz cache backend (see quiz_cache.py)
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.JSON, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    last_used_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class BankQuestion(db.Model):
+    # Pre-generated questions served by /api/quiz/generate (see question_bank.py)
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(200), nullable=False)
+    difficulty = db.Column(db.String(20), nullable=False)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=True, index=True)
+    question_text = db.Column(db.String(500), nullable=False)
+    options = db.Column(db.JSON, nullable=False)
+    correct_answer = db.Column(db.String(200), nullable=False)
+    fingerprint = db.Column(db.String(40), nullable=False)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index('ix_bank_question_topic_difficulty', 'topic', 'difficulty'),
+    )
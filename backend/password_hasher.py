@@ -0,0 +1,111 @@
+import os
+import threading
+
+import bcrypt
+
+# bcrypt only ever used the first 72 bytes; bcrypt>=5 raises instead of truncating
+MAX_PASSWORD_BYTES = 72
+
+
+class HasherBusyError(Exception):
+    """Raised when too many hashes are already queued; routes answer 429."""
+
+    def __init__(self, message='Too many sign-ins in progress, please try again shortly'):
+        super().__init__(message)
+
+
+def _encode(password):
+    return password.encode('utf-8')[:MAX_PASSWORD_BYTES]
+
+
+def hash_password(password, rounds):
+    """bcrypt hash of `password` as a string. Module-level so the process pool can run it."""
+    return bcrypt.hashpw(_encode(password), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def check_password(hashed, password):
+    try:
+        return bcrypt.checkpw(_encode(password), hashed.encode('utf-8'))
+    except ValueError:
+        # Not a bcrypt hash
+        return False
+
+
+def hash_rounds(hashed):
+    """The cost factor recorded in a bcrypt hash ('$2b$12$...'), or None."""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a pool of `workers` processes instead of on the request threads.
+
+    At most `max_pending` hashes may be queued or running at once; past that, hash() and
+    check() raise HasherBusyError right away rather than queueing behind a login storm.
+    workers=0 hashes on the calling thread (still bounded), as the routes used to.
+    """
+
+    def __init__(self, rounds=12, workers=None, max_pending=64):
+        self.rounds = rounds
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self):
+        """True while new work would be rejected; lets routes turn requests away before other work."""
+        return self.pending >= self.max_pending
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    # spawn: forking a multi-threaded web server process is not safe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        with self._pending_lock:
+            if self.pending >= self.max_pending:
+                raise HasherBusyError()
+            self.pending += 1
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            return self.executor.submit(fn, *args).result()
+        finally:
+            with self._pending_lock:
+                self.pending -= 1
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.rounds)
+
+    def check(self, hashed, password):
+        return self._run(check_password, hashed, password)
+
+    def needs_rehash(self, hashed):
+        """True when `hashed` was made with a different cost than the configured one."""
+        return hash_rounds(hashed) != self.rounds
+
+
+def create_password_hasher():
+    """Builds the hasher from BCRYPT_LOG_ROUNDS, PASSWORD_HASH_WORKERS and PASSWORD_HASH_QUEUE."""
+    workers = os.getenv('PASSWORD_HASH_WORKERS')
+    return PasswordHasher(
+        rounds=int(os.getenv('BCRYPT_LOG_ROUNDS', 12)),
+        workers=int(workers) if workers else None,
+        max_pending=int(os.getenv('PASSWORD_HASH_QUEUE', 64))
+    )
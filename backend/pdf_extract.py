@@ -0,0 +1,170 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+
+from quiz_cache import MemoryCacheStore
+
+# Below this many pages the process pool costs more than it saves
+MIN_PAGES_PER_WORKER = 25
+
+
+class PdfTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size or page limits."""
+    pass
+
+
+def spool_upload(stream, max_bytes, chunk_size=1024 * 1024):
+    """
+    Copies an upload stream to a temporary file in chunks, hashing as it goes.
+    Returns (path, sha256 hex digest, size). The caller removes the file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    try:
+        with tmp:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise PdfTooLargeError(f'PDF is larger than the {max_bytes // (1024 * 1024)} MB limit')
+                digest.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        os.remove(tmp.name)
+        raise
+    return tmp.name, digest.hexdigest(), size
+
+
+def extract_page_range(path, start, stop):
+    """Text of pages [start, stop). Module-level so the process pool can run it."""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
+
+def split_ranges(page_count, parts):
+    size, extra = divmod(page_count, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+class PdfExtractor:
+    """
+    Extracts text from uploaded PDFs.
+    Uploads are spooled to disk rather than held in memory, large documents are split
+    into page ranges extracted in a process pool, and results are cached by the
+    file's SHA-256 so re-uploading the same document skips extraction entirely.
+    """
+
+    def __init__(self, max_bytes=50 * 1024 * 1024, max_pages=2000, workers=None, cache_entries=32):
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = MemoryCacheStore(max_entries=cache_entries)
+        self.cache_ttl = 24 * 3600
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    # spawn: forking a multi-threaded web server process is not safe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def extract(self, stream):
+        """Returns {'text', 'pages', 'sha256', 'cached'} for a PDF upload stream."""
+        path, digest, _ = spool_upload(stream, self.max_bytes)
+        try:
+            cached = self.cache.get(digest)
+            if cached is not None:
+                return {**cached, 'sha256': digest, 'cached': True}
+
+            result = self.extract_file(path)
+            self.cache.set(digest, result, self.cache_ttl)
+            return {**result, 'sha256': digest, 'cached': False}
+        finally:
+            os.remove(path)
+
+    async def extract_async(self, stream):
+        """
+        extract() for event-loop callers: spooling and small documents run in the default
+        thread pool, and large documents' page ranges are awaited from the process pool.
+        """
+        loop = asyncio.get_running_loop()
+        path, digest, _ = await loop.run_in_executor(None, spool_upload, stream, self.max_bytes)
+        try:
+            cached = self.cache.get(digest)
+            if cached is not None:
+                return {**cached, 'sha256': digest, 'cached': True}
+
+            page_count = await loop.run_in_executor(None, self.count_pages, path)
+            ranges = self.plan(page_count)
+            if len(ranges) == 1:
+                pages = await loop.run_in_executor(None, extract_page_range, path, 0, page_count)
+            else:
+                futures = [
+                    asyncio.wrap_future(self.executor.submit(extract_page_range, path, start, stop))
+                    for start, stop in ranges
+                ]
+                pages = [text for part in await asyncio.gather(*futures) for text in part]
+
+            result = {'text': ''.join(f"{page}\n" for page in pages), 'pages': page_count}
+            self.cache.set(digest, result, self.cache_ttl)
+            return {**result, 'sha256': digest, 'cached': False}
+        finally:
+            os.remove(path)
+
+    def count_pages(self, path):
+        from PyPDF2 import PdfReader
+
+        page_count = len(PdfReader(path).pages)
+        if page_count > self.max_pages:
+            raise PdfTooLargeError(f'PDF has {page_count} pages, the limit is {self.max_pages}')
+        return page_count
+
+    def plan(self, page_count):
+        """Page ranges to extract; a single range for documents too small to be worth splitting."""
+        parts = min(self.workers, page_count // MIN_PAGES_PER_WORKER)
+        return split_ranges(page_count, parts) if parts > 1 else [(0, page_count)]
+
+    def extract_file(self, path):
+        page_count = self.count_pages(path)
+        ranges = self.plan(page_count)
+        if len(ranges) == 1:
+            pages = extract_page_range(path, 0, page_count)
+        else:
+            futures = [self.executor.submit(extract_page_range, path, start, stop) for start, stop in ranges]
+            pages = [text for future in futures for text in future.result()]
+
+        return {'text': ''.join(f"{page}\n" for page in pages), 'pages': page_count}
+
+
+def create_pdf_extractor():
+    """Builds the extractor from PDF_MAX_BYTES, PDF_MAX_PAGES, PDF_WORKERS and PDF_CACHE_ENTRIES."""
+    workers = os.getenv('PDF_WORKERS')
+    return PdfExtractor(
+        max_bytes=int(os.getenv('PDF_MAX_BYTES', 50 * 1024 * 1024)),
+        max_pages=int(os.getenv('PDF_MAX_PAGES', 2000)),
+        workers=int(workers) if workers else None,
+        cache_entries=int(os.getenv('PDF_CACHE_ENTRIES', 32))
+    )
@@ -0,0 +1,174 @@
+import os
+import re
+import random
+import hashlib
+import threading
+
+# Questions whose word sets overlap at least this much are treated as duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_topic(topic):
+    return ' '.join(str(topic or '').lower().split())
+
+
+def normalize_difficulty(difficulty):
+    return str(difficulty or '').strip().lower()
+
+
+def question_tokens(text):
+    return frozenset(_WORD.findall(str(text or '').lower()))
+
+
+def question_fingerprint(text):
+    """Hash of the question's words, so punctuation/case/whitespace variants collide."""
+    return hashlib.sha1(' '.join(_WORD.findall(str(text or '').lower())).encode('utf-8')).hexdigest()
+
+
+def is_near_duplicate(tokens, other_tokens, threshold=NEAR_DUPLICATE_THRESHOLD):
+    if not tokens or not other_tokens:
+        return tokens == other_tokens
+    return len(tokens & other_tokens) / len(tokens | other_tokens) >= threshold
+
+
+class QuestionBank:
+    """
+    Pre-generated questions per (topic, difficulty), optionally tied to a lesson.
+    The model needs topic, difficulty, lesson_id, question_text, options,
+    correct_answer and fingerprint columns.
+    """
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    def _filter(self, topic, difficulty):
+        return self.model.query.filter_by(
+            topic=normalize_topic(topic),
+            difficulty=normalize_difficulty(difficulty)
+        )
+
+    def count(self, topic, difficulty):
+        return self._filter(topic, difficulty).count()
+
+    def add(self, topic, difficulty, items, lesson_id=None):
+        """Stores new questions, skipping exact and near duplicates. Returns how many were added."""
+        rows = self._filter(topic, difficulty).with_entities(self.model.question_text, self.model.fingerprint).all()
+        fingerprints = {row.fingerprint for row in rows}
+        existing = [question_tokens(row.question_text) for row in rows]
+
+        added = 0
+        for item in items:
+            text = item.get('question')
+            if not text or not item.get('options') or not item.get('answer'):
+                continue
+
+            fingerprint = question_fingerprint(text)
+            if fingerprint in fingerprints:
+                continue
+
+            tokens = question_tokens(text)
+            if any(is_near_duplicate(tokens, other) for other in existing):
+                continue
+
+            self.db.session.add(self.model(
+                topic=normalize_topic(topic),
+                difficulty=normalize_difficulty(difficulty),
+                lesson_id=lesson_id,
+                question_text=text,
+                options=item.get('options'),
+                correct_answer=item.get('answer'),
+                fingerprint=fingerprint
+            ))
+            fingerprints.add(fingerprint)
+            existing.append(tokens)
+            added += 1
+
+        self.db.session.commit()
+        return added
+
+    def sample(self, topic, difficulty, count):
+        """
+        Random sample of up to `count` questions as {question, options, answer} dicts.
+        Only ids are scanned; the chosen rows are then fetched by primary key.
+        """
+        ids = [row.id for row in self._filter(topic, difficulty).with_entities(self.model.id)]
+        if not ids:
+            return []
+
+        chosen = random.sample(ids, min(count, len(ids)))
+        rows = self.model.query.filter(self.model.id.in_(chosen)).all()
+        random.shuffle(rows)
+        return [
+            {'question': row.question_text, 'options': row.options, 'answer': row.correct_answer}
+            for row in rows
+        ]
+
+    def refill_many(self, targets, target, generate_batch, max_rounds=5):
+        """
+        Tops up several (topic, difficulty, lesson_id) targets at once using
+        `generate_batch([(topic, count, difficulty), ...])`, which returns one list of questions
+        per spec. Each round asks for every target's shortfall in a single batch; a target
+        whose round adds nothing new is dropped. Returns {(topic, difficulty): count}.
+        """
+        have = {(topic, difficulty): self.count(topic, difficulty) for topic, difficulty, _ in targets}
+        active = [entry for entry in targets if have[entry[:2]] < target]
+        rounds = 0
+        while active and rounds < max_rounds:
+            rounds += 1
+            specs = [(topic, target - have[(topic, difficulty)], difficulty) for topic, difficulty, _ in active]
+            still_short = []
+            for (topic, difficulty, lesson_id), items in zip(active, generate_batch(specs)):
+                added = self.add(topic, difficulty, items, lesson_id=lesson_id)
+                have[(topic, difficulty)] += added
+                if added and have[(topic, difficulty)] < target:
+                    still_short.append((topic, difficulty, lesson_id))
+            active = still_short
+        return have
+
+
+class BankScheduler:
+    """Background thread that periodically runs a warm-up callable."""
+
+    def __init__(self, warm_up, interval=3600):
+        self.warm_up = warm_up
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='question-bank-scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self):
+        while self._thread.is_alive():
+            self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.warm_up()
+            except Exception as e:
+                print(f"Question bank warm-up failed: {e}")
+            self._stop.wait(self.interval)
+
+
+def configured_targets():
+    """
+    (topic, difficulty) pairs from QUESTION_BANK_TOPICS,
+    e.g. "General Knowledge:Medium,Python:Easy". Difficulty defaults to Medium.
+    """
+    targets = []
+    for entry in os.getenv('QUESTION_BANK_TOPICS', 'General Knowledge:Medium').split(','):
+        if not entry.strip():
+            continue
+        topic, _, difficulty = entry.partition(':')
+        targets.append((topic.strip(), difficulty.strip() or 'Medium'))
+    return targets
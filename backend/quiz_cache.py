@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+
+def make_cache_key(topic, count, difficulty, model_name):
+    """
+    Builds a stable key for a quiz request.
+    Topic and difficulty are case/whitespace-normalized so "Python " and "python" share an entry.
+    """
+    normalized = [
+        ' '.join(str(topic or '').lower().split()),
+        int(count),
+        str(difficulty or '').strip().lower(),
+        model_name
+    ]
+    return hashlib.sha256(json.dumps(normalized).encode('utf-8')).hexdigest()
+
+
+class MemoryCacheStore:
+    """In-process LRU store. Each entry carries its own expiry time."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DatabaseCacheStore:
+    """
+    Stores entries in a SQLAlchemy table so every worker process shares them.
+    The model needs `key`, `value`, `expires_at` and `last_used_at` columns.
+    """
+
+    name = 'db'
+
+    def __init__(self, db, model, max_entries=1000):
+        self.db = db
+        self.model = model
+        self.max_entries = max_entries
+
+    def get(self, key):
+        entry = self.db.session.get(self.model, key)
+        if entry is None:
+            return None
+
+        now = datetime.utcnow()
+        if entry.expires_at < now:
+            self.db.session.delete(entry)
+            self.db.session.commit()
+            return None
+
+        entry.last_used_at = now
+        self.db.session.commit()
+        return entry.value
+
+    def set(self, key, value, ttl):
+        now = datetime.utcnow()
+        self.db.session.merge(self.model(
+            key=key,
+            value=value,
+            expires_at=now + timedelta(seconds=ttl),
+            last_used_at=now
+        ))
+        self.db.session.flush()
+
+        # Evict least recently used rows once we are over the limit
+        overflow = self.model.query.count() - self.max_entries
+        if overflow > 0:
+            stale_keys = [
+                row.key for row in self.model.query
+                .with_entities(self.model.key)
+                .order_by(self.model.last_used_at.asc())
+                .limit(overflow)
+            ]
+            self.model.query.filter(self.model.key.in_(stale_keys)).delete(synchronize_session=False)
+
+        self.db.session.commit()
+
+    def clear(self):
+        self.model.query.delete()
+        self.db.session.commit()
+
+    def __len__(self):
+        return self.model.query.count()
+
+
+class QuizCache:
+    """
+    Cache for generated quiz sets, keyed on (topic, count, difficulty, model_name).
+    Tracks hit/miss counters so the hit rate can be monitored.
+    """
+
+    def __init__(self, store, ttl=3600):
+        self.store = store
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, topic, count, difficulty, model_name):
+        value = self.store.get(make_cache_key(topic, count, difficulty, model_name))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, topic, count, difficulty, model_name, questions):
+        self.store.set(make_cache_key(topic, count, difficulty, model_name), questions, self.ttl)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': self.store.name,
+            'entries': len(self.store),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'ttl': self.ttl
+        }
+
+
+def create_quiz_cache(db=None, model=None):
+    """
+    Builds the quiz cache from environment settings.
+    QUIZ_CACHE_BACKEND selects 'memory' (default) or 'db'.
+    """
+    backend = os.getenv('QUIZ_CACHE_BACKEND', 'memory').lower()
+    ttl = int(os.getenv('QUIZ_CACHE_TTL', 3600))
+    max_entries = int(os.getenv('QUIZ_CACHE_MAX_ENTRIES', 256))
+
+    if backend == 'db':
+        if db is None or model is None:
+            raise ValueError("The 'db' quiz cache backend needs a database and cache model.")
+        store = DatabaseCacheStore(db, model, max_entries=max_entries)
+    else:
+        store = MemoryCacheStore(max_entries=max_entries)
+
+    return QuizCache(store, ttl=ttl)
@@ -0,0 +1,153 @@
+import os
+import time
+import uuid
+import queue
+import threading
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity and cannot accept more work."""
+    pass
+
+
+class QuizJob:
+    """
+    A single background quiz generation.
+    Questions are appended as they become available so streams can follow along.
+    """
+
+    def __init__(self, user_id, params):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.params = params
+        self.status = 'queued'
+        self.questions = []
+        self.quiz_id = None
+        self.error = None
+        self.exception = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cond = threading.Condition()
+
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+    def start(self):
+        with self._cond:
+            self.status = 'running'
+            self._cond.notify_all()
+
+    def add_questions(self, questions):
+        with self._cond:
+            self.questions.extend(questions)
+            self._cond.notify_all()
+
+    def finish(self, quiz_id):
+        with self._cond:
+            self.status = 'done'
+            self.quiz_id = quiz_id
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def fail(self, error, exception=None):
+        with self._cond:
+            self.status = 'failed'
+            self.error = error
+            self.exception = exception
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def wait_for_update(self, seen_count, timeout=15):
+        """Blocks until there are more than `seen_count` questions, the job ends, or the timeout passes."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.questions) > seen_count or self.is_finished, timeout=timeout)
+            return list(self.questions[seen_count:])
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'quiz_id': self.quiz_id,
+            'error': self.error,
+            'question_count': len(self.questions),
+            **self.params
+        }
+
+
+class QuizJobQueue:
+    """
+    Bounded queue of quiz generation jobs drained by a small pool of local worker threads.
+    Keeps slow Gemini calls off the request threads that serve everything else.
+    """
+
+    def __init__(self, handler, workers=2, max_queued=32, retention=600):
+        self.handler = handler
+        self.workers = workers
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'quiz-job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.start()
+                self.handler(job)
+                if not job.is_finished:
+                    job.fail('Job ended without a result')
+            except Exception as e:
+                job.fail(str(e), e)
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def submit(self, user_id, params):
+        self._ensure_workers()
+        self._prune()
+
+        job = QuizJob(user_id, params)
+        # Registered before a worker can pick it up, so get() finds it from the moment it runs
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFullError('Quiz generation queue is full, try again shortly.')
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self):
+        return self._queue.qsize()
+
+
+def create_job_queue(handler, prefix='QUIZ_JOB', workers=2, max_queued=32, **kwargs):
+    """Builds a job queue sized by <prefix>_WORKERS and <prefix>_QUEUE_SIZE from the environment."""
+    return QuizJobQueue(
+        handler,
+        workers=int(os.getenv(f'{prefix}_WORKERS', workers)),
+        max_queued=int(os.getenv(f'{prefix}_QUEUE_SIZE', max_queued)),
+        **kwargs
+    )
@@ -1,4 +1,8 @@
-from app import app, db, Course, Lesson, Question
+from app import create_app
+from extensions import db
+from models import Course, Lesson, Question
+
+app = create_app(blueprints=False)
 
 def seed_courses():
     with app.app_context():
@@ -0,0 +1,47 @@
+"""
+Production entry point.
+
+    python serve.py                          # async (ASGI, uvicorn), SERVER_WORKERS processes
+    python serve.py --mode sync --workers 4  # the plain Flask app on Werkzeug, no event loop
+
+SERVER_MODE, SERVER_WORKERS, HOST and PORT set the defaults. In async mode the AI and PDF
+routes are served natively by asgi.py; `--workers` is the number of uvicorn processes.
+In sync mode one worker runs a thread per request; more workers are separate processes.
+"""
+import os
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['async', 'sync'], default=os.getenv('SERVER_MODE', 'async'))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('SERVER_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--host', default=os.getenv('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 5000)))
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    from app import create_app
+    from extensions import db
+
+    # The async workers build their own app in asgi.py; this one only needs the routes for sync mode
+    app = create_app(blueprints=args.mode == 'sync')
+    with app.app_context():
+        db.create_all()
+
+    if args.mode == 'async':
+        import uvicorn
+
+        uvicorn.run('asgi:application', host=args.host, port=args.port, workers=args.workers,
+                    log_level=os.getenv('LOG_LEVEL', 'warning'))
+    else:
+        from werkzeug.serving import run_simple
+
+        if args.workers > 1:
+            run_simple(args.host, args.port, app, threaded=False, processes=args.workers)
+        else:
+            run_simple(args.host, args.port, app, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
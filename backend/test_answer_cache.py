@@ -0,0 +1,23 @@
+from answer_cache import AnswerCache, create_answer_cache
+
+
+def test_exact_matches_only_by_default():
+    cache = create_answer_cache()
+    cache.set('doc', 'What was the revenue in 2019?', 'model', '$5M')
+    assert cache.get('doc', '  what was the REVENUE in 2019 ', 'model') == '$5M'
+    assert cache.get('doc', 'What was the total revenue in 2019?', 'model') is None
+    assert cache.stats()['similarity_threshold'] == 0
+
+
+def test_similar_questions_must_share_numbers_and_negations():
+    cache = AnswerCache(similarity_threshold=0.85)
+    cache.set('doc', 'What was the company revenue reported in 2019?', 'model', '$5M')
+    cache.set('doc', 'Which of the listed products is sold in Europe?', 'model', 'Widgets')
+
+    assert cache.get('doc', 'What was the company revenue reported in 2019??', 'model') == '$5M'
+    assert cache.get('doc', 'What was the companys revenue reported in 2019?', 'model') == '$5M'
+    # Near-identical text, different meaning
+    assert cache.get('doc', 'What was the company revenue reported in 2018?', 'model') is None
+    assert cache.get('doc', 'Which of the listed products is not sold in Europe?', 'model') is None
+    assert cache.get('doc', "Which of the listed products isn't sold in Europe?", 'model') is None
+    assert cache.stats()['similar_hits'] == 1
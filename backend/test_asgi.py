@@ -0,0 +1,29 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from starlette.testclient import TestClient
+
+import asgi
+
+
+@pytest.fixture
+def headers():
+    with asgi.flask_app.app_context():
+        return {'Authorization': f"Bearer {create_access_token(identity='1')}"}
+
+
+@pytest.mark.parametrize('path', ['/api/quiz/generate', '/api/chat', '/api/chat/stream'])
+@pytest.mark.parametrize('content_type', ['application/json', 'text/plain'])
+def test_native_routes_reject_bodies_as_flask_does(headers, path, content_type):
+    request = {'content': b'{"topic": ', 'headers': dict(headers, **{'Content-Type': content_type})}
+    native = TestClient(asgi.application).post(path, **request)
+    flask = asgi.flask_app.test_client().post(path, data=request['content'], headers=request['headers'])
+
+    assert native.status_code == flask.status_code == (400 if content_type == 'application/json' else 415)
+    assert native.text == flask.get_data(as_text=True)
+    assert native.headers['content-type'].startswith(flask.mimetype)
+
+
+def test_native_routes_still_report_auth_failures():
+    response = TestClient(asgi.application).post('/api/chat', content=b'{bad',
+                                                 headers={'Content-Type': 'application/json'})
+    assert response.status_code == 401
@@ -0,0 +1,34 @@
+from blueprints import auth
+from extensions import db
+from models import User
+from password_hasher import hash_password, hash_rounds
+
+
+def test_hash_upgrade_keeps_refresh_tokens_but_password_change_revokes_them(app, client, monkeypatch):
+    # Hash on the request thread, at cheap costs
+    monkeypatch.setattr(auth.password_hasher, 'workers', 0)
+    monkeypatch.setattr(auth.password_hasher, 'rounds', 5)
+    with app.app_context():
+        db.session.get(User, 1).password = hash_password('secret', 5)
+        db.session.commit()
+
+    def login(password='secret'):
+        return client.post('/api/login', json={'email': 'learner@example.com', 'password': password}).get_json()
+
+    def refresh(token):
+        return client.post('/api/token/refresh', headers={'Authorization': f'Bearer {token}'}).status_code
+
+    other_device = login()['refresh_token']
+    # BCRYPT_LOG_ROUNDS changes: the next login upgrades the stored hash
+    monkeypatch.setattr(auth.password_hasher, 'rounds', 4)
+    this_device = login()
+    with app.app_context():
+        assert hash_rounds(db.session.get(User, 1).password) == 4
+    # The login that upgraded the hash did not sign the other device out
+    assert refresh(other_device) == 200
+
+    response = client.post('/api/change-password', json={'current_password': 'secret', 'new_password': 'better'},
+                           headers={'Authorization': f"Bearer {this_device['access_token']}"})
+    assert response.status_code == 200
+    assert refresh(other_device) == 401
+    assert refresh(response.get_json()['refresh_token']) == 200
@@ -0,0 +1,80 @@
+import json
+from types import SimpleNamespace
+
+import ai_service
+from answer_cache import AnswerCache
+from blueprints import study
+
+
+def read_events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        event, data = block.split('\n')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+class FakeGemini:
+    client = object()
+    pieces = []
+    closed = []
+
+    def stream_pdf_answer(self, context, question, doc_hash=None):
+        try:
+            for piece in FakeGemini.pieces:
+                if isinstance(piece, Exception):
+                    raise piece
+                yield piece
+        finally:
+            FakeGemini.closed.append(question)
+
+
+def test_answers_stream_as_token_events_then_done(client, headers, monkeypatch):
+    monkeypatch.setattr(study, 'GeminiService', FakeGemini)
+    monkeypatch.setattr(FakeGemini, 'pieces', ['Photo', 'synthesis', '.'])
+    monkeypatch.setattr(FakeGemini, 'closed', [])
+
+    response = client.post('/api/chat/stream', headers=headers, json={'question': 'What?', 'context': 'Plants.'})
+    assert response.mimetype == 'text/event-stream' and response.headers['Cache-Control'] == 'no-cache'
+    events = read_events(response)
+    assert [payload['text'] for event, payload in events if event == 'token'] == ['Photo', 'synthesis', '.']
+    assert events[-1][0] == 'done' and events[-1][1]['total_ms'] >= events[-1][1]['time_to_first_token_ms']
+    assert FakeGemini.closed == ['What?']
+
+    # A failure mid-answer ends the stream with an error event after what was already sent
+    monkeypatch.setattr(FakeGemini, 'pieces', ['Partial', RuntimeError('quota exceeded')])
+    events = read_events(client.post('/api/chat/stream', headers=headers, json={'question': 'Why?', 'context': 'x'}))
+    assert events == [('token', {'text': 'Partial'}),
+                      ('error', {'message': 'Error processing your question: quota exceeded'})]
+
+    assert client.post('/api/chat/stream', headers=headers, json={'context': 'x'}).status_code == 400
+
+
+def test_disconnecting_closes_the_upstream_stream(client, headers, monkeypatch):
+    monkeypatch.setattr(study, 'GeminiService', FakeGemini)
+    monkeypatch.setattr(FakeGemini, 'pieces', ['one', 'two', 'three'])
+    monkeypatch.setattr(FakeGemini, 'closed', [])
+
+    response = client.post('/api/chat/stream', headers=headers, json={'question': 'Q?', 'context': 'x'}, buffered=False)
+    assert next(response.response).startswith(b'event: token')
+    response.close()
+    assert FakeGemini.closed == ['Q?']
+
+
+def test_streamed_answers_are_cached_and_timed(monkeypatch):
+    calls = []
+
+    class Manager:
+        def generate_content_stream(self, model, contents):
+            calls.append(model)
+            return iter([SimpleNamespace(text='Green '), SimpleNamespace(text=''), SimpleNamespace(text='light.')])
+
+    monkeypatch.setattr(ai_service, 'answer_cache', AnswerCache())
+    monkeypatch.setattr(ai_service, 'stream_latency', ai_service.LatencyTracker())
+    gemini = object.__new__(ai_service.GeminiService)
+    gemini.manager, gemini.client, gemini.model_name = Manager(), object(), 'fake-model'
+
+    assert list(gemini.stream_pdf_answer('Leaves are green.', 'Colour?')) == ['Green ', 'light.']
+    # The same question about the same document is answered from the cache in one piece
+    assert list(gemini.stream_pdf_answer('Leaves are green.', 'Colour?')) == ['Green light.']
+    assert calls == ['fake-model'] and ai_service.stream_latency.stats()['samples'] == 1
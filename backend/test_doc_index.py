@@ -0,0 +1,73 @@
+from blueprints import study
+from doc_index import BM25Index, DocumentRetriever, chunk_text, tokenize
+from extensions import db
+from models import User
+
+TOPICS = ['Mitochondria produce energy for the cell.', 'Ribosomes build proteins from amino acids.',
+          'The nucleus stores the genetic material.', 'Chloroplasts capture light in plant cells.']
+
+
+def test_chunks_break_on_paragraphs_and_overlap():
+    paragraphs = [f'Paragraph {i}. ' + 'word ' * 60 for i in range(10)]
+    text = '\n\n'.join(paragraphs)
+    chunks = chunk_text(text, size=700, overlap=100)
+
+    assert all(len(chunk) <= 700 for chunk in chunks)
+    # Every paragraph survives, and neighbouring chunks share text
+    assert all(any(p.strip() in chunk for chunk in chunks) for p in paragraphs)
+    assert all(a[-50:].split()[-1] in b for a, b in zip(chunks, chunks[1:]))
+    assert chunk_text('   ') == [] and chunk_text('short') == ['short']
+
+
+def test_bm25_ranks_matching_chunks_and_ignores_stopwords():
+    assert tokenize('What is the role of THE nucleus?') == ['role', 'nucleus']
+    index = BM25Index(TOPICS)
+    assert index.search('Where is genetic material stored?', k=1)[0][0] == 2
+    assert [position for position, _ in index.search('cell energy plant', k=4)][:2] == [0, 3]
+    assert index.search('what is it') == []
+
+
+def test_retriever_caches_indexes_and_falls_back_to_the_opening_chunks():
+    loads = []
+
+    def load(document_id):
+        loads.append(document_id)
+        return TOPICS
+
+    retriever = DocumentRetriever(load)
+    # Relevant chunks, in document order
+    assert retriever.retrieve(1, 'proteins and light', k=2) == [TOPICS[1], TOPICS[3]]
+    assert retriever.retrieve(1, 'summarize this', k=2) == TOPICS[:2]
+    assert loads == [1]
+
+
+class FakeGemini:
+    client = object()
+    contexts = []
+
+    def ask_pdf(self, context, question, doc_hash=None):
+        FakeGemini.contexts.append(context)
+        return 'answer'
+
+
+def test_chat_sends_only_relevant_chunks_of_the_users_document(app, client, headers, monkeypatch):
+    monkeypatch.setattr(study, 'GeminiService', FakeGemini)
+    monkeypatch.setattr(FakeGemini, 'contexts', [])
+    # Indexes are cached per process by document id; start from an empty cache
+    monkeypatch.setattr(study, 'document_retriever', DocumentRetriever(study.load_document_chunks))
+    # Long enough to be split into several chunks
+    text = '\n\n'.join(f'{topic} ' + 'Filler sentence about cells. ' * 60 for topic in TOPICS)
+    with app.app_context():
+        db.session.add(User(username='bob', email='bob@example.com', password='x'))
+        document = study.store_document(1, 'cells.pdf', {'text': text, 'pages': 4, 'sha256': 'cafe'})
+        other = study.store_document(2, 'theirs.pdf', {'text': text, 'pages': 4, 'sha256': 'cafe'})
+        document_id, other_id = document.id, other.id
+
+    monkeypatch.setenv('CHAT_TOP_K', '1')
+    response = client.post('/api/chat', headers=headers, json={'question': 'What do ribosomes build?',
+                                                               'document_id': document_id})
+    assert response.status_code == 200
+    assert 'Ribosomes' in FakeGemini.contexts[0] and 'Mitochondria' not in FakeGemini.contexts[0]
+
+    response = client.post('/api/chat', headers=headers, json={'question': 'Anything?', 'document_id': other_id})
+    assert response.status_code == 404
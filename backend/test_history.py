@@ -0,0 +1,50 @@
+ANSWERS = [{'question_text': 'Q?', 'user_answer': 'a', 'correct_answer': 'a', 'is_correct': True}]
+
+
+def attempt(timestamp, score=5):
+    return {'score': score, 'total_questions': 1, 'time_taken': 3.0, 'level': 'Easy', 'answers': ANSWERS,
+            'timestamp': timestamp}
+
+
+def test_history_pages_newest_first_with_a_cursor(client, headers):
+    # Two attempts share a timestamp: the cursor must not skip or repeat either of them
+    stamps = ['2024-03-01T10:00:00Z', '2024-03-02T10:00:00Z', '2024-03-02T10:00:00Z', '2024-03-03T10:00:00Z',
+              '2024-03-04T10:00:00Z']
+    results = client.post('/api/quiz/submit/batch', headers=headers,
+                          json={'attempts': [attempt(s) for s in stamps]}).get_json()['results']
+    ids = [r['attempt_id'] for r in results]
+
+    seen, cursor = [], None
+    while True:
+        response = client.get('/api/history', headers=headers, query_string={'limit': 2, 'cursor': cursor or ''})
+        assert response.status_code == 200 and len(response.get_json()) <= 2
+        seen += [row['id'] for row in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert seen == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+    rows = client.get('/api/history?fields=score,timestamp&limit=1', headers=headers).get_json()
+    assert rows == [{'score': 5, 'timestamp': '2024-03-04T10:00:00'}]
+    assert client.get('/api/history?fields=score,password', headers=headers).status_code == 400
+    assert client.get('/api/history?cursor=not-a-cursor', headers=headers).status_code == 400
+
+
+def test_history_and_stats_answer_conditional_requests(client, headers):
+    client.post('/api/quiz/submit', headers=headers, json=attempt('2024-03-01T10:00:00Z'))
+
+    etags = {}
+    for path in ('/api/history', '/api/user/stats'):
+        etags[path] = client.get(path, headers=headers).headers['ETag']
+        again = client.get(path, headers=dict(headers, **{'If-None-Match': etags[path]}))
+        assert again.status_code == 304 and again.headers['ETag'] == etags[path] and not again.data
+
+    # A new attempt changes both
+    client.post('/api/quiz/submit', headers=headers, json=attempt('2024-03-02T10:00:00Z'))
+    for path, etag in etags.items():
+        response = client.get(path, headers=dict(headers, **{'If-None-Match': etag}))
+        assert response.status_code == 200 and response.headers['ETag'] != etag
+
+    # Different pages or field selections never share a tag
+    assert (client.get('/api/history?limit=1', headers=headers).headers['ETag']
+            != client.get('/api/history?limit=2', headers=headers).headers['ETag'])
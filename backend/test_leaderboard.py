@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+
+from blueprints.quiz import leaderboard
+from extensions import db
+from leaderboard import board_key, RankIndex
+from models import User, LeaderboardScore
+
+
+def submit(client, headers, score):
+    return client.post('/api/quiz/submit', headers=headers, json={
+        'score': score, 'total_questions': 2, 'time_taken': 10.0, 'level': 'Easy',
+        'answers': [{'question_text': 'Q?', 'user_answer': 'a', 'correct_answer': 'a', 'is_correct': True}]
+    })
+
+
+def test_leaderboard_limits_and_ranks(client, headers):
+    assert submit(client, headers, 10).status_code == 201
+
+    for limit in (0, -5):
+        response = client.get(f'/api/leaderboard?limit={limit}', headers=headers)
+        assert response.status_code == 200 and len(response.get_json()['entries']) == 1
+    assert client.get('/api/leaderboard/me', headers=headers).get_json()['me'] == {'rank': 1, 'points': 10, 'total': 1}
+
+    # A rejected submission leaves the loaded index untouched
+    assert client.post('/api/quiz/submit', headers=headers, json={'score': 50, 'answers': []}).status_code == 400
+    assert client.get('/api/leaderboard/me', headers=headers).get_json()['me']['points'] == 10
+
+
+def test_stale_index_is_served_while_it_reloads(app, monkeypatch):
+    key = board_key('all')
+    with app.app_context():
+        db.session.add(User(username='bob', email='bob@example.com', password='x'))
+        db.session.add(LeaderboardScore(board=key, user_id=1, points=10, attempts=1))
+        db.session.commit()
+        index = leaderboard.index(key)
+
+        # Another worker process moves user 2 ahead
+        db.session.add(LeaderboardScore(board=key, user_id=2, points=20, attempts=1))
+        db.session.commit()
+
+        started = []
+        monkeypatch.setattr(threading.Thread, 'start', lambda thread: started.append(thread))
+        monkeypatch.setattr(leaderboard, 'index_ttl', 0)
+        # The lookup does not wait for the reload
+        assert leaderboard.index(key) is index and leaderboard.rank(key, 1)['rank'] == 1
+        assert len(started) == 1
+
+        # Committed updates that land during the reload are replayed onto the new index
+        leaderboard.apply(1, [(key, 30)])
+        started[0].run()
+        monkeypatch.setattr(leaderboard, 'index_ttl', 60)
+        assert leaderboard.index(key) is not index
+        assert leaderboard.rank(key, 1) == {'rank': 1, 'points': 30, 'total': 2}
+        assert leaderboard.rank(key, 2)['rank'] == 2
+
+
+def test_batch_submit_stores_good_entries_and_reports_bad_ones(client, headers):
+    good = {'score': 5, 'total_questions': 1, 'time_taken': 10.0, 'level': 'Easy',
+            'answers': [{'question_text': 'Q?', 'user_answer': 'a', 'correct_answer': 'a', 'is_correct': True}]}
+    client.get('/api/leaderboard/me', headers=headers)  # load the index
+
+    response = client.post('/api/quiz/submit/batch', headers=headers, json={'attempts': [
+        good,
+        'not an attempt',
+        {k: v for k, v in good.items() if k != 'total_questions'},
+        dict(good, score='lots'),
+        dict(good, quiz_id=999),
+        dict(good, score=4),
+    ]})
+    assert response.status_code == 201
+    results = response.get_json()['results']
+    assert [('attempt_id' in r) for r in results] == [True, False, False, False, False, True]
+    assert [r.get('error') for r in results[1:5]] == ['Invalid data', 'Invalid total_questions', 'Invalid score',
+                                                       'Invalid quiz']
+
+    # Only the stored attempts count, on the board and in the stats
+    assert client.get('/api/leaderboard/me', headers=headers).get_json()['me']['points'] == 9
+    assert client.get('/api/user/stats', headers=headers).get_json()['quizzes_taken'] == 2
+
+
+def test_scores_outside_the_scoring_rules_are_rejected(client, headers):
+    for score in (10 ** 12, 11, -3):
+        response = submit(client, headers, score)
+        assert response.status_code == 400 and response.get_json()['message'] == 'Invalid score'
+    assert submit(client, headers, -2).status_code == 201
+    assert client.get('/api/leaderboard/me', headers=headers).get_json()['me'] == {'rank': 1, 'points': -2, 'total': 1}
+
+
+def test_rank_index_refuses_points_outside_its_range():
+    index = RankIndex()
+    for points in (RankIndex.MAX_POINTS + 1, RankIndex.MIN_POINTS - 1):
+        with pytest.raises(ValueError):
+            index.set(1, points)
+        with pytest.raises(ValueError):
+            index.rank_of_points(points)
+    index.set(1, RankIndex.MAX_POINTS)
+    index.set(2, RankIndex.MIN_POINTS)
+    assert (index.rank(1), index.rank(2), len(index)) == (1, 2, 2)
+
+
+def test_board_totals_that_would_leave_the_index_range_are_rejected(app, client, headers):
+    with app.app_context():
+        db.session.add(LeaderboardScore(board=board_key('all'), user_id=1, points=RankIndex.MAX_POINTS - 5, attempts=1))
+        db.session.commit()
+    assert submit(client, headers, 5).status_code == 201
+    response = submit(client, headers, 1)
+    assert response.status_code == 400 and response.get_json()['message'] == 'Invalid score'
+    with app.app_context():
+        row = LeaderboardScore.query.filter_by(board=board_key('all'), user_id=1).one()
+        assert row.points == RankIndex.MAX_POINTS
@@ -0,0 +1,86 @@
+import io
+
+import pytest
+
+from blueprints import study
+from pdf_extract import MIN_PAGES_PER_WORKER, PdfExtractor, split_ranges
+from quiz_cache import MemoryCacheStore
+
+
+def make_pdf(pages):
+    """A minimal PDF with one line of Helvetica text per page."""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None,
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out, offsets = b'%PDF-1.4\n', []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return out
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    monkeypatch.setattr(study.pdf_extractor, 'cache', MemoryCacheStore())
+    return study.pdf_extractor
+
+
+def upload(client, headers, data, name='notes.pdf'):
+    return client.post('/api/pdf/extract', headers=headers, content_type='multipart/form-data',
+                       data={'file': (io.BytesIO(data), name)})
+
+
+def test_repeat_uploads_skip_extraction_and_reuse_the_document(client, headers, extractor, monkeypatch):
+    pdf = make_pdf(['Photosynthesis makes sugar', 'Chlorophyll is green'])
+    first = upload(client, headers, pdf)
+    assert first.status_code == 200
+    body = first.get_json()
+    assert body['pages'] == 2 and 'Photosynthesis makes sugar' in body['text'] and 'Chlorophyll' in body['text']
+
+    def not_again(path):
+        raise AssertionError('extracted twice')
+
+    monkeypatch.setattr(extractor, 'extract_file', not_again)
+    second = upload(client, headers, pdf, name='copy.pdf').get_json()
+    assert (second['text'], second['sha256'], second['document_id']) == (body['text'], body['sha256'],
+                                                                        body['document_id'])
+
+
+def test_uploads_over_the_limits_are_refused(client, headers, extractor, monkeypatch):
+    pdf = make_pdf(['One', 'Two', 'Three'])
+    monkeypatch.setattr(extractor, 'max_pages', 2)
+    assert upload(client, headers, pdf).status_code == 413
+    monkeypatch.setattr(extractor, 'max_bytes', len(pdf) - 1)
+    assert upload(client, headers, pdf).status_code == 413
+
+    assert client.post('/api/pdf/extract', headers=headers).get_json()['message'] == 'No file part'
+
+
+def test_large_documents_are_split_across_workers():
+    assert split_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    extractor = PdfExtractor(workers=4)
+    assert extractor.plan(MIN_PAGES_PER_WORKER) == [(0, MIN_PAGES_PER_WORKER)]
+    assert len(extractor.plan(MIN_PAGES_PER_WORKER * 10)) == 4
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path):
+    path = tmp_path / 'long.pdf'
+    path.write_bytes(make_pdf([f'Page {i}' for i in range(MIN_PAGES_PER_WORKER * 2)]))
+    extractor = PdfExtractor(workers=2)
+    try:
+        result = extractor.extract_file(str(path))
+    finally:
+        extractor.executor.shutdown()
+    assert result['text'].split('\n')[:-1] == [f'Page {i}' for i in range(MIN_PAGES_PER_WORKER * 2)]
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from extensions import db
+from models import Course, Lesson, Question
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def add_courses(app, courses=5, lessons=4):
+    with app.app_context():
+        for c in range(courses):
+            course = Course(title=f'Course {c}')
+            db.session.add(course)
+            for l in range(lessons):
+                lesson = Lesson(title=f'Lesson {c}.{l}', content='x' * 10_000, course=course)
+                db.session.add(lesson)
+                db.session.add(Question(question_text='Q?', options=['a', 'b', 'c', 'd'], correct_answer='a', lesson=lesson))
+        db.session.commit()
+
+
+def test_course_routes_do_not_scale_queries_with_rows(app, client, headers):
+    add_courses(app)
+    with app.app_context():
+        with count_queries() as statements:
+            courses = client.get('/api/courses', headers=headers).get_json()
+        assert [c['lesson_count'] for c in courses] == [4] * 5
+        assert len(statements) == 1
+
+        with count_queries() as statements:
+            course = client.get('/api/courses/1', headers=headers).get_json()
+        assert len(course['lessons']) == 4 and 'content' not in course['lessons'][0]
+        assert len(statements) == 2
+        # The listing never selects the lesson bodies
+        assert 'lesson.content' not in statements[1]
+
+        with count_queries() as statements:
+            lesson = client.get('/api/lessons/1', headers=headers).get_json()
+        assert len(lesson['content']) == 10_000 and len(lesson['questions']) == 1
+        assert len(statements) == 2
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime, timedelta
+
+from blueprints import quiz
+from extensions import db
+from models import CachedQuiz
+from quiz_cache import DatabaseCacheStore, MemoryCacheStore, QuizCache, make_cache_key
+
+QUESTIONS = [{'question': f'Q{i}?', 'options': ['a', 'b', 'c', 'd'], 'answer': 'a'} for i in range(3)]
+
+
+def test_keys_ignore_case_and_spacing_but_not_model_or_count():
+    key = make_cache_key('Python  Basics ', 3, 'Easy', 'model-a')
+    assert key == make_cache_key('python basics', '3', ' easy', 'model-a')
+    assert key != make_cache_key('python basics', 4, 'easy', 'model-a')
+    assert key != make_cache_key('python basics', 3, 'easy', 'model-b')
+
+
+def test_memory_store_expires_and_evicts_least_recently_used():
+    store = MemoryCacheStore(max_entries=2)
+    store.set('a', 1, ttl=60)
+    store.set('b', 2, ttl=60)
+    store.get('a')
+    store.set('c', 3, ttl=60)
+    assert (store.get('a'), store.get('b'), store.get('c')) == (1, None, 3)
+
+    store.set('old', 4, ttl=-1)
+    assert store.get('old') is None
+
+
+def test_database_store_is_shared_and_bounded(app):
+    with app.app_context():
+        store = DatabaseCacheStore(db, CachedQuiz, max_entries=2)
+        for key in ('a', 'b', 'c'):
+            store.set(key, QUESTIONS, ttl=60)
+        assert len(store) == 2 and store.get('a') is None and store.get('c') == QUESTIONS
+
+        store.set('stale', QUESTIONS, ttl=60)
+        db.session.get(CachedQuiz, 'stale').expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert store.get('stale') is None and db.session.get(CachedQuiz, 'stale') is None
+
+
+class FakeGemini:
+    model_name = 'fake-model'
+    client = object()
+    calls = 0
+
+    def generate_quiz(self, topic, count, difficulty):
+        FakeGemini.calls += 1
+        return json.dumps(QUESTIONS[:count])
+
+
+def test_repeated_requests_are_served_from_the_cache(monkeypatch):
+    monkeypatch.setattr(quiz, 'GeminiService', FakeGemini)
+    monkeypatch.setattr(FakeGemini, 'calls', 0)
+    monkeypatch.setattr(quiz, 'quiz_cache', QuizCache(MemoryCacheStore()))
+
+    assert quiz.fetch_quiz_questions('Python', 3, 'Easy') == QUESTIONS
+    assert quiz.fetch_quiz_questions(' python', 3, 'easy') == QUESTIONS
+    assert FakeGemini.calls == 1
+    # Opting out always asks the model
+    quiz.fetch_quiz_questions('Python', 3, 'Easy', use_cache=False)
+    assert FakeGemini.calls == 2
+
+    stats = quiz.quiz_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate'], stats['entries']) == (1, 1, 0.5, 1)
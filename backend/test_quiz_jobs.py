@@ -0,0 +1,50 @@
+import pytest
+
+from quiz_jobs import QuizJobQueue, QueueFullError
+
+
+def finished(job, timeout=5):
+    with job._cond:
+        assert job._cond.wait_for(lambda: job.is_finished, timeout=timeout)
+    return job
+
+
+def test_jobs_stream_questions_and_report_their_outcome():
+    seen = {}
+
+    def handler(job):
+        # The worker can already look its own job up
+        seen[job.params['topic']] = jobs.get(job.id)
+        if job.params['topic'] == 'boom':
+            raise RuntimeError('model unavailable')
+        if job.params['topic'] == 'quiet':
+            return
+        job.add_questions([{'question': 'Q1?'}])
+        job.add_questions([{'question': 'Q2?'}])
+        job.finish(quiz_id=7)
+
+    jobs = QuizJobQueue(handler, workers=2)
+    done = finished(jobs.submit(1, {'topic': 'ok'}))
+    assert (done.status, done.quiz_id, [q['question'] for q in done.wait_for_update(0)]) == ('done', 7, ['Q1?', 'Q2?'])
+    assert done.to_dict()['question_count'] == 2 and done.to_dict()['topic'] == 'ok'
+
+    assert finished(jobs.submit(1, {'topic': 'boom'})).error == 'model unavailable'
+    assert finished(jobs.submit(1, {'topic': 'quiet'})).error == 'Job ended without a result'
+    assert all(seen[topic] is not None for topic in ('ok', 'boom', 'quiet'))
+
+
+def test_full_queue_rejects_without_registering_the_job():
+    # No workers, so the first job stays queued
+    jobs = QuizJobQueue(lambda job: None, workers=0, max_queued=1)
+    first = jobs.submit(1, {'topic': 'a'})
+    with pytest.raises(QueueFullError):
+        jobs.submit(1, {'topic': 'b'})
+    assert jobs.get(first.id) is first and len(jobs._jobs) == 1 and jobs.pending() == 1
+
+
+def test_finished_jobs_are_pruned_after_the_retention_period():
+    jobs = QuizJobQueue(lambda job: job.finish(quiz_id=1), workers=1, retention=0)
+    job = finished(jobs.submit(1, {}))
+    job.finished_at -= 1
+    jobs.submit(1, {})
+    assert jobs.get(job.id) is None
@@ -0,0 +1,41 @@
+from flask_jwt_extended import create_access_token
+
+from extensions import db
+from models import User
+
+
+def question_set(name, count=2):
+    return [{'question': f'{name} {i}?', 'options': ['a', 'b', 'c', 'd'], 'answer': 'a'} for i in range(count)]
+
+
+def test_each_user_gets_their_own_quiz_set(app, client, headers):
+    with app.app_context():
+        db.session.add(User(username='bob', email='bob@example.com', password='x'))
+        db.session.commit()
+        bob = {'Authorization': f"Bearer {create_access_token(identity='2')}"}
+
+    def questions(auth, **params):
+        response = client.get('/api/quiz', headers=auth, query_string=params)
+        if response.status_code != 200:
+            return response.status_code, None
+        return 200, [q['question'] for q in response.get_json()]
+
+    assert questions(headers) == (200, [])
+    # Anonymous uploads (seed data) are the shared default
+    shared = client.post('/api/quiz/data', json=question_set('Shared')).get_json()['quiz_id']
+    assert questions(headers) == questions(bob) == (200, ['Shared 0?', 'Shared 1?'])
+
+    mine = client.post('/api/quiz/data', json=question_set('Mine', 3), headers=headers).get_json()['quiz_id']
+    # Another user's upload does not replace the quiz this user is on
+    assert questions(headers) == (200, ['Mine 0?', 'Mine 1?', 'Mine 2?'])
+    assert questions(bob) == (200, ['Shared 0?', 'Shared 1?'])
+
+    # Sets can be fetched by id, but only shared ones or one's own
+    assert questions(bob, quiz_id=shared)[0] == 200
+    assert questions(bob, quiz_id=mine)[0] == 403
+    assert questions(bob, quiz_id=mine + 100)[0] == 404
+
+    attempt = {'score': 5, 'total_questions': 1, 'time_taken': 3.0, 'level': 'Easy', 'quiz_id': mine,
+               'answers': [{'question_text': 'Mine 0?', 'user_answer': 'a', 'correct_answer': 'a', 'is_correct': True}]}
+    assert client.post('/api/quiz/submit', json=attempt, headers=headers).status_code == 201
+    assert client.post('/api/quiz/submit', json=attempt, headers=bob).get_json()['message'] == 'Invalid quiz'
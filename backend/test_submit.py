@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from extensions import db
+from models import QuizAttempt
+
+ANSWER = {'question_text': 'Q?', 'user_answer': 'a', 'correct_answer': 'a', 'is_correct': True}
+ATTEMPT = {'score': 5, 'total_questions': 1, 'time_taken': 10.0, 'level': 'Easy', 'answers': [ANSWER]}
+
+
+def submit(client, headers, **changes):
+    return client.post('/api/quiz/submit', headers=headers, json=dict(ATTEMPT, **changes))
+
+
+def test_offset_timestamps_are_stored_as_utc(app, client, headers):
+    ids = [submit(client, headers, timestamp=stamp).get_json()['attempt_id']
+           for stamp in ('2024-03-01T12:30:00+02:00', '2024-03-01T10:30:00Z', '2024-03-01T10:30:00')]
+    with app.app_context():
+        assert {db.session.get(QuizAttempt, i).timestamp for i in ids} == {datetime(2024, 3, 1, 10, 30)}
+
+
+def test_malformed_timestamps_and_answers_are_rejected(client, headers):
+    for stamp in (12345, ['2024-03-01'], 'yesterday', ''):
+        response = submit(client, headers, timestamp=stamp)
+        assert response.status_code == 400 and response.get_json()['message'] == 'Invalid timestamp'
+
+    for answer in (dict(ANSWER, question_text=None), dict(ANSWER, correct_answer=3), dict(ANSWER, user_answer=['a']),
+                   dict(ANSWER, question_id='7'), {k: v for k, v in ANSWER.items() if k != 'question_text'}):
+        response = submit(client, headers, answers=[ANSWER, answer])
+        assert response.status_code == 400 and response.get_json()['message'] == 'Invalid answers'
+
+    # Unanswered questions have no user_answer
+    assert submit(client, headers, answers=[dict(ANSWER, user_answer=None, is_correct=False)]).status_code == 201
+
+
+def test_batch_reports_bad_timestamps_and_answers_per_entry(app, client, headers):
+    response = client.post('/api/quiz/submit/batch', headers=headers, json={'attempts': [
+        dict(ATTEMPT, timestamp=12345),
+        dict(ATTEMPT, answers=[dict(ANSWER, question_text=None)]),
+        dict(ATTEMPT, timestamp='2024-03-01T12:30:00+02:00'),
+    ]})
+    assert response.status_code == 201
+    results = response.get_json()['results']
+    assert [r.get('error') for r in results] == ['Invalid timestamp', 'Invalid answers', None]
+
+    with app.app_context():
+        assert [a.timestamp for a in QuizAttempt.query.all()] == [datetime(2024, 3, 1, 10, 30)]
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from blueprints import quiz
+from extensions import db
+from models import Course, Lesson, Question
+from quiz_jobs import QuizJobQueue
+
+LESSONS = {
+    'Python for Beginners': [
+        ('Introduction', 'Python is a high-level, interpreted programming language.'),
+        ('Variables', 'Variables are containers for storing data values.'),
+        ('Lists', 'A list is an ordered, mutable collection of items.'),
+        ('Dictionaries', 'A dictionary is a mapping of keys to values.'),
+    ],
+    'Web Basics': [('HTML', 'HTML is the markup language that structures web pages.')],
+}
+
+
+@pytest.fixture(autouse=True)
+def lessons(app):
+    with app.app_context():
+        for title, lessons in LESSONS.items():
+            course = Course(title=title)
+            for lesson_title, content in lessons:
+                lesson = Lesson(title=lesson_title, content=content, course=course)
+                db.session.add(Question(question_text=f'Seeded {lesson_title}?', options=['a', 'b', 'c', 'd'],
+                                        correct_answer='a', lesson=lesson))
+            db.session.add(course)
+        db.session.commit()
+
+
+def test_generate_falls_back_to_templates_without_ai(app, client, headers, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise quiz.QuizGenerationError('AI Service not configured', 503)
+
+    monkeypatch.setattr(quiz, 'fetch_quiz_questions', unavailable)
+
+    response = client.post('/api/quiz/generate', json={'topic': 'Python for Beginners', 'count': 5}, headers=headers)
+    assert response.status_code == 200 and response.get_json()['count'] == 5
+    with app.app_context():
+        questions = Question.query.filter_by(quiz_id=response.get_json()['quiz_id']).all()
+        assert all(len(set(q.options)) == 4 and q.correct_answer in q.options for q in questions)
+        # Definitions from the lessons first, then the lessons' own questions
+        assert sum(q.question_text.startswith('Seeded') for q in questions) < 5
+
+    # Topics no lesson covers are not filled with questions about something else
+    response = client.post('/api/quiz/generate', json={'topic': 'World History', 'count': 3}, headers=headers)
+    assert response.status_code == 503
+
+    # Nothing to build from: still the original error
+    with app.app_context():
+        db.session.query(Question).delete()
+        db.session.query(Lesson).delete()
+        db.session.commit()
+    response = client.post('/api/quiz/generate', json={'topic': 'Anything', 'count': 5}, headers=headers)
+    assert response.status_code == 503
+
+
+def test_slow_ai_is_cut_off_by_the_deadline(app, client, headers, monkeypatch):
+    release = threading.Event()
+
+    def slow(topic, count, difficulty, on_questions=None, **kwargs):
+        on_questions([{'question': 'Streamed in time?', 'options': ['a', 'b', 'c', 'd'], 'answer': 'a'}])
+        release.wait(5)
+        on_questions([{'question': 'Too late?', 'options': ['a', 'b', 'c', 'd'], 'answer': 'a'}])
+        return []
+
+    monkeypatch.setattr(quiz, 'fetch_quiz_questions', slow)
+    monkeypatch.setenv('QUIZ_AI_DEADLINE', '0.2')
+
+    # The jobs route no longer needs GEMINI_API_KEY up front
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    started = time.perf_counter()
+    job_id = client.post('/api/quiz/jobs', json={'topic': 'Python for Beginners', 'count': 4},
+                         headers=headers).get_json()['job_id']
+    for _ in range(100):
+        job = client.get(f'/api/quiz/jobs/{job_id}', headers=headers).get_json()
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'done' and job['question_count'] == 4 and time.perf_counter() - started < 3
+    release.set()
+
+    with app.app_context():
+        questions = [q.question_text for q in Question.query.filter_by(quiz_id=job['quiz_id'])]
+    # What streamed in time is kept and topped up from templates; the late question is not
+    assert len(questions) == 4 and questions[0] == 'Streamed in time?' and 'Too late?' not in questions
+
+
+def test_blank_topics_are_rejected(client, headers):
+    for topic in ('', '   ', 42):
+        for path in ('/api/quiz/generate', '/api/quiz/jobs'):
+            response = client.post(path, json={'topic': topic, 'count': 3}, headers=headers)
+            assert response.status_code == 400 and 'topic' in response.get_json()['message']
+    assert quiz.template_quiz_questions('  ', 3) == []
+
+
+def test_model_calls_share_a_bounded_queue(app, client, headers, monkeypatch):
+    calls = []
+
+    def generated(topic, count, difficulty, on_questions=None, **kwargs):
+        calls.append(threading.current_thread().name)
+        return [{'question': f'Generated {i}?', 'options': ['a', 'b', 'c', 'd'], 'answer': 'a'} for i in range(count)]
+
+    monkeypatch.setattr(quiz, 'fetch_quiz_questions', generated)
+    response = client.post('/api/quiz/generate', json={'topic': 'Python for Beginners', 'count': 3}, headers=headers)
+    assert response.status_code == 200 and calls[0].startswith('quiz-job-worker')
+    # The generated questions went to the bank, so the next request needs no model call
+    client.post('/api/quiz/generate', json={'topic': 'Python for Beginners', 'count': 3}, headers=headers)
+    assert len(calls) == 1
+
+    # With every slot taken the request is served from templates instead of waiting for one
+    busy = QuizJobQueue(lambda job: None, workers=0, max_queued=1)
+    busy.submit(None, {})
+    monkeypatch.setitem(app.extensions, 'quiz_ai_calls', busy)
+    response = client.post('/api/quiz/generate', json={'topic': 'Web Basics', 'count': 1}, headers=headers)
+    assert response.status_code == 200 and len(calls) == 1
@@ -0,0 +1,79 @@
+import pytest
+
+from app import create_app
+from blueprints import auth
+from extensions import db
+from models import User
+from password_hasher import hash_password
+
+# Tables as the first release created them, before the columns added since
+BASELINE_SCHEMA = (
+    '''CREATE TABLE user (id INTEGER PRIMARY KEY, username VARCHAR(20) NOT NULL UNIQUE,
+                          email VARCHAR(120) NOT NULL UNIQUE, password VARCHAR(60) NOT NULL,
+                          notifications_enabled BOOLEAN)''',
+    '''CREATE TABLE question (id INTEGER PRIMARY KEY, question_text VARCHAR(500) NOT NULL, options JSON NOT NULL,
+                              correct_answer VARCHAR(200) NOT NULL, lesson_id INTEGER)''',
+    '''CREATE TABLE quiz_attempt (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES user (id),
+                                  score INTEGER NOT NULL, total_questions INTEGER NOT NULL, time_taken FLOAT NOT NULL,
+                                  level VARCHAR(20) NOT NULL, timestamp DATETIME)''',
+)
+
+
+@pytest.fixture
+def baseline_app():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'JWT_SECRET_KEY': 'backend-test-secret-key-000000000'})
+    with app.app_context():
+        for statement in BASELINE_SCHEMA:
+            db.session.execute(db.text(statement))
+        db.session.execute(db.text("INSERT INTO user (username, email, password) VALUES ('old', 'old@example.com', 'x')"))
+        db.session.commit()
+    return app
+
+
+def columns(table):
+    return {column['name'] for column in db.inspect(db.engine).get_columns(table)}
+
+
+def test_upgrade_adds_missing_columns_to_existing_tables(baseline_app):
+    result = baseline_app.test_cli_runner().invoke(args=['upgrade-db'])
+    assert result.exit_code == 0, result.output
+    assert 'Added user.settings_version' in result.output
+
+    with baseline_app.app_context():
+        assert 'settings_version' in columns('user')
+        assert db.session.get(User, 1).settings_version == 0
+
+    # Running it again has nothing left to do
+    assert 'Added' not in baseline_app.test_cli_runner().invoke(args=['upgrade-db']).output
+
+
+def test_existing_users_can_sign_in_and_refresh_after_the_upgrade(baseline_app, monkeypatch):
+    monkeypatch.setattr(auth.password_hasher, 'workers', 0)
+    monkeypatch.setattr(auth.password_hasher, 'rounds', 4)
+    with baseline_app.app_context():
+        db.session.execute(db.text("UPDATE user SET password = :hash"), {'hash': hash_password('secret', 4)})
+        db.session.commit()
+
+    output = baseline_app.test_cli_runner().invoke(args=['upgrade-db']).output
+    assert 'Added user.password_version' in output
+    with baseline_app.app_context():
+        assert db.session.get(User, 1).password_version == 0
+
+    client = baseline_app.test_client()
+    response = client.post('/api/login', json={'email': 'old@example.com', 'password': 'secret'})
+    assert response.status_code == 200
+    refresh = response.get_json()['refresh_token']
+    assert client.post('/api/token/refresh', headers={'Authorization': f'Bearer {refresh}'}).status_code == 200
+
+
+def test_quiz_sets_are_linked_to_old_questions_and_attempts(baseline_app):
+    output = baseline_app.test_cli_runner().invoke(args=['upgrade-db']).output
+    assert 'Added question.quiz_id' in output and 'Added quiz_attempt.quiz_id' in output
+
+    with baseline_app.app_context():
+        inspector = db.inspect(db.engine)
+        for table in ('question', 'quiz_attempt'):
+            foreign_keys = {(tuple(fk['constrained_columns']), fk['referred_table'])
+                            for fk in inspector.get_foreign_keys(table)}
+            assert (('quiz_id',), 'quiz') in foreign_keys
+            assert f'ix_{table}_quiz_id' in {index['name'] for index in inspector.get_indexes(table)}
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from extensions import db
+from models import QuizAttempt, QuizAttemptAnswer, UserStats
+
+
+def test_first_submit_counts_attempts_from_before_the_summary_tables(app, client, headers):
+    with app.app_context():
+        # History recorded before UserStats existed: no summary row for the user
+        for days_ago, score in ((2, 10), (1, 20)):
+            attempt = QuizAttempt(user_id=1, score=score, total_questions=10, time_taken=30.0, level='Easy',
+                                  timestamp=datetime.utcnow() - timedelta(days=days_ago))
+            db.session.add(attempt)
+            db.session.flush()
+            db.session.add(QuizAttemptAnswer(attempt_id=attempt.id, question_text='Q?', user_answer='a',
+                                             correct_answer='a', is_correct=True))
+        db.session.commit()
+
+    response = client.post('/api/quiz/submit', headers=headers, json={
+        'score': 30, 'total_questions': 10, 'time_taken': 20.0, 'level': 'Easy',
+        'answers': [{'question_text': 'Q?', 'user_answer': 'a', 'correct_answer': 'a', 'is_correct': True}]
+    })
+    assert response.status_code == 201
+
+    with app.app_context():
+        stats = db.session.get(UserStats, 1)
+        assert (stats.attempts, stats.total_score, stats.correct_answers, stats.best_time) == (3, 60, 3, 20.0)
+        assert stats.levels[0].attempts == 3
+
+    stats = client.get('/api/user/stats', headers=headers).get_json()
+    assert stats['quizzes_taken'] == 3 and stats['average_score'] == 20 and stats['longest_streak'] == 3
+
+    # Later submissions are folded in incrementally
+    client.post('/api/quiz/submit', headers=headers, json={
+        'score': 40, 'total_questions': 10, 'time_taken': 25.0, 'level': 'Hard',
+        'answers': [{'question_text': 'Q?', 'user_answer': 'b', 'correct_answer': 'a', 'is_correct': False}]
+    })
+    stats = client.get('/api/user/stats', headers=headers).get_json()
+    assert stats['quizzes_taken'] == 4 and stats['best_score'] == 40 and set(stats['levels']) == {'Easy', 'Hard'}
+
+
+def test_first_submits_racing_to_create_the_summary_row(app, client, headers):
+    # Another request's first submit creates the row between our lookup and our insert
+    def concurrent_first_submit(state):
+        if state.is_select and UserStats in [d.get('entity') for d in state.statement.column_descriptions]:
+            event.remove(db.session, 'do_orm_execute', concurrent_first_submit)
+            result = state.invoke_statement().freeze()
+            db.session.connection().execute(db.insert(UserStats).values(
+                user_id=1, attempts=1, total_score=5, best_score=5, total_questions=1, correct_answers=1,
+                total_time=10.0, best_time=10.0, current_streak=1, longest_streak=1,
+                last_active_date=datetime.utcnow().date()))
+            return result()
+
+    with app.app_context():
+        event.listen(db.session, 'do_orm_execute', concurrent_first_submit)
+    response = client.post('/api/quiz/submit', headers=headers, json={
+        'score': 3, 'total_questions': 1, 'time_taken': 5.0, 'level': 'Easy',
+        'answers': [{'question_text': 'Q?', 'user_answer': 'a', 'correct_answer': 'a', 'is_correct': True}]
+    })
+    assert response.status_code == 201
+
+    # Folded into the other request's row rather than failing on the duplicate key
+    stats = client.get('/api/user/stats', headers=headers).get_json()
+    assert stats['quizzes_taken'] == 2 and stats['best_score'] == 5 and stats['best_time'] == 5.0
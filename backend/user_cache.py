@@ -0,0 +1,73 @@
+import os
+import threading
+
+from quiz_cache import MemoryCacheStore
+
+
+def user_profile(user):
+    """The cached (and token-embedded) view of a user: what /api/user returns plus its version."""
+    return {
+        'username': user.username,
+        'email': user.email,
+        'notifications_enabled': user.notifications_enabled,
+        'settings_version': user.settings_version or 0
+    }
+
+
+def password_version(user):
+    """
+    Refresh tokens carry this so a password change revokes them. It is a counter rather than a
+    fingerprint of the hash, so upgrading the hash to a new bcrypt cost keeps sessions alive.
+    """
+    return user.password_version or 0
+
+
+class UserCache:
+    """
+    Per-process cache of user profiles, so authenticated requests skip the user lookup.
+
+    Entries are replaced when this process changes the user and expire after `ttl`.
+    A change made by another worker is noticed sooner when a request carries an access token
+    with a newer settings version than the cached entry (see get).
+    """
+
+    def __init__(self, max_entries=4096, ttl=300):
+        self.ttl = ttl
+        self.store = MemoryCacheStore(max_entries=max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id, min_version=0):
+        """The cached profile, or None if missing or older than `min_version`."""
+        profile = self.store.get(user_id)
+        if profile is not None and profile['settings_version'] < min_version:
+            self.store.delete(user_id)
+            profile = None
+        with self._lock:
+            if profile is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return profile
+
+    def set(self, user_id, profile):
+        self.store.set(user_id, profile, self.ttl)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self.store),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'ttl': self.ttl
+        }
+
+
+def create_user_cache():
+    """Builds the user cache using USER_CACHE_MAX_ENTRIES and USER_CACHE_TTL from the environment."""
+    return UserCache(
+        max_entries=int(os.getenv('USER_CACHE_MAX_ENTRIES', 4096)),
+        ttl=int(os.getenv('USER_CACHE_TTL', 300))
+    )
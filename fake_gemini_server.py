@@ -0,0 +1,147 @@
+"""
+Local stand-in for the Gemini REST API, for tests and load tests.
+
+Point the app at it with GEMINI_BASE_URL=http://127.0.0.1:8765/ and any GEMINI_API_KEY.
+Answers generateContent / streamGenerateContent with a canned quiz (the question count
+is taken from "Generate N ..." in the prompt, or from each "Set K: N ..." line of a batch prompt). Latency and failure injection are configurable.
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_PATH = re.compile(r"/models/([^/:]+):(generateContent|streamGenerateContent)")
+
+
+def fake_quiz(count):
+    return [
+        {
+            "question": f"Fake question {i + 1}?",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "answer": "Option B"
+        }
+        for i in range(count)
+    ]
+
+
+def fake_batch(sets):
+    return [
+        {"set": set_id, **question, "question": f"Fake question {set_id}.{i + 1}?"}
+        for set_id, count in sets
+        for i, question in enumerate(fake_quiz(count))
+    ]
+
+
+def response_text(prompt):
+    sets = re.findall(r"Set (\d+): (\d+) ", prompt)
+    if sets:
+        return json.dumps(fake_batch((int(set_id), int(count)) for set_id, count in sets))
+    match = re.search(r"Generate (\d+)", prompt)
+    if match:
+        return json.dumps(fake_quiz(int(match.group(1))))
+    return "This is a fake answer from the local Gemini stand-in."
+
+
+def candidate(text, finish_reason="STOP"):
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": finish_reason,
+            "index": 0
+        }],
+        "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 10, "totalTokenCount": 20}
+    }
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        match = MODEL_PATH.search(self.path)
+        if not match:
+            return self.send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+
+        with self.server.stats_lock:
+            self.server.request_count += 1
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if random.random() < self.server.fail_rate:
+            return self.send_json(503, {"error": {"code": 503, "message": "Injected failure", "status": "UNAVAILABLE"}})
+
+        payload = json.loads(body or b"{}")
+        prompt = " ".join(
+            part.get("text", "")
+            for content in payload.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        text = response_text(prompt)
+
+        if match.group(2) == "streamGenerateContent":
+            return self.send_stream(text)
+        return self.send_json(200, candidate(text))
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, text, chunk_size=16):
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or [""]
+        events = b"".join(
+            f"data: {json.dumps(candidate(chunk, 'STOP' if i == len(chunks) - 1 else None))}\r\n\r\n".encode("utf-8")
+            for i, chunk in enumerate(chunks)
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(events)))
+        self.end_headers()
+        self.wfile.write(events)
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs under load tests, adding 1 s+ retransmit stalls
+    request_queue_size = 1024
+
+
+def start_fake_server(host="127.0.0.1", port=0, latency=0.0, fail_rate=0.0, verbose=False):
+    """Starts the fake server on a background thread and returns it. server.url has the base URL."""
+    server = FakeGeminiServer((host, port), FakeGeminiHandler)
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.verbose = verbose
+    server.request_count = 0
+    server.stats_lock = threading.Lock()
+    server.url = f"http://{host}:{server.server_address[1]}/"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local fake Gemini API server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = start_fake_server(port=args.port, latency=args.latency, fail_rate=args.fail_rate, verbose=True)
+    print(f"Fake Gemini listening on {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,21 +1,88 @@
-import { createContext, useContext, useState, useEffect } from 'react';
+import { createContext, useContext, useState, useEffect, useCallback } from 'react';
 
 const AuthContext = createContext();
 
+// Renew the access token this long before it expires
+const REFRESH_MARGIN_MS = 60 * 1000;
+
+const tokenExpiry = (token) => {
+  try {
+    const payload = token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/');
+    return JSON.parse(atob(payload)).exp * 1000;
+  } catch {
+    return 0;
+  }
+};
+
 export const useAuth = () => useContext(AuthContext);
 
 export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
 
+  const saveUser = (userData) => {
+    setUser(userData);
+    localStorage.setItem('user', JSON.stringify(userData));
+  };
+
+  const logout = useCallback(() => {
+    setUser(null);
+    localStorage.removeItem('user');
+  }, []);
+
+  // Swaps the refresh token for a new access token; no password, so the server skips bcrypt
+  const refreshSession = useCallback(async (current) => {
+    try {
+      const response = await fetch('http://localhost:5000/api/token/refresh', {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${current.refreshToken}` },
+      });
+      if (!response.ok) {
+        logout();
+        return null;
+      }
+      const data = await response.json();
+      const userData = { ...current, name: data.username, token: data.access_token };
+      saveUser(userData);
+      return userData;
+    } catch (error) {
+      // Server unreachable: keep the session and let the pages' own requests report it
+      console.error('Token refresh error:', error);
+      setUser(current);
+      return current;
+    }
+  }, [logout]);
+
+  // Server responses that hand out new tokens (settings and password changes)
+  const updateTokens = (data) => {
+    if (user && data.access_token) {
+      saveUser({ ...user, token: data.access_token, refreshToken: data.refresh_token || user.refreshToken });
+    }
+  };
+
   useEffect(() => {
     // Check for stored user in localStorage
     const storedUser = localStorage.getItem('user');
-    if (storedUser) {
-      setUser(JSON.parse(storedUser));
+    if (!storedUser) {
+      setLoading(false);
+      return;
     }
-    setLoading(false);
-  }, []);
+    const parsed = JSON.parse(storedUser);
+    if (parsed.refreshToken && tokenExpiry(parsed.token) - REFRESH_MARGIN_MS < Date.now()) {
+      // Renew an expired session before the pages start making requests with it
+      refreshSession(parsed).finally(() => setLoading(false));
+    } else {
+      setUser(parsed);
+      setLoading(false);
+    }
+  }, [refreshSession]);
+
+  useEffect(() => {
+    if (!user?.refreshToken) return;
+    const delay = Math.max(tokenExpiry(user.token) - REFRESH_MARGIN_MS - Date.now(), 0);
+    const timer = setTimeout(() => refreshSession(user), delay);
+    return () => clearTimeout(timer);
+  }, [user, refreshSession]);
 
   const login = async (email, password) => {
     try {
@@ -34,11 +101,11 @@ export const AuthProvider = ({ children }) => {
           name: data.username, 
           email: data.email, 
           token: data.access_token,
+          refreshToken: data.refresh_token,
           xp: 0, // Backend doesn't send XP yet, default to 0
           id: 1 // Backend doesn't send ID in the response body I defined, but token has it. 
         };
-        setUser(userData);
-        localStorage.setItem('user', JSON.stringify(userData));
+        saveUser(userData);
         return true;
       } else {
         console.error('Login failed:', data.message);
@@ -79,16 +146,10 @@ export const AuthProvider = ({ children }) => {
     }
   };
 
-  const logout = () => {
-    setUser(null);
-    localStorage.removeItem('user');
-  };
-
   const updateXP = (points) => {
       if (user) {
           const updatedUser = { ...user, xp: user.xp + points };
-          setUser(updatedUser);
-          localStorage.setItem('user', JSON.stringify(updatedUser));
+          saveUser(updatedUser);
       }
   }
 
@@ -97,6 +158,7 @@ export const AuthProvider = ({ children }) => {
     login,
     register,
     logout,
+    updateTokens,
     updateXP,
     loading
   };
@@ -1,21 +1,35 @@
 import { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
-import { Trophy, Clock, Calendar } from 'lucide-react';
+import { Trophy, Clock, User } from 'lucide-react';
+import { useAuth } from '../context/AuthContext';
 
 const Leaderboard = () => {
-  const [history, setHistory] = useState([]);
+  const { user } = useAuth();
+  const [entries, setEntries] = useState([]);
+  const [me, setMe] = useState(null);
+  const [timeWindow, setTimeWindow] = useState('all');
 
   useEffect(() => {
-    const storedHistory = JSON.parse(localStorage.getItem('quizHistory') || '[]');
-    const sortedHistory = storedHistory.sort((a, b) => {
-      if (b.score !== a.score) {
-        return b.score - a.score;
+    const fetchLeaderboard = async () => {
+      try {
+        const response = await fetch(`http://localhost:5000/api/leaderboard?window=${timeWindow}&limit=50`, {
+          headers: { 'Authorization': `Bearer ${user?.token}` }
+        });
+        if (response.ok) {
+          const data = await response.json();
+          setEntries(data.entries);
+          setMe(data.me);
+        }
+      } catch (error) {
+        console.error('Error fetching leaderboard:', error);
       }
-      return a.time - b.time;
-    });
-    setHistory(sortedHistory);
-  }, []);
+    };
+
+    if (user) {
+      fetchLeaderboard();
+    }
+  }, [user, timeWindow]);
 
   const container = {
     hidden: { opacity: 0 },
@@ -37,9 +51,20 @@ const Leaderboard = () => {
       <div style={{ display: 'flex', alignItems: 'center', gap: '1rem', marginBottom: '2rem' }}>
         <Trophy size={32} color="var(--warning)" />
         <h2>Leaderboard</h2>
+        <select value={timeWindow} onChange={(e) => setTimeWindow(e.target.value)} style={{ marginLeft: 'auto' }}>
+          <option value="all">All time</option>
+          <option value="month">This month</option>
+          <option value="week">This week</option>
+        </select>
       </div>
+
+      {me && (
+        <p style={{ color: 'var(--text-secondary)', marginBottom: '1rem' }}>
+          Your rank: <strong>#{me.rank}</strong> of {me.total} ({me.points} points)
+        </p>
+      )}
       
-      {history.length === 0 ? (
+      {entries.length === 0 ? (
         <p style={{ textAlign: 'center', color: 'var(--text-secondary)', padding: '2rem' }}>
           No quizzes taken yet. Be the first to set a record!
         </p>
@@ -52,26 +77,28 @@ const Leaderboard = () => {
           <thead>
             <tr>
               <th>Rank</th>
-              <th>Score</th>
-              <th><div style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}><Clock size={16} /> Time</div></th>
-              <th><div style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}><Calendar size={16} /> Date</div></th>
+              <th><div style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}><User size={16} /> Player</div></th>
+              <th>Points</th>
+              <th>Quizzes</th>
+              <th><div style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}><Clock size={16} /> Best Time</div></th>
             </tr>
           </thead>
           <tbody>
-            {history.map((entry, index) => (
+            {entries.map((entry, index) => (
               <motion.tr 
-                key={index} 
+                key={entry.user_id} 
                 variants={item}
                 style={{ 
                   backgroundColor: index < 3 ? `rgba(245, 158, 11, ${0.1 - index * 0.03})` : 'transparent'
                 }}
               >
                 <td>
-                  {index === 0 ? '🥇' : index === 1 ? '🥈' : index === 2 ? '🥉' : index + 1}
+                  {entry.rank === 1 ? '🥇' : entry.rank === 2 ? '🥈' : entry.rank === 3 ? '🥉' : entry.rank}
                 </td>
-                <td style={{ fontWeight: 'bold', color: 'var(--accent-primary)' }}>{entry.score}</td>
-                <td>{entry.time.toFixed(1)}s</td>
-                <td style={{ color: 'var(--text-secondary)' }}>{new Date(entry.date).toLocaleDateString()}</td>
+                <td>{entry.username}</td>
+                <td style={{ fontWeight: 'bold', color: 'var(--accent-primary)' }}>{entry.points}</td>
+                <td>{entry.attempts}</td>
+                <td>{entry.best_time != null ? `${entry.best_time.toFixed(1)}s` : '-'}</td>
               </motion.tr>
             ))}
           </tbody>
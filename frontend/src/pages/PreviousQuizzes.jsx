@@ -4,30 +4,35 @@ import { Clock, Trophy, Calendar, ChevronRight } from 'lucide-react';
 
 const PreviousQuizzes = () => {
   const [attempts, setAttempts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const navigate = useNavigate();
 
-  useEffect(() => {
-    const fetchHistory = async () => {
-      try {
-        const user = JSON.parse(localStorage.getItem('user'));
-        const token = user?.token;
-        
-        const response = await fetch('http://localhost:5000/api/history', {
-          headers: { 'Authorization': `Bearer ${token}` }
-        });
-        
-        if (response.ok) {
-          const data = await response.json();
-          setAttempts(data);
-        }
-      } catch (error) {
-        console.error('Error fetching history:', error);
-      } finally {
-        setLoading(false);
+  const fetchHistory = async (cursor = null) => {
+    try {
+      const user = JSON.parse(localStorage.getItem('user'));
+      const token = user?.token;
+      
+      const url = cursor
+        ? `http://localhost:5000/api/history?cursor=${encodeURIComponent(cursor)}`
+        : 'http://localhost:5000/api/history';
+      const response = await fetch(url, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      
+      if (response.ok) {
+        const data = await response.json();
+        setAttempts(prev => cursor ? [...prev, ...data] : data);
+        setNextCursor(response.headers.get('X-Next-Cursor'));
       }
-    };
+    } catch (error) {
+      console.error('Error fetching history:', error);
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
     fetchHistory();
   }, []);
 
@@ -87,6 +92,9 @@ const PreviousQuizzes = () => {
         {attempts.length === 0 && (
             <div style={{ textAlign: 'center', color: 'var(--text-secondary)' }}>No quizzes taken yet.</div>
         )}
+        {nextCursor && (
+            <button className="btn btn-secondary" onClick={() => fetchHistory(nextCursor)}>Load more</button>
+        )}
       </div>
     </div>
   );
@@ -4,7 +4,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { User, Mail, Trophy, Star, Clock, Activity, LogOut, Edit2, Lock, Bell, X } from 'lucide-react';
 
 const Profile = () => {
-  const { user, logout } = useAuth();
+  const { user, logout, updateTokens } = useAuth();
   const [stats, setStats] = useState({
     quizzesTaken: 0,
     averageScore: 0,
@@ -23,18 +23,16 @@ const Profile = () => {
         const token = user?.token;
         const headers = { 'Authorization': `Bearer ${token}` };
 
-        // Fetch Stats
-        const historyRes = await fetch('http://localhost:5000/api/history', { headers });
-        if (historyRes.ok) {
-          const history = await historyRes.json();
-          const totalScore = history.reduce((acc, curr) => acc + curr.score, 0);
-          const totalTime = history.reduce((acc, curr) => acc + curr.time_taken, 0);
+        // Fetch Stats (aggregated server-side)
+        const statsRes = await fetch('http://localhost:5000/api/user/stats', { headers });
+        if (statsRes.ok) {
+          const data = await statsRes.json();
           
           setStats({
-            quizzesTaken: history.length,
-            averageScore: history.length > 0 ? Math.round(totalScore / history.length) : 0,
-            totalTime: Math.round(totalTime / 60),
-            recentActivity: history.slice(0, 3)
+            quizzesTaken: data.quizzes_taken,
+            averageScore: Math.round(data.average_score),
+            totalTime: Math.round(data.total_time / 60),
+            recentActivity: data.recent_activity
           });
         }
 
@@ -63,7 +61,7 @@ const Profile = () => {
         setNotificationsEnabled(newState);
         
         const token = user?.token;
-        await fetch('http://localhost:5000/api/user/settings', {
+        const response = await fetch('http://localhost:5000/api/user/settings', {
             method: 'PUT',
             headers: { 
                 'Authorization': `Bearer ${token}`,
@@ -71,6 +69,9 @@ const Profile = () => {
             },
             body: JSON.stringify({ notifications_enabled: newState })
         });
+        if (response.ok) {
+            updateTokens(await response.json());
+        }
     } catch (error) {
         console.error('Error updating settings:', error);
         setNotificationsEnabled(!notificationsEnabled); // Revert on error
@@ -103,6 +104,8 @@ const Profile = () => {
         const data = await response.json();
         
         if (response.ok) {
+            // Older refresh tokens stop working after a password change
+            updateTokens(data);
             setMessage({ type: 'success', text: 'Password updated successfully' });
             setTimeout(() => {
                 setShowPasswordModal(false);
@@ -9,6 +9,7 @@ const Quiz = () => {
   const location = useLocation();
   const timerRef = useRef(null);
   const answersRef = useRef([]);
+  const quizIdRef = useRef(null);
   const { timeLimit = 10, level = 'Moderate' } = location.state || {};
   const { user, updateXP } = useAuth();
 
@@ -54,12 +55,17 @@ const Quiz = () => {
             })
         });
 
-        if (!generateRes.ok) {
+        let quizUrl = 'http://localhost:5000/api/quiz';
+        if (generateRes.ok) {
+            const generated = await generateRes.json();
+            quizIdRef.current = generated.quiz_id;
+            quizUrl += `?quiz_id=${generated.quiz_id}`;
+        } else {
             console.error("Failed to generate quiz");
         }
 
         // Now fetch the generated questions
-        const response = await fetch('http://localhost:5000/api/quiz', {
+        const response = await fetch(quizUrl, {
           headers: {
             'Authorization': `Bearer ${token}`
           }
@@ -177,6 +183,7 @@ const Quiz = () => {
                 total_questions: questions.length,
                 time_taken: totalTime,
                 level: level,
+                quiz_id: quizIdRef.current,
                 answers: answersRef.current
             })
         });
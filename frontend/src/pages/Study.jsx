@@ -18,6 +18,7 @@ const Study = () => {
   const [numPages, setNumPages] = useState(null);
   const [pageNumber, setPageNumber] = useState(1);
   const [extractedText, setExtractedText] = useState('');
+  const [documentId, setDocumentId] = useState(null);
   
   // Chat State
   const [messages, setMessages] = useState([
@@ -52,6 +53,7 @@ const Study = () => {
         const data = await response.json();
         if (response.ok) {
           setExtractedText(data.text);
+          setDocumentId(data.document_id);
           setMessages(prev => [...prev, { role: 'ai', content: `Processed ${selectedFile.name}. content extracted! Ask me anything about it.` }]);
         } else {
           console.error("Extraction failed:", data.message);
@@ -79,7 +81,7 @@ const Study = () => {
 
     try {
       const token = JSON.parse(localStorage.getItem('user'))?.token;
-      const response = await fetch('http://localhost:5000/api/chat', {
+      const response = await fetch('http://localhost:5000/api/chat/stream', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -87,15 +89,43 @@ const Study = () => {
         },
         body: JSON.stringify({
           question: userMsg,
-          context: extractedText
+          document_id: documentId
         })
       });
 
-      const data = await response.json();
-      if (response.ok) {
-        setMessages(prev => [...prev, { role: 'ai', content: data.answer }]);
-      } else {
+      if (!response.ok) {
         setMessages(prev => [...prev, { role: 'ai', content: "Sorry, I couldn't process that request." }]);
+        return;
+      }
+
+      // Render the answer as it streams in: each 'token' event extends the last AI message
+      setMessages(prev => [...prev, { role: 'ai', content: '' }]);
+      const appendToAnswer = (text) => setMessages(prev => {
+        const last = prev[prev.length - 1];
+        return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+      });
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          const event = block.match(/^event: (.*)$/m)?.[1];
+          const data = block.match(/^data: (.*)$/m)?.[1];
+          if (!data) continue;
+          if (event === 'token') {
+            appendToAnswer(JSON.parse(data).text);
+          } else if (event === 'error') {
+            appendToAnswer("\n\nSorry, I couldn't finish that answer.");
+          }
+        }
       }
     } catch (error) {
       console.error("Chat error:", error);
@@ -1,5 +1,6 @@
 import sys
 import os
+import json
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 
@@ -7,7 +8,10 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from server.gemini_service import GeminiService
-from server.blob_service import BlobStorageService
+from server.blob_service import BlobStorageService, DEFAULT_PAGE_BYTES
+from server.quiz_parser import parse_quiz, QuizStreamParser
+from server.batch_quiz import BatchQuizGenerator
+from server.match_store import MatchStore, ingest
 
 load_dotenv()
 
@@ -21,15 +25,21 @@ class QuizToolController:
         try:
             self.blob_service = BlobStorageService()
         except Exception as e:
-            print(f"Warning: Failed to initialize BlobStorageService: {e}")
+            print(f"Warning: Failed to initialize BlobStorageService: {e}", file=sys.stderr)
             self.blob_service = None
 
         try:
             self.gemini_service = GeminiService()
         except Exception as e:
-            print(f"Warning: Failed to initialize GeminiService: {e}")
+            print(f"Warning: Failed to initialize GeminiService: {e}", file=sys.stderr)
             self.gemini_service = None
 
+        try:
+            self.match_store = MatchStore()
+        except Exception as e:
+            print(f"Warning: Failed to open MatchStore: {e}", file=sys.stderr)
+            self.match_store = None
+
     def list_cricket_data(self) -> str:
         """
         Lists all available cricket data files in the Azure Blob Storage.
@@ -45,23 +55,115 @@ class QuizToolController:
         except Exception as e:
             return f"Error: {str(e)}"
 
-    def get_cricket_data(self, filename: str) -> str:
+    def list_cricket_archive(self, filename: str) -> str:
+        """
+        Lists the files inside a zipped cricket data file with their sizes, without extracting them.
+        Use it to pick a pattern or range for get_cricket_data.
+        """
+        if not self.blob_service:
+            return "Error: BlobStorageService is not initialized. Check configuration."
+
+        try:
+            members = self.blob_service.list_zip_members(filename)
+            return f"{len(members)} files in {filename}:\n" + "\n".join(
+                f"{index}: {m['name']} ({m['size']} bytes)" for index, m in enumerate(members)
+            )
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    def _read_page(self, filename, pattern, offset, limit, cursor, max_bytes):
+        # An explicit cursor wins over a plain file offset
+        return self.blob_service.read_page(
+            filename, pattern or None, cursor or f"{offset}:0", limit or None, max_bytes
+        )
+
+    @staticmethod
+    def _page_footer(page):
+        if not page['files']:
+            return f"--- No files from cursor {page['cursor']} (of {page['total_files']}) ---"
+        footer = f"--- Page from cursor {page['cursor']}: {len(page['files'])} of {page['total_files']} files"
+        if page['next_cursor']:
+            return footer + f"; pass cursor=\"{page['next_cursor']}\" for the next page ---"
+        return footer + "; end of data ---"
+
+    def get_cricket_data(self, filename: str, pattern: str = "", offset: int = 0, limit: int = 0,
+                         cursor: str = "", max_bytes: int = DEFAULT_PAGE_BYTES) -> str:
+        """
+        Retrieves one page of a cricket data file from Azure Blob Storage.
+        Large archives are returned in windows; the last line gives the cursor for the next page.
+
+        Args:
+            filename: The blob to read.
+            pattern: For zips, only include files matching this glob, e.g. "*.json" or "1001*.json,README*".
+            offset: Index of the first matching file to include (default 0). Each Cricsheet file is one match.
+            limit: Maximum number of files (matches) in the page (default 0: as many as fit).
+            cursor: Continue where a previous page stopped; overrides offset.
+            max_bytes: Maximum size of the page text (default 128 KiB).
+        """
+        if not self.blob_service:
+            return "Error: BlobStorageService is not initialized. Check configuration."
+
+        try:
+            page = self._read_page(filename, pattern, offset, limit, cursor, max_bytes)
+            return f"{page['content']}\n{self._page_footer(page)}"
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+    def generate_quiz_from_data(self, filename: str, topic: str = "", count: int = 5, difficulty: str = "Medium",
+                                pattern: str = "", offset: int = 0, limit: int = 0, cursor: str = "",
+                                max_bytes: int = DEFAULT_PAGE_BYTES) -> str:
         """
-        Retrieves the content of a specific cricket data file from Azure Blob Storage.
+        Generates quiz questions grounded in one page of a cricket data file.
+        Only that window of data is sent to Gemini; call again with next_cursor to cover more of the archive.
+
+        Args:
+            filename: The blob to read.
+            topic: Optional focus for the questions, e.g. "bowling figures".
+            count: Number of questions to generate (default 5).
+            difficulty: Difficulty level (Easy, Medium, Hard).
+            pattern, offset, limit, cursor, max_bytes: Select the page, as in get_cricket_data.
+
+        Returns JSON: {"questions": [...], "files": [...], "next_cursor": str or null}.
         """
         if not self.blob_service:
             return "Error: BlobStorageService is not initialized. Check configuration."
+        if not self.gemini_service:
+            return "Error: GeminiService is not initialized. Check configuration."
+
+        try:
+            page = self._read_page(filename, pattern, offset, limit, cursor, max_bytes)
+        except Exception as e:
+            return f"Error: {str(e)}"
+        if not page['files']:
+            return f"Error: no data in '{filename}' at cursor {page['cursor']}."
 
+        focus = f" focusing on '{topic}'" if topic else ""
+        prompt = (
+            f"Generate {count} multiple-choice quiz questions{focus}, using only facts stated in the data below. "
+            f"Difficulty: {difficulty}. "
+            f"Return the result as a strictly formatted JSON array. "
+            f"Each object in the array must have these keys: 'question' (string), 'options' (array of 4 strings), and 'answer' (string, matching one of the options). "
+            f"Do not include any markdown formatting or explanations outside the JSON."
+        )
         try:
-            content = self.blob_service.get_blob_content(filename)
-            return content
+            result = self.gemini_service.generate_quiz(prompt, data=page['content'], offset=page['cursor'])
         except Exception as e:
             return f"Error: {str(e)}"
 
+        questions, _ = parse_quiz(result, limit=count)
+        if not questions:
+            return result
+        return json.dumps({
+            'questions': questions,
+            'files': page['files'],
+            'next_cursor': page['next_cursor']
+        }, indent=2)
+
     def generate_quiz_questions(self, topic: str = "General Knowledge", count: int = 10, difficulty: str = "Medium") -> str:
         """
         Generates quiz questions using Gemini's knowledge.
-        Defaults to General Knowledge.
+        Defaults to General Knowledge. When Gemini is unavailable or fails, cricket topics
+        fall back to template questions from the match store (see generate_template_quiz).
 
         Args:
             topic: The specific topic (default "General Knowledge").
@@ -69,6 +171,9 @@ class QuizToolController:
             difficulty: Difficulty level (Easy, Medium, Hard).
         """
         if not self.gemini_service:
+            fallback = self._template_questions(topic, count)
+            if fallback:
+                return json.dumps(fallback, indent=2)
             return "Error: GeminiService is not initialized. Check configuration."
 
         prompt = (
@@ -83,18 +188,164 @@ class QuizToolController:
         try:
             # We pass None for data and offset to use Gemini's internal knowledge
             result = self.gemini_service.generate_quiz(prompt=prompt)
-            return result
+        except Exception as e:
+            fallback = self._template_questions(topic, count)
+            return json.dumps(fallback, indent=2) if fallback else f"Error: {str(e)}"
+
+        # Return only well-formed questions; the raw text is kept when nothing could be salvaged
+        questions, _ = parse_quiz(result, limit=count)
+        if not questions:
+            questions = self._template_questions(topic, count)
+        return json.dumps(questions, indent=2) if questions else result
+
+    def generate_template_quiz(self, topic: str = "cricket", count: int = 10, seed: int | None = None) -> str:
+        """
+        Generates quiz questions from the ingested Cricsheet match store with fixed templates:
+        no model call, so it is instant and free. Options and answers come straight from the data.
+
+        Args:
+            topic: A competition or team name (e.g. "Indian Premier League", "Mumbai Indians"), or "cricket" for any match.
+            count: Number of questions to generate (default 10).
+            seed: Makes the questions repeatable.
+        """
+        if not self.match_store:
+            return "Error: MatchStore is not initialized. Check configuration."
+
+        questions = self._template_questions(topic, count, seed)
+        if not questions:
+            return f"Error: no match data for '{topic}'. Run ingest_cricket_data or try another topic."
+        return json.dumps(questions, indent=2)
+
+    def _template_questions(self, topic, count, seed=None):
+        """Template questions for a competition, a team, or any match when the topic just says cricket."""
+        # Nothing ingested yet: don't create an empty database just to find that out
+        if not self.match_store or not self.match_store.exists:
+            return []
+        for filters in ({'event': topic}, {'team': topic}):
+            questions = self.match_store.fact_questions(count, seed=seed, **filters)
+            if questions:
+                return questions
+        if 'cricket' in topic.lower():
+            return self.match_store.fact_questions(count, seed=seed)
+        return []
+
+    def ingest_cricket_data(self, workers: int = 0) -> str:
+        """
+        Loads new Cricsheet match files from Azure Blob Storage into the local match store.
+        Only blobs and matches that were not ingested before are parsed.
+
+        Args:
+            workers: Number of processes parsing files in parallel (default 0: one per CPU).
+        """
+        if not self.blob_service:
+            return "Error: BlobStorageService is not initialized. Check configuration."
+        if not self.match_store:
+            return "Error: MatchStore is not initialized. Check configuration."
+
+        try:
+            result = ingest(self.blob_service, self.match_store, workers=workers or None, log=lambda _: None)
+            return (f"Ingested {result['matches']} new matches from {result['blobs']} changed files. "
+                    f"Store: {json.dumps(self.match_store.stats())}")
         except Exception as e:
             return f"Error: {str(e)}"
 
+    def generate_fact_quiz(self, count: int = 10, event: str = "", team: str = "", season: str = "",
+                           rephrase: bool = True, seed: int | None = None) -> str:
+        """
+        Generates quiz questions from facts in the ingested Cricsheet match store (run ingest_cricket_data first).
+        Answers and options come straight from the data; Gemini, when available, only rewords the questions.
+
+        Args:
+            count: Number of questions to generate (default 10).
+            event: Only use matches from competitions containing this text, e.g. "Premier League".
+            team: Only use matches involving this team.
+            season: Only use matches from this season, e.g. "2023".
+            rephrase: Ask Gemini to make the wording more natural (default True).
+            seed: Makes the choice of facts repeatable.
+        """
+        if not self.match_store:
+            return "Error: MatchStore is not initialized. Check configuration."
+
+        questions = []
+        if self.match_store.exists:
+            questions = self.match_store.fact_questions(count, event or None, team or None, season or None, seed)
+        if not questions:
+            return "Error: no matching facts in the match store. Run ingest_cricket_data or relax the filters."
+        if rephrase and self.gemini_service:
+            questions = self._rephrase(questions)
+        return json.dumps(questions, indent=2)
+
+    def _rephrase(self, questions):
+        """Rewords templated questions with Gemini, keeping a question as it was if its options or answer changed."""
+        prompt = (
+            "Rewrite the wording of each quiz question below so it reads naturally and the set is varied. "
+            "Keep every fact, 'id', option and answer exactly as given; change only 'question'. "
+            "Return a JSON array of objects with keys 'id', 'question', 'options' and 'answer'. "
+            "Do not include any markdown formatting or explanations outside the JSON.\n"
+            + json.dumps([
+                {'id': i, 'question': q['question'], 'options': q['options'], 'answer': q['answer']}
+                for i, q in enumerate(questions)
+            ])
+        )
+        try:
+            result = self.gemini_service.generate_quiz(prompt=prompt)
+        except Exception:
+            return questions
+
+        parser = QuizStreamParser(extra_keys=('id',))
+        parser.feed(result)
+        rephrased = [dict(q) for q in questions]
+        for reworded in parser.questions:
+            original = rephrased[reworded['id']] if reworded.get('id') in range(len(questions)) else None
+            if original and reworded['answer'] == original['answer'] and set(reworded['options']) == set(original['options']):
+                original['question'] = reworded['question']
+        return rephrased
+
+    def generate_quiz_batch(self, specs: list[dict], max_concurrency: int = 4) -> str:
+        """
+        Generates questions for many topics at once, packing them into as few Gemini calls as possible.
+        Suited to bulk jobs such as refilling a question bank.
+
+        Args:
+            specs: List of {"topic": str, "count": int, "difficulty": str} (count defaults to 10, difficulty to Medium).
+            max_concurrency: Maximum number of Gemini calls in flight (default 4).
+        """
+        if not self.gemini_service:
+            return "Error: GeminiService is not initialized. Check configuration."
+
+        try:
+            parsed = [
+                (str(spec['topic']), int(spec.get('count', 10)), str(spec.get('difficulty', 'Medium')))
+                for spec in specs
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            return f"Error: invalid spec ({e}). Each spec needs a 'topic' and an integer 'count'."
+
+        generator = BatchQuizGenerator(
+            self.gemini_service.manager.generate_content,
+            self.gemini_service.model_name,
+            max_concurrency=max_concurrency
+        )
+        sets = generator.generate(parsed)
+        return json.dumps([
+            {'topic': topic, 'difficulty': difficulty, 'requested': count, 'questions': questions}
+            for (topic, count, difficulty), questions in zip(parsed, sets)
+        ], indent=2)
+
 # Initialize Controller and MCP Server
 controller = QuizToolController()
 mcp = FastMCP("CricketQuizGenerator")
 
 # Register tools using the controller instance methods
 mcp.tool(name="list_cricket_data")(controller.list_cricket_data)
+mcp.tool(name="list_cricket_archive")(controller.list_cricket_archive)
 mcp.tool(name="get_cricket_data")(controller.get_cricket_data)
 mcp.tool(name="generate_quiz_questions")(controller.generate_quiz_questions)
+mcp.tool(name="generate_quiz_from_data")(controller.generate_quiz_from_data)
+mcp.tool(name="generate_quiz_batch")(controller.generate_quiz_batch)
+mcp.tool(name="ingest_cricket_data")(controller.ingest_cricket_data)
+mcp.tool(name="generate_fact_quiz")(controller.generate_fact_quiz)
+mcp.tool(name="generate_template_quiz")(controller.generate_template_quiz)
 
 if __name__ == "__main__":
     mcp.run()
@@ -1,2 +1,11 @@
-from .gemini_service import GeminiService
-from .blob_service import BlobStorageService
+# Services are imported lazily so that light-weight modules (e.g. gemini_client)
+# can be used without pulling in every optional dependency such as azure-storage-blob.
+
+def __getattr__(name):
+    if name == "GeminiService":
+        from .gemini_service import GeminiService
+        return GeminiService
+    if name == "BlobStorageService":
+        from .blob_service import BlobStorageService
+        return BlobStorageService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
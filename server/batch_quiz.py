@@ -0,0 +1,139 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .quiz_parser import QuizStreamParser
+
+# Structured output: one flat array, each question tagged with the set it answers.
+# A flat array (rather than nested sets) keeps a truncated response salvageable question by question.
+BATCH_RESPONSE_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': {
+            'set': {'type': 'INTEGER'},
+            'question': {'type': 'STRING'},
+            'options': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+            'answer': {'type': 'STRING'}
+        },
+        'required': ['set', 'question', 'options', 'answer']
+    }
+}
+
+
+def pack_specs(specs, max_questions=40, max_sets=10):
+    """
+    Packs (spec_index, topic, count, difficulty) parts into batches of at most `max_questions`
+    questions and `max_sets` sets, in order. A spec larger than `max_questions` is split.
+    """
+    batches, current, size = [], [], 0
+    for index, topic, count, difficulty in specs:
+        while count > 0:
+            if current and (size >= max_questions or len(current) >= max_sets):
+                batches.append(current)
+                current, size = [], 0
+            take = min(count, max_questions - size)
+            current.append((index, topic, take, difficulty))
+            size += take
+            count -= take
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_prompt(batch):
+    lines = [
+        f"Set {set_id}: {count} multiple-choice questions about '{topic}'. Difficulty: {difficulty}."
+        for set_id, (_, topic, count, difficulty) in enumerate(batch)
+    ]
+    return (
+        "Generate quiz questions for each of the following numbered sets.\n"
+        + "\n".join(lines) + "\n"
+        "Return one JSON array containing the questions of every set. "
+        "Each object must have these keys: 'set' (the set number), 'question' (string), "
+        "'options' (array of 4 strings), and 'answer' (string, matching one of the options). "
+        "Do not repeat questions across sets and do not include anything outside the JSON."
+    )
+
+
+class BatchQuizGenerator:
+    """
+    Generates questions for many (topic, count, difficulty) specs with few model calls.
+
+    Specs are packed into multi-set prompts that ask for structured JSON, the calls run
+    concurrently (at most `max_concurrency` at a time), and the questions are fanned back
+    out per spec. Specs that come back short are packed again, for up to `max_rounds` rounds.
+    `generate_content(model, contents, config)` is normally GeminiClientManager.generate_content.
+    """
+
+    def __init__(self, generate_content, model, max_questions_per_call=40, max_sets_per_call=10,
+                 max_concurrency=4, max_rounds=2):
+        self.generate_content = generate_content
+        self.model = model
+        self.max_questions_per_call = max_questions_per_call
+        self.max_sets_per_call = max_sets_per_call
+        self.max_concurrency = max_concurrency
+        self.max_rounds = max_rounds
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, specs):
+        """Returns one list of validated questions per spec, in spec order."""
+        results = [[] for _ in specs]
+        seen = [set() for _ in specs]
+        pending = [(i, topic, count, difficulty) for i, (topic, count, difficulty) in enumerate(specs) if count > 0]
+
+        for _ in range(self.max_rounds):
+            if not pending:
+                break
+            batches = pack_specs(pending, self.max_questions_per_call, self.max_sets_per_call)
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as pool:
+                outcomes = list(pool.map(self._run_batch, batches))
+
+            for batch, questions in zip(batches, outcomes):
+                for set_id, (index, _, count, _) in enumerate(batch):
+                    taken = 0
+                    for question in questions.get(set_id, ()):
+                        key = question['question'].lower()
+                        if taken >= count or key in seen[index]:
+                            continue
+                        seen[index].add(key)
+                        results[index].append(question)
+                        taken += 1
+
+            pending = [
+                (i, topic, count - len(results[i]), difficulty)
+                for i, (topic, count, difficulty) in enumerate(specs)
+                if len(results[i]) < count
+            ]
+        return results
+
+    def _run_batch(self, batch):
+        """Returns {set_id: [questions]} for one model call; a failed call yields nothing."""
+        with self._lock:
+            self.calls += 1
+        try:
+            response = self.generate_content(model=self.model, contents=batch_prompt(batch), config=self._config())
+            text = response.text or ''
+        except Exception as e:
+            print(f"Batch quiz generation failed ({len(batch)} sets): {e}")
+            return {}
+
+        parser = QuizStreamParser(extra_keys=('set',))
+        parser.feed(text)
+        parser.close()
+
+        by_set = {}
+        for question in parser.questions:
+            set_id = question.pop('set', None)
+            if isinstance(set_id, int) and 0 <= set_id < len(batch):
+                by_set.setdefault(set_id, []).append(question)
+        return by_set
+
+    @staticmethod
+    def _config():
+        from google.genai import types
+
+        return types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_schema=BATCH_RESPONSE_SCHEMA
+        )
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+
+class BlobDiskCache:
+    """
+    Local copies of downloaded blobs, keyed by blob name and remembered with their ETag.
+
+    Files live in `directory` next to an index.json, so the cache survives restarts. Once the
+    files add up to more than `max_bytes`, the least recently used ones are removed. Blobs
+    larger than `max_bytes` are never cached.
+
+    Copies handed out by acquire() and put() stay pinned until release(): neither eviction nor
+    discard() removes a file while someone is reading it. New and removed entries are written
+    to the index straight away; cache hits only change recency, which is written at most every
+    `index_interval` seconds (or by flush()).
+    """
+
+    def __init__(self, directory, max_bytes=1024 ** 3, index_interval=30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_interval = index_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pins = {}
+        self._discarded = set()
+        self._index_dirty = False
+        self._index_saved = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, 'index.json')
+        self._entries = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        # Leftovers from interrupted downloads (recent ones may belong to another process)
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(('.part', '.index')) and os.path.getmtime(path) < time.time() - 3600:
+                os.remove(path)
+        # Drop entries whose file went missing
+        return {name: entry for name, entry in entries.items() if os.path.exists(self.path(name))}
+
+    def _save_index(self):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.index')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self._index_path)
+        self._index_dirty = False
+        self._index_saved = time.monotonic()
+
+    def flush(self):
+        """Writes recency changes from cache hits that are still only in memory."""
+        with self._lock:
+            if self._index_dirty:
+                self._save_index()
+
+    def path(self, blob_name):
+        """Where the copy of `blob_name` is (or would be) stored."""
+        digest = hashlib.sha256(blob_name.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + os.path.splitext(blob_name)[1])
+
+    def get(self, blob_name):
+        """The cached {'etag', 'size', 'checked', 'used'} for `blob_name`, or None."""
+        with self._lock:
+            entry = self._entries.get(blob_name)
+            return dict(entry) if entry else None
+
+    def acquire(self, blob_name, checked=False):
+        """
+        Marks a cached blob as just used (and just revalidated, if `checked`) and pins it; returns
+        its path, or None if it is no longer cached. Call release() once done reading.
+        """
+        with self._lock:
+            entry = self._entries.get(blob_name)
+            if entry is None:
+                return None
+            entry['used'] = time.time()
+            if checked:
+                entry['checked'] = entry['used']
+            self.hits += 1
+            self._pins[blob_name] = self._pins.get(blob_name, 0) + 1
+            self._index_dirty = True
+            if time.monotonic() - self._index_saved >= self.index_interval:
+                self._save_index()
+        return self.path(blob_name)
+
+    def release(self, blob_name):
+        """Unpins a copy from acquire() or put(); removals held back while it was read happen now."""
+        with self._lock:
+            self._pins[blob_name] -= 1
+            if self._pins[blob_name]:
+                return
+            del self._pins[blob_name]
+            if blob_name in self._discarded:
+                self._discarded.discard(blob_name)
+                self._remove_file(blob_name)
+            if self._evict():
+                self._save_index()
+
+    def discard(self, blob_name):
+        """Forgets a blob, e.g. after uploading a new version of it."""
+        with self._lock:
+            if self._entries.pop(blob_name, None) is not None:
+                if blob_name in self._pins:
+                    self._discarded.add(blob_name)
+                else:
+                    self._remove_file(blob_name)
+                self._save_index()
+
+    def _remove_file(self, blob_name):
+        try:
+            os.remove(self.path(blob_name))
+        except OSError:
+            pass
+
+    def temp_file(self):
+        """A temporary file in the cache directory to download into before put()."""
+        return tempfile.NamedTemporaryFile(dir=self.directory, suffix='.part', delete=False)
+
+    def put(self, blob_name, etag, tmp_path):
+        """
+        Moves a downloaded file into the cache under `etag` and returns its path, pinned as by
+        acquire(); returns None, leaving the file where it is, if it is too big to keep.
+        """
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            return None
+        path = self.path(blob_name)
+        with self._lock:
+            os.replace(tmp_path, path)
+            # The new file replaces any discarded copy still being read
+            self._discarded.discard(blob_name)
+            now = time.time()
+            self._entries[blob_name] = {'etag': etag, 'size': size, 'checked': now, 'used': now}
+            self.misses += 1
+            self._pins[blob_name] = self._pins.get(blob_name, 0) + 1
+            self._evict()
+            self._save_index()
+        return path
+
+    def _evict(self):
+        """Removes least recently used, unpinned copies until the cache fits; True if any went."""
+        total = sum(entry['size'] for entry in self._entries.values())
+        evicted = False
+        for name, entry in sorted(self._entries.items(), key=lambda item: item[1]['used']):
+            if total <= self.max_bytes:
+                break
+            if name in self._pins:
+                continue
+            self._remove_file(name)
+            del self._entries[name]
+            total -= entry['size']
+            evicted = True
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(entry['size'] for entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def create_blob_cache():
+    """Builds the cache from BLOB_CACHE_DIR and BLOB_CACHE_MAX_BYTES; None when BLOB_CACHE_MAX_BYTES is 0."""
+    max_bytes = int(os.getenv('BLOB_CACHE_MAX_BYTES', 1024 ** 3))
+    if max_bytes <= 0:
+        return None
+    directory = os.getenv('BLOB_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'quiz-blob-cache')
+    return BlobDiskCache(directory, max_bytes)
@@ -1,68 +1,330 @@
 import os
-import io
+import codecs
+import fnmatch
+import tempfile
+import threading
+import time
 import zipfile
+from contextlib import closing, contextmanager
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
 from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
+from .blob_cache import create_blob_cache
 
 load_dotenv()
 
+# Default text budget per get_blob_content call; one Cricsheet season unzips to hundreds of MB
+DEFAULT_MAX_BYTES = int(os.getenv("BLOB_CONTENT_MAX_BYTES", 1024 * 1024))
+# Default window for read_page; keeps MCP responses and Gemini prompts a predictable size
+DEFAULT_PAGE_BYTES = int(os.getenv("BLOB_PAGE_MAX_BYTES", 128 * 1024))
+CHUNK_SIZE = 64 * 1024
+
+
+def select_members(names, pattern=None, start=0, stop=None):
+    """
+    Files in `names` (archive order) matching `pattern`, then sliced to [start, stop).
+    `pattern` is a glob such as '*.json' or several separated by commas.
+    """
+    files = [name for name in names if not name.endswith('/')]
+    if pattern:
+        globs = [glob.strip() for glob in pattern.split(',') if glob.strip()]
+        files = [name for name in files if any(fnmatch.fnmatch(name, glob) for glob in globs)]
+    return files[start:stop]
+
+
+def parse_cursor(cursor):
+    """(file index, byte offset) from a read_page cursor such as '12:4096'; (0, 0) for an empty one."""
+    if not cursor:
+        return 0, 0
+    try:
+        index, offset = (int(part) for part in str(cursor).split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}', expected '<file>:<byte>'") from None
+    if index < 0 or offset < 0:
+        raise ValueError(f"Invalid cursor '{cursor}', expected '<file>:<byte>'")
+    return index, offset
+
+
+def _utf8_prefix(data, complete):
+    """
+    Decodes `data`, dropping a character cut off at the end unless the file is `complete`.
+    Returns (text, bytes used); raises UnicodeDecodeError for data that is not UTF-8.
+    """
+    try:
+        return data.decode('utf-8'), len(data)
+    except UnicodeDecodeError as e:
+        if complete or e.reason != 'unexpected end of data' or e.start < len(data) - 3:
+            raise
+        return data[:e.start].decode('utf-8'), e.start
+
+
 class BlobStorageService:
-    def __init__(self):
+    """
+    Reads the cricket data container. With a BlobDiskCache, downloads are kept on local disk and
+    revalidated with a conditional GET on the ETag. A listing, or a copy that was checked, is
+    trusted for `cache_ttl` seconds without asking Azure again.
+    """
+
+    def __init__(self, container_client=None, cache=None, cache_ttl=None):
+        self.cache = cache
+        self.cache_ttl = float(os.getenv("BLOB_CACHE_TTL", 60)) if cache_ttl is None else cache_ttl
+        self._listing = None
+        self._listing_lock = threading.Lock()
+
+        # A container client can be passed in directly (e.g. a local stand-in for tests)
+        if container_client is not None:
+            self.container_client = container_client
+            return
+
         self.connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
         self.container_name = os.getenv("AZURE_CONTAINER_NAME", "cricket-data")
-        
+
         if not self.connection_string:
             raise ValueError("AZURE_STORAGE_CONNECTION_STRING environment variable is not set.")
-            
+
         self.blob_service_client = BlobServiceClient.from_connection_string(self.connection_string)
         self.container_client = self.blob_service_client.get_container_client(self.container_name)
-        
+
         # Create container if it doesn't exist
         if not self.container_client.exists():
             self.container_client.create_container()
 
+        if cache is None:
+            self.cache = create_blob_cache()
+
+    def list_blob_etags(self):
+        """{name: etag} for the container, refetched at most every `cache_ttl` seconds."""
+        with self._listing_lock:
+            if self._listing and time.monotonic() - self._listing[0] < self.cache_ttl:
+                return self._listing[1]
+            etags = {blob.name: blob.etag for blob in self.container_client.list_blobs()}
+            self._listing = (time.monotonic(), etags)
+            return etags
+
     def list_blobs(self):
         """Lists all blobs in the container."""
         try:
-            blob_list = self.container_client.list_blobs()
-            return [blob.name for blob in blob_list]
+            return list(self.list_blob_etags())
         except Exception as e:
             return f"Error listing blobs: {str(e)}"
 
-    def get_blob_content(self, blob_name):
-        """Downloads and returns the content of a blob. Unzips if it's a .zip file."""
+    def _listed_etag(self, blob_name):
+        """The ETag from a listing that is still fresh, without fetching a new one."""
+        listing = self._listing
+        if listing and time.monotonic() - listing[0] < self.cache_ttl:
+            return listing[1].get(blob_name)
+        return None
+
+    @contextmanager
+    def spooled(self, blob_name):
+        """
+        Yields the path of a local copy of a blob. The copy comes from the disk cache if its ETag
+        is still current; otherwise the blob is downloaded in chunks. Uncached copies are removed afterwards.
+        """
+        blob_client = self.container_client.get_blob_client(blob_name)
+        entry = self.cache.get(blob_name) if self.cache else None
+        downloader = None
+        if entry and (time.time() - entry['checked'] < self.cache_ttl or self._listed_etag(blob_name) == entry['etag']):
+            path = self.cache.acquire(blob_name)
+        elif entry:
+            try:
+                downloader = blob_client.download_blob(etag=entry['etag'], match_condition=MatchConditions.IfModified)
+                path = None
+            except ResourceNotModifiedError:
+                # 304: the cached copy is current
+                path = self.cache.acquire(blob_name, checked=True)
+        else:
+            path = None
+
+        if path is not None:
+            try:
+                yield path
+            finally:
+                self.cache.release(blob_name)
+            return
+        if downloader is None:
+            # Not cached, or evicted since the lookup
+            downloader = blob_client.download_blob()
+
+        if self.cache:
+            tmp = self.cache.temp_file()
+        else:
+            tmp = tempfile.NamedTemporaryFile(prefix='blob-', suffix=os.path.splitext(blob_name)[1], delete=False)
+        path = None
         try:
-            blob_client = self.container_client.get_blob_client(blob_name)
-            download_stream = blob_client.download_blob()
-            data = download_stream.readall()
-
-            if blob_name.lower().endswith('.zip'):
-                content_accumulator = []
-                try:
-                    with zipfile.ZipFile(io.BytesIO(data)) as z:
-                        for filename in z.namelist():
-                            # Skip directories
-                            if filename.endswith('/'):
-                                continue
-                                
-                            with z.open(filename) as f:
-                                try:
-                                    # Attempt to decode as UTF-8
-                                    text = f.read().decode('utf-8')
-                                    content_accumulator.append(f"--- File: {filename} ---\n{text}\n")
-                                except UnicodeDecodeError:
-                                    content_accumulator.append(f"--- File: {filename} (Skipped: Binary or non-UTF-8) ---\n")
-                    
-                    if not content_accumulator:
-                        return "Empty zip file or no readable text files found."
-                    return "\n".join(content_accumulator)
-                except zipfile.BadZipFile:
-                    return f"Error: The file '{blob_name}' is not a valid zip file."
-
-            else:
+            with tmp:
+                downloader.readinto(tmp)
+            path = self.cache.put(blob_name, downloader.properties.etag, tmp.name) if self.cache else None
+            yield path or tmp.name
+        finally:
+            if path is not None:
+                self.cache.release(blob_name)
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+
+    def list_zip_members(self, blob_name):
+        """[{'name', 'size', 'compressed_size'}] of a zip blob, read from its directory without extracting anything."""
+        with self.spooled(blob_name) as path, zipfile.ZipFile(path) as z:
+            return [
+                {'name': info.filename, 'size': info.file_size, 'compressed_size': info.compress_size}
+                for info in z.infolist() if not info.is_dir()
+            ]
+
+    def iter_blob_content(self, blob_name, pattern=None, start=0, stop=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Yields the text of a blob piece by piece, in the same layout get_blob_content always returned.
+
+        For zips only the members chosen by select_members(pattern, start, stop) are decompressed,
+        a chunk at a time. Output stops once `max_bytes` of text has been produced (None: no
+        limit), with a closing note giving the `start` to continue from. Raises
+        zipfile.BadZipFile for a .zip blob that is not a zip archive.
+        """
+        budget = [float('inf') if max_bytes is None else max_bytes]
+
+        def take(text):
+            # Trims `text` to what is left of the budget
+            data = text.encode('utf-8')
+            if len(data) > budget[0]:
+                data = data[:int(budget[0])]
+                text = data.decode('utf-8', errors='ignore')
+            budget[0] -= len(data)
+            return text
+
+        with self.spooled(blob_name) as path:
+            if not blob_name.lower().endswith('.zip'):
                 # Assume plain text for non-zip files
-                return data.decode('utf-8')
+                with open(path, 'rb') as f:
+                    for text in _decode_chunks(f):
+                        if budget[0] <= 0:
+                            yield f"\n--- Truncated at {max_bytes} bytes ---\n"
+                            break
+                        yield take(text)
+                return
+
+            with zipfile.ZipFile(path) as z:
+                members = select_members(z.namelist(), pattern, start, stop)
+                if not members:
+                    yield "Empty zip file or no readable text files found."
+                    return
+
+                for done, filename in enumerate(members):
+                    if budget[0] <= 0:
+                        yield (f"\n--- Truncated at {max_bytes} bytes: {done} of {len(members)} files included, "
+                               f"continue with start={start + done} ---\n")
+                        return
+                    if done:
+                        yield take("\n")
+                    with z.open(filename) as f:
+                        chunks = _decode_chunks(f)
+                        try:
+                            # Attempt to decode as UTF-8
+                            text = next(chunks, '')
+                        except UnicodeDecodeError:
+                            yield take(f"--- File: {filename} (Skipped: Binary or non-UTF-8) ---\n")
+                            continue
+                        yield take(f"--- File: {filename} ---\n")
+                        try:
+                            while budget[0] > 0:
+                                yield take(text)
+                                text = next(chunks)
+                        except StopIteration:
+                            pass
+                        except UnicodeDecodeError:
+                            yield take("\n(Skipped rest: non-UTF-8)")
+                        else:
+                            # The budget ran out part-way through this file
+                            yield (f"\n--- Truncated at {max_bytes} bytes inside {filename}: {done} of "
+                                   f"{len(members)} files complete, continue with start={start + done} ---\n")
+                            return
+                        yield take("\n")
+
+    def read_page(self, blob_name, pattern=None, cursor=None, limit=None, max_bytes=DEFAULT_PAGE_BYTES):
+        """
+        One bounded window of a blob's text, for callers that page through large archives.
 
+        Reading starts at `cursor` (from a previous page; default: the first file) and takes at
+        most `limit` files (one match per file in Cricsheet archives) and about `max_bytes` of
+        text. A file larger than the window is split across pages. Zip members are filtered
+        by `pattern` as in select_members; other blobs count as a single file.
+
+        Returns {'content', 'files', 'total_files', 'cursor', 'next_cursor'}; next_cursor is
+        None once the end is reached. Raises ValueError for a bad cursor and
+        zipfile.BadZipFile for a .zip blob that is not a zip archive.
+        """
+        index, offset = parse_cursor(cursor)
+        # Leave room for at least a header and some text
+        max_bytes = max(max_bytes, 1024)
+        is_zip = blob_name.lower().endswith('.zip')
+
+        with self.spooled(blob_name) as path:
+            z = zipfile.ZipFile(path) if is_zip else None
+            try:
+                members = select_members(z.namelist(), pattern) if is_zip else [blob_name]
+                parts, files = [], []
+                budget = max_bytes
+                while index < len(members) and (limit is None or len(files) < limit):
+                    name = members[index]
+                    if not is_zip:
+                        header = ""
+                    elif offset:
+                        header = f"--- File: {name} (from byte {offset}) ---\n"
+                    else:
+                        header = f"--- File: {name} ---\n"
+                    # Header, the newline after the text and the one joining it to the previous part
+                    overhead = len(header.encode('utf-8')) + (2 if parts else 1) * is_zip
+                    if files and overhead + 256 > budget:
+                        break
+
+                    with (z.open(name) if is_zip else open(path, 'rb')) as f:
+                        f.seek(offset)
+                        data = f.read(budget - overhead)
+                        complete = not f.read(1)
+                    try:
+                        text, used = _utf8_prefix(data, complete)
+                    except UnicodeDecodeError:
+                        skipped = f"--- File: {name} (Skipped: Binary or non-UTF-8) ---\n"
+                        parts.append(skipped)
+                        files.append(name)
+                        budget -= len(skipped.encode('utf-8')) + bool(parts[1:])
+                        index, offset = index + 1, 0
+                        continue
+
+                    parts.append(header + text + ("\n" if is_zip else ""))
+                    files.append(name)
+                    budget -= overhead + used
+                    if not complete:
+                        # The window ends inside this file
+                        offset += used
+                        break
+                    index, offset = index + 1, 0
+            finally:
+                if z:
+                    z.close()
+
+        if is_zip and not members:
+            parts = ["Empty zip file or no readable text files found."]
+        return {
+            'content': "\n".join(parts),
+            'files': files,
+            'total_files': len(members),
+            'cursor': cursor or "0:0",
+            'next_cursor': f"{index}:{offset}" if index < len(members) else None
+        }
+
+    def get_blob_content(self, blob_name, pattern=None, start=0, stop=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Returns the text of a blob. Zip archives are unzipped, and only the members matching
+        `pattern` and the [start, stop) slice are included, up to `max_bytes` of text (see
+        iter_blob_content). Errors are returned as text.
+        """
+        try:
+            with closing(self.iter_blob_content(blob_name, pattern, start, stop, max_bytes)) as pieces:
+                return "".join(pieces)
+        except zipfile.BadZipFile:
+            return f"Error: The file '{blob_name}' is not a valid zip file."
+        except UnicodeDecodeError:
+            return f"Error reading blob '{blob_name}': not UTF-8 text"
         except Exception as e:
             return f"Error reading blob '{blob_name}': {str(e)}"
 
@@ -71,6 +333,21 @@ class BlobStorageService:
         try:
             blob_client = self.container_client.get_blob_client(blob_name)
             blob_client.upload_blob(data, overwrite=True)
+            if self.cache:
+                self.cache.discard(blob_name)
+            self._listing = None
             return f"Successfully uploaded {blob_name}"
         except Exception as e:
             return f"Error uploading blob '{blob_name}': {str(e)}"
+
+
+def _decode_chunks(f):
+    """Yields the UTF-8 text of binary file `f`, CHUNK_SIZE bytes at a time."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            yield text
+        if not chunk:
+            return
@@ -0,0 +1,211 @@
+import os
+import time
+import asyncio
+import random
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# HTTP status codes worth retrying: timeouts, rate limits and transient server errors
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiClientManager:
+    """
+    Process-wide owner of the genai.Client.
+    Reusing one client keeps its HTTP connection pool (and TLS sessions) alive between calls,
+    while the semaphore caps how many requests this process has in flight to the API.
+    """
+
+    def __init__(self, api_key=None, base_url=None, max_in_flight=8, timeout=60.0,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._client = None
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._async_semaphore = None
+
+    @property
+    def is_configured(self):
+        return bool(self.api_key)
+
+    @property
+    def client(self):
+        """The shared genai.Client, created on first use."""
+        if not self.is_configured:
+            return None
+
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google import genai
+                    from google.genai import types
+
+                    http_options = types.HttpOptions(
+                        timeout=int(self.timeout * 1000),
+                        base_url=self.base_url
+                    )
+                    self._client = genai.Client(api_key=self.api_key, http_options=http_options)
+        return self._client
+
+    def generate_content(self, model, contents, config=None):
+        """Calls models.generate_content under the concurrency limit, retrying transient failures."""
+        return self._call(lambda: self.client.models.generate_content(
+            model=model,
+            contents=contents,
+            config=config
+        ))
+
+    def generate_content_stream(self, model, contents, config=None):
+        """
+        Yields chunks from models.generate_content_stream while holding an in-flight slot.
+        Failures before the first chunk are retried; once text has been yielded they are raised.
+        Closing the generator (e.g. the client went away) closes the stream and frees the slot.
+        """
+        attempt = 0
+        while True:
+            if not self._semaphore.acquire(timeout=self.timeout):
+                raise TimeoutError(f"Timed out waiting for a free Gemini slot ({self.max_in_flight} in flight)")
+            stream = None
+            started = False
+            try:
+                stream = self.client.models.generate_content_stream(model=model, contents=contents, config=config)
+                for chunk in stream:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+            finally:
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+                self._semaphore.release()
+
+            time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    def _call(self, fn):
+        attempt = 0
+        while True:
+            if not self._semaphore.acquire(timeout=self.timeout):
+                raise TimeoutError(f"Timed out waiting for a free Gemini slot ({self.max_in_flight} in flight)")
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+            finally:
+                self._semaphore.release()
+
+            time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    async def generate_content_async(self, model, contents, config=None):
+        """Async generate_content on client.aio, with the same limit/retry policy as the sync call."""
+        attempt = 0
+        while True:
+            async with self._async_slot():
+                try:
+                    return await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+                except Exception as e:
+                    if attempt >= self.max_retries or not self.is_retryable(e):
+                        raise
+            await asyncio.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    async def generate_content_stream_async(self, model, contents, config=None):
+        """Async counterpart of generate_content_stream (retries only before the first chunk)."""
+        attempt = 0
+        while True:
+            started = False
+            async with self._async_slot():
+                try:
+                    stream = await self.client.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+                    async for chunk in stream:
+                        started = True
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started or attempt >= self.max_retries or not self.is_retryable(e):
+                        raise
+            await asyncio.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    def _async_slot(self):
+        # Event-loop callers get their own in-flight budget; threads keep using self._semaphore
+        if self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(self.max_in_flight)
+        return _AsyncSlot(self._async_semaphore, self.timeout, self.max_in_flight)
+
+    def backoff_delay(self, attempt):
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def is_retryable(error):
+        code = getattr(error, 'code', None) or getattr(error, 'status_code', None)
+        if code in RETRYABLE_STATUS_CODES:
+            return True
+
+        try:
+            import httpx
+        except ImportError:
+            return isinstance(error, (TimeoutError, ConnectionError))
+        return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+class _AsyncSlot:
+    def __init__(self, semaphore, timeout, max_in_flight):
+        self.semaphore = semaphore
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+
+    async def __aenter__(self):
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Timed out waiting for a free Gemini slot ({self.max_in_flight} in flight)")
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_client_manager():
+    """
+    Returns the process-wide GeminiClientManager, configured from the environment:
+    GEMINI_API_KEY, GEMINI_BASE_URL (e.g. a local fake server), GEMINI_MAX_IN_FLIGHT,
+    GEMINI_TIMEOUT (seconds) and GEMINI_MAX_RETRIES.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = GeminiClientManager(
+                    api_key=os.getenv("GEMINI_API_KEY"),
+                    base_url=os.getenv("GEMINI_BASE_URL"),
+                    max_in_flight=int(os.getenv("GEMINI_MAX_IN_FLIGHT", 8)),
+                    timeout=float(os.getenv("GEMINI_TIMEOUT", 60)),
+                    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", 3))
+                )
+    return _manager
+
+
+def reset_client_manager():
+    """Drops the shared manager so the next call re-reads the environment."""
+    global _manager
+    with _manager_lock:
+        _manager = None
@@ -1,21 +1,19 @@
-import os
-from google import genai
-from dotenv import load_dotenv
-
-load_dotenv()
+from .gemini_client import get_client_manager
 
 class GeminiService:
     def __init__(self, model_name="gemini-2.5-flash"):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        # The underlying client is shared process-wide (see gemini_client.py)
+        self.manager = get_client_manager()
+        if not self.manager.is_configured:
             raise ValueError("GEMINI_API_KEY environment variable is not set.")
         
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = self.manager.client
         self.model_name = model_name
 
-    def generate_quiz(self, prompt: str, data: str = None, offset: int = None) -> str:
+    def generate_quiz(self, prompt: str, data: str = None, offset: int | str = None) -> str:
         """
-        Generates quiz questions. If data is provided, uses it as context.
+        Generates quiz questions. If data is provided, uses it as context;
+        offset says where that window starts in its source (e.g. a read_page cursor).
         Otherwise, relies on the model's internal knowledge.
         """
         if data:
@@ -31,7 +29,7 @@ Data Context (Offset: {offset}):
             full_prompt = prompt
 
         try:
-            response = self.client.models.generate_content(
+            response = self.manager.generate_content(
                 model=self.model_name,
                 contents=full_prompt
             )
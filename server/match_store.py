@@ -0,0 +1,378 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import zipfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .template_quiz import Template, TemplateQuizGenerator, build_pools
+
+DEFAULT_PATH = os.getenv(
+    "MATCH_STORE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cricsheet.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    name TEXT PRIMARY KEY, etag TEXT NOT NULL, matches INTEGER NOT NULL, ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    id TEXT PRIMARY KEY, blob TEXT NOT NULL, date TEXT, season TEXT, match_type TEXT, event TEXT,
+    venue TEXT, city TEXT, team1 TEXT, team2 TEXT, toss_winner TEXT, toss_decision TEXT,
+    winner TEXT, win_by_runs INTEGER, win_by_wickets INTEGER, result TEXT, player_of_match TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_matches_blob ON matches (blob);
+CREATE INDEX IF NOT EXISTS ix_matches_event ON matches (event, season);
+CREATE INDEX IF NOT EXISTS ix_matches_venue ON matches (venue);
+CREATE INDEX IF NOT EXISTS ix_matches_team1 ON matches (team1);
+CREATE INDEX IF NOT EXISTS ix_matches_team2 ON matches (team2);
+CREATE TABLE IF NOT EXISTS innings (
+    match_id TEXT NOT NULL, number INTEGER NOT NULL, team TEXT, runs INTEGER, wickets INTEGER, balls INTEGER,
+    PRIMARY KEY (match_id, number)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS player_matches (
+    match_id TEXT NOT NULL, player TEXT NOT NULL, team TEXT, runs INTEGER, balls INTEGER, fours INTEGER,
+    sixes INTEGER, wickets INTEGER, runs_conceded INTEGER,
+    PRIMARY KEY (match_id, player)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_player_matches_player ON player_matches (player);
+CREATE VIEW IF NOT EXISTS teams AS
+    SELECT team, COUNT(*) AS matches, SUM(team = winner) AS wins
+    FROM (SELECT team1 AS team, winner FROM matches UNION ALL SELECT team2, winner FROM matches)
+    GROUP BY team;
+CREATE VIEW IF NOT EXISTS venues AS
+    SELECT venue, city, COUNT(*) AS matches FROM matches GROUP BY venue;
+CREATE VIEW IF NOT EXISTS player_totals AS
+    SELECT player, COUNT(*) AS matches, SUM(runs) AS runs, MAX(runs) AS best_score, SUM(wickets) AS wickets
+    FROM player_matches GROUP BY player;
+"""
+
+# Dismissals that are not credited to the bowler
+NOT_BOWLER_WICKETS = {'run out', 'retired hurt', 'retired out', 'obstructing the field'}
+
+
+def parse_match(match_id, raw):
+    """
+    Flattens one Cricsheet match JSON document into rows for the store:
+    {'match': tuple, 'innings': [tuple], 'players': [tuple]}, or None if `raw` is not a match.
+    Module-level so the ingestion pool can run it.
+    """
+    try:
+        doc = json.loads(raw)
+        info = doc['info']
+    except (ValueError, TypeError, KeyError):
+        return None
+
+    teams = (info.get('teams') or []) + [None, None]
+    outcome = info.get('outcome') or {}
+    by = outcome.get('by') or {}
+    toss = info.get('toss') or {}
+    event = info.get('event')
+    match = (
+        match_id, None, (info.get('dates') or [None])[0], str(info.get('season') or '') or None,
+        info.get('match_type'), event.get('name') if isinstance(event, dict) else event,
+        info.get('venue'), info.get('city'), teams[0], teams[1], toss.get('winner'), toss.get('decision'),
+        outcome.get('winner'), by.get('runs'), by.get('wickets'),
+        outcome.get('result') or ('win' if outcome.get('winner') else None),
+        (info.get('player_of_match') or [None])[0]
+    )
+
+    team_of = {player: team for team, players in (info.get('players') or {}).items() for player in players}
+    stats = {}
+
+    def player(name):
+        if name not in stats:
+            stats[name] = {'runs': 0, 'balls': 0, 'fours': 0, 'sixes': 0, 'wickets': 0, 'conceded': 0}
+        return stats[name]
+
+    innings = []
+    for number, inning in enumerate(doc.get('innings') or [], start=1):
+        runs = wickets = balls = 0
+        for over in inning.get('overs') or []:
+            for delivery in over.get('deliveries') or []:
+                scored = delivery.get('runs') or {}
+                extras = delivery.get('extras') or {}
+                batter, bowler = player(delivery['batter']), player(delivery['bowler'])
+                runs += scored.get('total', 0)
+                if 'wides' not in extras and 'noballs' not in extras:
+                    balls += 1
+                if 'wides' not in extras:
+                    batter['balls'] += 1
+                batter['runs'] += scored.get('batter', 0)
+                batter['fours'] += scored.get('batter', 0) == 4 and not scored.get('non_boundary')
+                batter['sixes'] += scored.get('batter', 0) == 6
+                bowler['conceded'] += scored.get('total', 0) - extras.get('byes', 0) - extras.get('legbyes', 0)
+                for wicket in delivery.get('wickets') or []:
+                    if wicket.get('kind') != 'retired hurt':
+                        wickets += 1
+                    if wicket.get('kind') not in NOT_BOWLER_WICKETS:
+                        bowler['wickets'] += 1
+        innings.append((match_id, number, inning.get('team'), runs, wickets, balls))
+
+    players = [
+        (match_id, name, team_of.get(name), s['runs'], s['balls'], s['fours'], s['sixes'], s['wickets'], s['conceded'])
+        for name, s in stats.items()
+    ]
+    return {'match': match, 'innings': innings, 'players': players}
+
+
+def _parse_entry(entry):
+    return parse_match(*entry)
+
+
+def _match_files(blob_name, path, known):
+    """(match id, raw JSON) for each match file in a downloaded blob whose id is not in `known`."""
+    if blob_name.lower().endswith('.json'):
+        match_id = os.path.splitext(os.path.basename(blob_name))[0]
+        if match_id not in known:
+            with open(path, 'rb') as f:
+                yield match_id, f.read()
+        return
+    with zipfile.ZipFile(path) as z:
+        for name in z.namelist():
+            match_id = os.path.splitext(os.path.basename(name))[0]
+            if name.lower().endswith('.json') and match_id not in known:
+                yield match_id, z.read(name)
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class MatchStore:
+    """
+    Cricsheet matches flattened into SQLite: one row per match, innings totals and per-match
+    player figures, with `teams`, `venues` and `player_totals` views over them.
+    Safe to share between threads; writes are serialized.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+        # Distractor pools for fact_questions, rebuilt after the next add()
+        self._pools = None
+
+    @property
+    def exists(self):
+        """False until the database file has been created, e.g. by ingest()."""
+        return self._conn is not None or self.path == ':memory:' or os.path.exists(self.path)
+
+    @property
+    def conn(self):
+        # Opened on first use, so importing the MCP server doesn't create the database file
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                if self.path != ':memory:':
+                    conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(SCHEMA)
+                self._conn = conn
+            return self._conn
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def ingested(self):
+        """{blob name: etag} of the blobs already ingested."""
+        return {row['name']: row['etag'] for row in self.query('SELECT name, etag FROM blobs')}
+
+    def match_ids(self, blob_name=None):
+        """Ids of the stored matches, or of those first stored from `blob_name`."""
+        if blob_name is None:
+            return {row['id'] for row in self.query('SELECT id FROM matches')}
+        return {row['id'] for row in self.query('SELECT id FROM matches WHERE blob = ?', (blob_name,))}
+
+    def add(self, blob_name, parsed):
+        """
+        Inserts parsed matches (see parse_match) from `blob_name` in one transaction. A match
+        that is already stored keeps its rows, including the blob it first came from.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(p['match'][0], blob_name) + p['match'][2:] for p in parsed]
+            )
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO innings VALUES (?, ?, ?, ?, ?, ?)',
+                [row for p in parsed for row in p['innings']]
+            )
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO player_matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [row for p in parsed for row in p['players']]
+            )
+            self._pools = None
+
+    def mark_ingested(self, blob_name, etag):
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO blobs VALUES (?, ?, (SELECT COUNT(*) FROM matches WHERE blob = ?), ?)',
+                (blob_name, etag, blob_name, time.time())
+            )
+
+    def stats(self):
+        row = self.query(
+            'SELECT (SELECT COUNT(*) FROM blobs) AS blobs, (SELECT COUNT(*) FROM matches) AS matches, '
+            '(SELECT COUNT(*) FROM player_matches) AS player_matches'
+        )[0]
+        return dict(row)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # Fact questions
+
+    def fact_questions(self, count=10, event=None, team=None, season=None, seed=None):
+        """
+        Multiple-choice questions built from stored facts by FACT_TEMPLATES, as {'question',
+        'options', 'answer', 'kind', 'match_id'}. Distractors come from the same match or
+        competition where possible. Matches can be narrowed by `event` (substring), `team`
+        and `season`; `seed` makes the selection repeatable.
+        """
+        rng = random.Random(seed)
+        where, params = ['1 = 1'], []
+        if event:
+            where.append('event LIKE ?')
+            params.append(f'%{event}%')
+        if team:
+            where.append('(team1 = ? OR team2 = ?)')
+            params += [team, team]
+        if season:
+            where.append('season = ?')
+            params.append(str(season))
+        ids = [row['id'] for row in self.query(f"SELECT id FROM matches WHERE {' AND '.join(where)}", params)]
+        # A few records per question leaves room for ones that can't fill a template
+        ids = rng.sample(ids, min(len(ids), count * 3))
+        if not ids:
+            return []
+
+        marks = ', '.join('?' * len(ids))
+        players = {}
+        for row in self.query(f'SELECT * FROM player_matches WHERE match_id IN ({marks})', ids):
+            players.setdefault(row['match_id'], []).append(row)
+        records = [match_record(dict(row), players.get(row['id'], [])) for row in
+                   self.query(f'SELECT * FROM matches WHERE id IN ({marks}) ORDER BY id', ids)]
+        generator = TemplateQuizGenerator(records, FACT_TEMPLATES, seed=rng.random(), pools=self._fact_pools())
+        return generator.generate(count, keep=('match_id',))
+
+    def _fact_pools(self):
+        """Distractor pools over every stored match, built on first use and after each add()."""
+        with self._lock:
+            if self._pools is None:
+                self._pools = build_pools(FACT_TEMPLATES, [dict(row) for row in self.query(
+                    'SELECT event, team1 AS team, venue, player_of_match FROM matches '
+                    'UNION SELECT event, team2, venue, player_of_match FROM matches'
+                )])
+            return self._pools
+
+
+def match_record(match, players):
+    """A matches row plus the derived fields FACT_TEMPLATES use, given its player_matches rows."""
+    match['match_id'] = match['id']
+    match['in_event'] = f" in the {match['event']}" if match['event'] else ""
+    if match['winner']:
+        match['loser'] = match['team2'] if match['winner'] == match['team1'] else match['team1']
+    # The match's other stand-out performers make the hardest distractors for player of the match
+    ranked = sorted(players, key=lambda p: p['runs'] + 20 * p['wickets'], reverse=True)
+    match['standouts'] = [p['player'] for p in ranked if p['player'] != match['player_of_match']][:3]
+
+    for team, opponent in ((match['team1'], match['team2']), (match['team2'], match['team1'])):
+        batters = sorted((p for p in players if p['team'] == team), key=lambda p: p['runs'], reverse=True)
+        # Skip a tie for top score: the question would have two right answers
+        if len(batters) >= 4 and batters[0]['runs'] > batters[1]['runs']:
+            match.update(
+                top_team=team, top_opponent=opponent, top_scorer=batters[0]['player'],
+                top_runs=batters[0]['runs'], other_batters=[p['player'] for p in batters[1:4]]
+            )
+            break
+    return match
+
+
+FACT_TEMPLATES = [
+    Template('winner', 'Who won {team1} v {team2}{in_event} on {date}?', 'winner', pool='team', group='event',
+             related=lambda match: [match['loser']]),
+    Template('margin', 'By how many wickets did {winner} beat {loser} at {venue} on {date}?', 'win_by_wickets',
+             near=4, minimum=1, maximum=10, unit='wickets'),
+    Template('margin', 'By how many runs did {winner} beat {loser} at {venue} on {date}?', 'win_by_runs',
+             near=25, minimum=1, unit='runs'),
+    Template('venue', 'Where was {team1} v {team2}{in_event} on {date} played?', 'venue', group='event'),
+    Template('player_of_match', 'Who was player of the match in {team1} v {team2}{in_event} on {date}?',
+             'player_of_match', group='event', related=lambda match: match['standouts']),
+    Template('top_scorer', 'Who top-scored for {top_team} against {top_opponent} on {date}, with {top_runs} runs?',
+             'top_scorer', related=lambda match: match['other_batters']),
+]
+
+
+def ingest(blob_service, store, workers=None, batch_size=256, log=print):
+    """
+    Loads Cricsheet match JSON (.zip archives or single .json blobs) from the container into
+    `store`. Blobs whose ETag was already ingested are skipped, and so are matches already
+    stored from any blob (Cricsheet's archives overlap), so re-runs only parse what is new. Files are parsed across
+    `workers` processes (default: CPU count; 0 parses inline), `batch_size` at a time.
+    Returns {'blobs': changed blobs, 'matches': newly stored matches}.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    ingested = store.ingested()
+    pending = {
+        name: etag for name, etag in sorted(blob_service.list_blob_etags().items())
+        if name.lower().endswith(('.zip', '.json')) and ingested.get(name) != etag
+    }
+    totals = {'blobs': len(pending), 'matches': 0}
+    if not pending:
+        return totals
+
+    executor = None
+    if workers:
+        import multiprocessing
+
+        # spawn: the MCP server process runs threads
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    known = store.match_ids()
+    try:
+        for name, etag in pending.items():
+            added = 0
+            with blob_service.spooled(name) as path:
+                for batch in _batches(_match_files(name, path, known), batch_size):
+                    if executor:
+                        parsed = executor.map(_parse_entry, batch, chunksize=max(1, len(batch) // (workers * 4)))
+                    else:
+                        parsed = map(_parse_entry, batch)
+                    parsed = [p for p in parsed if p]
+                    store.add(name, parsed)
+                    known.update(p['match'][0] for p in parsed)
+                    added += len(parsed)
+            store.mark_ingested(name, etag)
+            totals['matches'] += added
+            log(f"{name}: {added} new matches")
+    finally:
+        if executor:
+            executor.shutdown()
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+    from .blob_service import BlobStorageService
+
+    parser = argparse.ArgumentParser(description="Ingest Cricsheet matches from blob storage into the match store")
+    parser.add_argument('--db', default=DEFAULT_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    match_store = MatchStore(args.db)
+    result = ingest(BlobStorageService(), match_store, workers=args.workers)
+    print(f"{result['matches']} matches from {result['blobs']} blobs in {time.perf_counter() - started:.1f}s; "
+          f"store: {match_store.stats()}")
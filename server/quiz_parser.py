@@ -0,0 +1,159 @@
+import ast
+import json
+
+OPTION_COUNT = 4
+OPTION_LETTERS = 'ABCD'
+ANSWER_KEYS = ('answer', 'correct_answer', 'correctAnswer')
+
+
+class InvalidQuestion(ValueError):
+    """Raised by validate_question when an object is not a usable quiz question."""
+    pass
+
+
+def validate_question(obj):
+    """
+    Returns a clean {'question', 'options', 'answer'} dict for a parsed object, or raises
+    InvalidQuestion. Needs exactly four distinct options, and an answer that is one of them
+    (matched exactly, case-insensitively, or given as the option letter A-D).
+    """
+    if not isinstance(obj, dict):
+        raise InvalidQuestion('not an object')
+
+    question = obj.get('question')
+    if not isinstance(question, str) or not question.strip():
+        raise InvalidQuestion('missing question text')
+
+    options = obj.get('options')
+    if not isinstance(options, list) or len(options) != OPTION_COUNT:
+        raise InvalidQuestion(f'expected {OPTION_COUNT} options')
+    options = [str(option).strip() for option in options]
+    if not all(options) or len({option.lower() for option in options}) != OPTION_COUNT:
+        raise InvalidQuestion('options must be distinct and non-empty')
+
+    answer = next((obj[key] for key in ANSWER_KEYS if obj.get(key) is not None), None)
+    answer = str(answer).strip() if answer is not None else ''
+    if answer not in options:
+        lowered = [option.lower() for option in options]
+        letter = answer.rstrip(').:').upper()
+        if answer.lower() in lowered:
+            answer = options[lowered.index(answer.lower())]
+        elif len(letter) == 1 and letter in OPTION_LETTERS:
+            answer = options[OPTION_LETTERS.index(letter)]
+        else:
+            raise InvalidQuestion('answer is not one of the options')
+
+    return {'question': question.strip(), 'options': options, 'answer': answer}
+
+
+def _load_object(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # Models sometimes copy the prompt's single-quoted example, which is a Python literal
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+class QuizStreamParser:
+    """
+    Incrementally pulls quiz question objects out of model output.
+
+    feed() accepts text in arbitrary pieces (e.g. stream chunks) and returns the questions
+    completed by that piece. Only brace/quote structure is tracked, so code fences, prose,
+    a truncated tail or a missing closing bracket cost nothing but the broken object itself.
+    Objects that parse but fail validation are counted in `rejected` with the reason.
+    Keys named in `extra_keys` (e.g. a batch set id) are copied onto accepted questions.
+    """
+
+    def __init__(self, limit=None, extra_keys=()):
+        self.limit = limit
+        self.extra_keys = extra_keys
+        self.questions = []
+        self.rejected = []
+        self._buffer = ''
+        self._pos = 0
+        self._starts = []
+        self._quote = None
+        self._escaped = False
+        self._seen = set()
+
+    @property
+    def full(self):
+        return self.limit is not None and len(self.questions) >= self.limit
+
+    def feed(self, text):
+        self._buffer += text
+        found = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._quote:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == self._quote:
+                    self._quote = None
+            elif ch in '"\'':
+                # Quotes only open strings inside an object; outside, an apostrophe is just prose
+                if self._starts:
+                    self._quote = ch
+            elif ch == '{':
+                self._starts.append(i)
+            elif ch == '}' and self._starts:
+                start = self._starts.pop()
+                question = self._accept(buffer[start:i + 1])
+                if question is not None:
+                    found.append(question)
+
+        self._pos = len(buffer)
+        if not self._starts:
+            # Nothing open: earlier text can never be part of an object again
+            self._buffer, self._pos = '', 0
+        return found
+
+    def close(self):
+        """Ends the current response, dropping any unfinished object so the next feed starts clean."""
+        if self._starts:
+            self.rejected.append('truncated object')
+        self._buffer, self._pos = '', 0
+        self._starts = []
+        self._quote = None
+        self._escaped = False
+
+    def _accept(self, text):
+        obj = _load_object(text)
+        # Wrappers such as {"questions": [...]} close after their contents were already taken
+        if not isinstance(obj, dict) or 'question' not in obj:
+            return None
+        if self.full:
+            return None
+        try:
+            question = validate_question(obj)
+        except InvalidQuestion as e:
+            self.rejected.append(str(e))
+            return None
+
+        key = question['question'].lower()
+        if key in self._seen:
+            self.rejected.append('duplicate question')
+            return None
+        self._seen.add(key)
+        question.update((extra, obj[extra]) for extra in self.extra_keys if extra in obj)
+        self.questions.append(question)
+        return question
+
+
+def parse_quiz(text, limit=None):
+    """
+    Parses a complete (possibly dirty or truncated) model response.
+    Returns (questions, rejected_reasons); questions keep their order in the response.
+    """
+    parser = QuizStreamParser(limit=limit)
+    parser.feed(text or '')
+    parser.close()
+    return parser.questions, parser.rejected
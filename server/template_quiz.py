@@ -0,0 +1,188 @@
+import re
+import random
+import string
+
+from .quiz_parser import OPTION_COUNT
+
+# "Python is a high-level, interpreted programming language." -> ('Python', 'a high-level, ...')
+DEFINITION = re.compile(
+    r"(?:^|(?<=[.!?]\s))(?P<term>[A-Z][\w+#\- ]{0,40}?) (?:is|are) (?P<definition>[^.!?\n]{8,200})[.!?]",
+    re.MULTILINE
+)
+# "A list is ..." defines "List": the article is not part of the term
+ARTICLE = re.compile(r"^(?:a|an|the)\s+", re.IGNORECASE)
+# Sentence openers that look like a term but are not one
+NOT_TERMS = {'it', 'this', 'that', 'there', 'here', 'these', 'those', 'what', 'which', 'he', 'she', 'they', 'we',
+             'you', 'i', 'the answer', 'the result'}
+
+
+class Template:
+    """
+    One kind of question. `question` is a format string over a record's fields and `answer`
+    names the field holding the right option.
+
+    Wrong options are taken, in order, from `related(record)` (e.g. the losing team), from
+    values of the `pool` field (default: the answer field) in records with the same `group`
+    value, and then from all records. With `near` set the answer is a number and the wrong
+    options are other numbers at most `near` away, between `minimum` and `maximum`,
+    followed by `unit`.
+    """
+
+    def __init__(self, name, question, answer, pool=None, group=None, related=None,
+                 near=None, minimum=0, maximum=None, unit=''):
+        self.name = name
+        self.question = question
+        self.answer = answer
+        self.pool = pool or answer
+        self.group = group
+        self.related = related
+        self.near = near
+        self.minimum = minimum
+        self.maximum = maximum
+        self.unit = unit
+        self.fields = [field for _, field, _, _ in string.Formatter().parse(question) if field]
+
+    def fits(self, record):
+        """True when `record` has an answer and every field the question needs (empty strings are fine there)."""
+        return record.get(self.answer) not in (None, '') and all(record.get(field) is not None for field in self.fields)
+
+    def _number(self, value):
+        return f"{value} {self.unit}".strip()
+
+    def build(self, record, generator, rng):
+        """A {'question', 'options', 'answer', 'kind'} dict for a record that fits(), or None without enough wrong options."""
+        answer = record[self.answer]
+        if self.near:
+            low = max(self.minimum, answer - self.near)
+            high = answer + self.near if self.maximum is None else min(self.maximum, answer + self.near)
+            numbers = [value for value in range(low, high + 1) if value != answer]
+            if len(numbers) < OPTION_COUNT - 1:
+                return None
+            answer = self._number(answer)
+            wrong = [self._number(value) for value in rng.sample(numbers, OPTION_COUNT - 1)]
+        else:
+            answer = str(answer)
+            candidates = list(self.related(record)) if self.related else []
+            if self.group:
+                candidates += generator.sample_pool(self.pool, self.group, record.get(self.group), rng)
+            candidates += generator.sample_pool(self.pool, None, None, rng)
+            wrong, seen = [], {answer.lower()}
+            for candidate in candidates:
+                if candidate and str(candidate).lower() not in seen:
+                    seen.add(str(candidate).lower())
+                    wrong.append(str(candidate))
+                    if len(wrong) == OPTION_COUNT - 1:
+                        break
+            else:
+                return None
+
+        options = [answer] + wrong
+        rng.shuffle(options)
+        return {
+            'question': self.question.format(**record),
+            'options': options,
+            'answer': answer,
+            'kind': self.name
+        }
+
+
+def build_pools(templates, records):
+    """
+    Distractor pools for `templates` from `records`, as {(pool field, group field or None):
+    {group value: [distinct values]}}. Read-only once built, so they can be shared.
+    """
+    pools = {}
+    for template in templates:
+        if template.near:
+            continue
+        for group in {template.group, None}:
+            pool = pools.setdefault((template.pool, group), {})
+            for record in records:
+                value = record.get(template.pool)
+                if value not in (None, ''):
+                    pool.setdefault(record.get(group) if group else None, {})[value] = None
+    # Dicts kept insertion order for determinism; sampling wants lists
+    return {key: {g: list(values) for g, values in groups.items()} for key, groups in pools.items()}
+
+
+class TemplateQuizGenerator:
+    """
+    Multiple-choice questions filled in from structured records (dicts) by Templates, with no
+    model call. The same records, templates and `seed` always give the same questions.
+
+    Distractor pools are built once from `pool_records` (default: `records`), so records can
+    be a small sample while wrong options still come from the whole data set. Callers that
+    generate repeatedly from the same data can pass `pools` from build_pools() instead.
+    """
+
+    # Pool values drawn per lookup; enough to find three distinct wrong options
+    SAMPLE = 8
+
+    def __init__(self, records, templates, pool_records=None, seed=None, pools=None):
+        self.records = list(records)
+        self.templates = list(templates)
+        self.rng = random.Random(seed)
+        if pools is None:
+            pools = build_pools(self.templates, self.records if pool_records is None else pool_records)
+        self.pools = pools
+        # Each template with the records that can fill it
+        self.usable = [(template, [r for r in self.records if template.fits(r)]) for template in self.templates]
+        self.usable = [(template, records) for template, records in self.usable if records]
+
+    def sample_pool(self, field, group, value, rng):
+        values = self.pools.get((field, group), {}).get(value, [])
+        return rng.sample(values, min(self.SAMPLE, len(values)))
+
+    def generate(self, count, keep=()):
+        """
+        Up to `count` distinct questions; fewer when the records can't support that many.
+        Fields named in `keep` (e.g. a record id) are copied from the record onto its question.
+        """
+        questions, seen = [], set()
+        if not self.usable:
+            return questions
+        # Bounded, so thin data ends the loop instead of spinning on duplicates
+        for _ in range(count * 10):
+            if len(questions) >= count:
+                break
+            template, records = self.rng.choice(self.usable)
+            record = self.rng.choice(records)
+            question = template.build(record, self, self.rng)
+            if question and question['question'] not in seen:
+                seen.add(question['question'])
+                question.update((field, record.get(field)) for field in keep)
+                questions.append(question)
+        return questions
+
+
+def definition_facts(text):
+    """[{'term', 'definition'}] for sentences of the form '<Term> is/are <definition>.' in lesson text."""
+    facts = []
+    for match in DEFINITION.finditer(text or ''):
+        term = match.group('term').strip()
+        if not term or term.lower() in NOT_TERMS:
+            continue
+        term = ARTICLE.sub('', term)
+        term = term[:1].upper() + term[1:]
+        if term and len(term.split()) <= 4 and term.lower() not in NOT_TERMS:
+            facts.append({'term': term, 'definition': match.group('definition').strip()})
+    return facts
+
+
+COURSE_TEMPLATES = [
+    Template('definition', 'Which term is described as "{definition}"?', 'term', group='course'),
+    Template('describe', 'Which of these best describes {term}?', 'definition', group='course'),
+    Template('lesson_course', 'Which course includes the lesson "{lesson}"?', 'course'),
+]
+
+
+def course_records(lessons):
+    """
+    Records for COURSE_TEMPLATES from (course title, lesson title, lesson content) tuples:
+    one per lesson plus one per definition found in its content.
+    """
+    records = []
+    for course, lesson, content in lessons:
+        records.append({'course': course, 'lesson': lesson})
+        records += [dict(fact, course=course, lesson=lesson) for fact in definition_facts(content)]
+    return records
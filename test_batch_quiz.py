@@ -0,0 +1,22 @@
+from fake_gemini_server import start_fake_server
+from server.gemini_client import GeminiClientManager
+from server.batch_quiz import BatchQuizGenerator, pack_specs
+
+
+def test_pack_specs_splits_and_bounds_batches():
+    batches = pack_specs([(0, 'A', 5, 'Easy'), (1, 'B', 30, 'Hard'), (2, 'C', 3, 'Medium')], max_questions=20)
+    assert [[(index, count) for index, _, count, _ in batch] for batch in batches] == [[(0, 5), (1, 15)], [(1, 15), (2, 3)]]
+    assert len(pack_specs([(i, 'T', 1, 'Easy') for i in range(25)], max_sets=10)) == 3
+
+
+def test_generate_fans_out_per_spec():
+    server = start_fake_server()
+    try:
+        manager = GeminiClientManager(api_key="fake-key", base_url=server.url, timeout=10)
+        generator = BatchQuizGenerator(manager.generate_content, "gemini-2.5-flash", max_questions_per_call=20)
+        sets = generator.generate([('A', 5, 'Easy'), ('B', 30, 'Hard'), ('C', 3, 'Medium')])
+        assert [len(questions) for questions in sets] == [5, 30, 3]
+        assert all('set' not in question for questions in sets for question in questions)
+        assert server.request_count == generator.calls == 2
+    finally:
+        server.shutdown()
@@ -0,0 +1,229 @@
+import io
+import os
+import zipfile
+from types import SimpleNamespace
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+
+from server.blob_cache import BlobDiskCache
+from server.blob_service import BlobStorageService, select_members
+
+
+def etag_of(path):
+    stat = os.stat(path)
+    return f'"{stat.st_mtime_ns}-{stat.st_size}"'
+
+
+class FakeDownload:
+    def __init__(self, path):
+        self.path = path
+        self.properties = SimpleNamespace(etag=etag_of(path))
+
+    def readall(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def readinto(self, stream):
+        with open(self.path, 'rb') as f:
+            while chunk := f.read(8192):
+                stream.write(chunk)
+
+
+class FakeContainerClient:
+    """Just enough of azure's ContainerClient, backed by a directory."""
+
+    def __init__(self, root):
+        self.root = root
+        self.requests = []
+
+    def exists(self):
+        return True
+
+    def list_blobs(self):
+        self.requests.append('list')
+        return [
+            SimpleNamespace(name=name, etag=etag_of(os.path.join(self.root, name)))
+            for name in sorted(os.listdir(self.root))
+        ]
+
+    def get_blob_client(self, blob_name):
+        path = os.path.join(self.root, blob_name)
+
+        def download_blob(etag=None, match_condition=None):
+            if match_condition == MatchConditions.IfModified and etag == etag_of(path):
+                self.requests.append(('304', blob_name))
+                raise ResourceNotModifiedError()
+            self.requests.append(('get', blob_name))
+            return FakeDownload(path)
+
+        def upload_blob(data, overwrite=False):
+            with open(path, 'wb') as f:
+                f.write(data)
+
+        return SimpleNamespace(download_blob=download_blob, upload_blob=upload_blob)
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, data in files.items():
+            z.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_service(tmp_path, **kwargs):
+    service = BlobStorageService(container_client=FakeContainerClient(str(tmp_path)), **kwargs)
+    service.upload_blob('ipl.zip', make_zip({
+        'README.txt': 'Cricsheet IPL data',
+        '1001.json': '{"match": 1}',
+        '1002.json': '{"match": 2}',
+        '1003.json': '{"match": 3}',
+        'logo.png': b'\x89PNG\xff\xfe',
+    }))
+    return service
+
+
+def test_select_members():
+    names = ['a/', 'a/1.json', 'b.txt', 'a/2.json', 'c.json']
+    assert select_members(names) == ['a/1.json', 'b.txt', 'a/2.json', 'c.json']
+    assert select_members(names, '*.json', start=1) == ['a/2.json', 'c.json']
+    assert select_members(names, 'b.*, c.*') == ['b.txt', 'c.json']
+
+
+def test_full_content_keeps_the_old_layout(tmp_path):
+    service = make_service(tmp_path)
+    assert service.list_blobs() == ['ipl.zip']
+    assert service.get_blob_content('ipl.zip') == (
+        "--- File: README.txt ---\nCricsheet IPL data\n\n"
+        "--- File: 1001.json ---\n{\"match\": 1}\n\n"
+        "--- File: 1002.json ---\n{\"match\": 2}\n\n"
+        "--- File: 1003.json ---\n{\"match\": 3}\n\n"
+        "--- File: logo.png (Skipped: Binary or non-UTF-8) ---\n"
+    )
+
+
+def test_selects_members_and_respects_the_budget(tmp_path):
+    service = make_service(tmp_path)
+    assert [m['name'] for m in service.list_zip_members('ipl.zip')] == [
+        'README.txt', '1001.json', '1002.json', '1003.json', 'logo.png'
+    ]
+    assert service.get_blob_content('ipl.zip', pattern='*.json', start=1, stop=2) == (
+        "--- File: 1002.json ---\n{\"match\": 2}\n"
+    )
+
+    content = service.get_blob_content('ipl.zip', pattern='*.json', max_bytes=50)
+    assert "--- File: 1001.json ---" in content and "1003.json" not in content
+    assert "continue with start=1" in content
+
+    assert service.get_blob_content('ipl.zip', pattern='*.csv') == "Empty zip file or no readable text files found."
+
+
+def test_plain_and_invalid_blobs(tmp_path):
+    service = make_service(tmp_path)
+    service.upload_blob('notes.txt', ('é' * 10).encode('utf-8'))
+    assert service.get_blob_content('notes.txt') == 'é' * 10
+    # Cut on a character boundary
+    assert service.get_blob_content('notes.txt', max_bytes=5).startswith('éé')
+
+    service.upload_blob('broken.zip', b'not a zip')
+    assert service.get_blob_content('broken.zip') == "Error: The file 'broken.zip' is not a valid zip file."
+    # Spooled downloads are cleaned up
+    assert sorted(os.listdir(tmp_path)) == ['broken.zip', 'ipl.zip', 'notes.txt']
+
+
+def test_disk_cache_revalidates_by_etag(tmp_path):
+    data, cache_dir = tmp_path / 'data', tmp_path / 'cache'
+    data.mkdir()
+    service = make_service(data, cache=BlobDiskCache(str(cache_dir), max_bytes=10_000), cache_ttl=0)
+    requests = service.container_client.requests
+
+    first = service.get_blob_content('ipl.zip', pattern='1001.json')
+    assert service.get_blob_content('ipl.zip', pattern='1001.json') == first
+    assert requests == [('get', 'ipl.zip'), ('304', 'ipl.zip')]
+
+    # A changed blob is downloaded again
+    service.upload_blob('ipl.zip', make_zip({'1001.json': '{"match": "replayed"}'}))
+    assert 'replayed' in service.get_blob_content('ipl.zip')
+    assert requests[-1] == ('get', 'ipl.zip')
+
+    # Within the TTL a fresh listing or check is trusted without asking again
+    service.cache_ttl = 60
+    assert service.list_blobs() == ['ipl.zip'] and service.list_blobs() == ['ipl.zip']
+    service.get_blob_content('ipl.zip')
+    assert requests[-2:] == [('get', 'ipl.zip'), 'list']
+
+    # Least recently used copies are evicted once the cache is over its size
+    service.upload_blob('big.txt', b'x' * 9_950)
+    service.get_blob_content('big.txt')
+    assert service.cache.stats()['entries'] == 1 and service.cache.get('ipl.zip') is None
+    # The index survives a restart
+    assert BlobDiskCache(str(cache_dir)).get('big.txt')['size'] == 9_950
+
+
+
+def cache_file(cache, name, data):
+    with cache.temp_file() as tmp:
+        tmp.write(data)
+    return cache.put(name, f'"{name}"', tmp.name)
+
+
+def test_disk_cache_keeps_copies_being_read(tmp_path):
+    cache = BlobDiskCache(str(tmp_path), max_bytes=100)
+    reading = cache_file(cache, 'a.txt', b'a' * 60)
+
+    # Over budget while both are read; the least recently used copy goes once it is released
+    cache_file(cache, 'b.txt', b'b' * 60)
+    assert cache.stats()['bytes'] == 120
+    cache.release('a.txt')
+    assert cache.get('a.txt') is None and not os.path.exists(reading)
+    cache.release('b.txt')
+    assert cache.acquire('a.txt') is None
+
+    # A discarded copy stays on disk until its reader is done
+    reading = cache.acquire('b.txt')
+    cache.discard('b.txt')
+    assert cache.acquire('b.txt') is None and os.path.exists(reading)
+    cache.release('b.txt')
+    assert not os.path.exists(reading) and cache.stats()['entries'] == 0
+
+
+def test_disk_cache_hits_write_the_index_at_most_every_interval(tmp_path):
+    cache = BlobDiskCache(str(tmp_path), index_interval=60)
+    cache_file(cache, 'a.txt', b'a')
+    cache.release('a.txt')
+    saved = os.stat(tmp_path / 'index.json').st_mtime_ns
+
+    for _ in range(3):
+        cache.acquire('a.txt')
+        cache.release('a.txt')
+    assert os.stat(tmp_path / 'index.json').st_mtime_ns == saved
+    used = cache.get('a.txt')['used']
+
+    cache.flush()
+    assert BlobDiskCache(str(tmp_path)).get('a.txt')['used'] == used
+
+
+def test_read_page_walks_the_archive_with_a_cursor(tmp_path):
+    service = make_service(tmp_path)
+    service.upload_blob('season.zip', make_zip({f'{1000 + i}.json': '{"runs": "%s"}' % ('é' * 900) for i in range(4)}))
+
+    pages, cursor = [], None
+    while True:
+        page = service.read_page('season.zip', pattern='*.json', cursor=cursor, max_bytes=1500)
+        assert len(page['content'].encode('utf-8')) <= 1500
+        pages.append(page)
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    # The 1.8 KB matches are split across pages on character boundaries
+    assert len(pages) > 4 and pages[1]['cursor'].startswith('0:')
+    text = "".join(
+        line for page in pages for line in page['content'].splitlines() if not line.startswith('--- File:')
+    )
+    assert text == ('{"runs": "%s"}' % ('é' * 900)) * 4
+
+    page = service.read_page('ipl.zip', pattern='*.json', cursor='1:0', limit=1)
+    assert page['files'] == ['1002.json'] and page['next_cursor'] == '2:0' and page['total_files'] == 3
+    assert service.read_page('ipl.zip', cursor='4:0')['content'].endswith("(Skipped: Binary or non-UTF-8) ---\n")
+    assert service.read_page('ipl.zip', cursor='5:0')['files'] == []
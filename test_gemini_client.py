@@ -0,0 +1,63 @@
+import json
+import time
+import threading
+
+from fake_gemini_server import start_fake_server
+from server.gemini_client import GeminiClientManager
+
+
+def make_manager(server, **kwargs):
+    return GeminiClientManager(api_key="fake-key", base_url=server.url, timeout=10, backoff_base=0.01, **kwargs)
+
+
+def test_generate_against_fake_server():
+    server = start_fake_server()
+    try:
+        manager = make_manager(server)
+        response = manager.generate_content("gemini-2.5-flash", "Generate 3 multiple-choice quiz questions about 'Python'.")
+        assert len(json.loads(response.text)) == 3
+        # The same client (and its connection pool) is reused across calls
+        assert manager.client is manager.client
+    finally:
+        server.shutdown()
+
+
+def test_retries_transient_failures():
+    server = start_fake_server(fail_rate=1.0)
+    try:
+        manager = make_manager(server, max_retries=2)
+        try:
+            manager.generate_content("gemini-2.5-flash", "Hello")
+            assert False, "expected the injected 503 to surface"
+        except Exception as e:
+            assert manager.is_retryable(e)
+        assert server.request_count == 3
+    finally:
+        server.shutdown()
+
+
+def test_limits_requests_in_flight():
+    server = start_fake_server(latency=0.2)
+    try:
+        manager = make_manager(server, max_in_flight=2)
+        threads = [
+            threading.Thread(target=manager.generate_content, args=("gemini-2.5-flash", "Hello"))
+            for _ in range(4)
+        ]
+        start = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 4 calls through 2 slots need at least two rounds of latency
+        assert time.time() - start >= 0.4
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_generate_against_fake_server()
+    test_retries_transient_failures()
+    test_limits_requests_in_flight()
+    print("All Gemini client tests passed.")
@@ -0,0 +1,102 @@
+import json
+import random
+
+from server.blob_service import BlobStorageService
+from server.match_store import MatchStore, ingest, parse_match
+from server.quiz_parser import validate_question
+from test_blob_service import FakeContainerClient, make_zip
+
+TEAMS = ['Chennai', 'Mumbai', 'Delhi', 'Kolkata', 'Punjab']
+VENUES = ['Chepauk', 'Wankhede', 'Feroz Shah Kotla', 'Eden Gardens']
+
+
+def make_match(seed):
+    """A small but complete Cricsheet-style match document."""
+    rng = random.Random(seed)
+    teams = rng.sample(TEAMS, 2)
+    players = {team: [f'{team[:3]} Player {i}' for i in range(6)] for team in teams}
+    innings = []
+    for batting, bowling in (teams, teams[::-1]):
+        deliveries = [
+            {
+                'batter': players[batting][ball % 6], 'bowler': players[bowling][ball % 3],
+                'runs': {'batter': ball % 7, 'extras': 0, 'total': ball % 7},
+                **({'wickets': [{'player_out': players[batting][ball % 6], 'kind': 'bowled'}]} if ball % 9 == 8 else {})
+            }
+            for ball in range(rng.randint(20, 36))
+        ]
+        innings.append({'team': batting, 'overs': [{'over': 0, 'deliveries': deliveries}]})
+    return json.dumps({
+        'meta': {'data_version': '1.1.0'},
+        'info': {
+            'dates': [f'2023-04-{seed % 28 + 1:02d}'], 'season': 2023, 'match_type': 'T20',
+            'event': {'name': 'Indian Premier League'}, 'venue': rng.choice(VENUES), 'teams': teams,
+            'toss': {'winner': teams[0], 'decision': 'bat'}, 'players': players,
+            'outcome': {'winner': teams[1], 'by': {'wickets': rng.randint(1, 9)}},
+            'player_of_match': [players[teams[1]][0]]
+        },
+        'innings': innings
+    })
+
+
+def test_parse_match():
+    parsed = parse_match('1001', make_match(1))
+    match = parsed['match']
+    assert match[0] == '1001' and match[5] == 'Indian Premier League' and match[12] == match[9]
+    # Runs add up from deliveries to innings and players
+    assert sum(row[3] for row in parsed['innings']) == sum(row[3] for row in parsed['players'])
+    assert parse_match('readme', b'not json') is None
+
+
+def test_ingest_is_incremental_and_questions_are_valid(tmp_path):
+    data = tmp_path / 'data'
+    data.mkdir()
+    service = BlobStorageService(container_client=FakeContainerClient(str(data)))
+    service.upload_blob('ipl_json.zip', make_zip({f'{1000 + i}.json': make_match(i) for i in range(30)}))
+    store = MatchStore(str(tmp_path / 'matches.db'))
+
+    assert ingest(service, store, workers=2, batch_size=8, log=lambda _: None) == {'blobs': 1, 'matches': 30}
+    assert ingest(service, store, workers=0, log=lambda _: None) == {'blobs': 0, 'matches': 0}
+    # A re-published archive only adds its new matches
+    service.upload_blob('ipl_json.zip', make_zip({f'{1000 + i}.json': make_match(i) for i in range(32)}))
+    assert ingest(service, store, workers=0, log=lambda _: None) == {'blobs': 1, 'matches': 2}
+    assert store.stats()['matches'] == 32
+
+    questions = store.fact_questions(count=20, seed=7)
+    assert len(questions) == 20 and store.fact_questions(count=20, seed=7) == questions
+    for question in questions:
+        assert validate_question(question)['answer'] == question['answer']
+        match = store.query('SELECT * FROM matches WHERE id = ?', (question['match_id'],))[0]
+        if question['kind'] == 'winner':
+            assert question['answer'] == match['winner']
+        if question['kind'] == 'margin':
+            assert question['answer'] == f"{match['win_by_wickets']} wickets"
+    assert all(q['question'].find('Mumbai') >= 0 for q in store.fact_questions(count=5, team='Mumbai', seed=1)
+               if q['kind'] in ('winner', 'venue', 'player_of_match'))
+
+
+def test_overlapping_archives_are_parsed_once(tmp_path):
+    data = tmp_path / 'data'
+    data.mkdir()
+    service = BlobStorageService(container_client=FakeContainerClient(str(data)))
+    service.upload_blob('ipl_json.zip', make_zip({f'{1000 + i}.json': make_match(i) for i in range(10)}))
+    service.upload_blob('all_json.zip', make_zip({f'{1000 + i}.json': make_match(i) for i in range(15)}))
+    store = MatchStore(str(tmp_path / 'matches.db'))
+    assert not store.exists
+
+    # all_json.zip sorts first; ipl_json.zip then has nothing new
+    assert ingest(service, store, workers=0, log=lambda _: None) == {'blobs': 2, 'matches': 15}
+    assert store.exists and len(store.match_ids('all_json.zip')) == 15
+    # Re-publishing the smaller archive neither re-parses nor re-homes the shared matches
+    service.upload_blob('ipl_json.zip', make_zip({f'{1000 + i}.json': make_match(i) for i in range(11)}))
+    assert ingest(service, store, workers=0, log=lambda _: None) == {'blobs': 1, 'matches': 0}
+    assert store.match_ids('ipl_json.zip') == set()
+
+    # Distractor pools are reused until new matches arrive
+    store.fact_questions(count=5, seed=1)
+    pools = store._pools
+    store.fact_questions(count=5, seed=2)
+    assert store._pools is pools
+    service.upload_blob('extra.json', make_match(99).encode())
+    ingest(service, store, workers=0, log=lambda _: None)
+    assert store._pools is None and store.stats()['matches'] == 16
@@ -0,0 +1,43 @@
+import json
+
+from server.quiz_parser import QuizStreamParser, parse_quiz
+
+
+def question(n, **overrides):
+    item = {'question': f'Question {n}?', 'options': ['A1', 'B1', 'C1', 'D1'], 'answer': 'B1'}
+    item.update(overrides)
+    return item
+
+
+def test_salvages_fenced_truncated_output():
+    text = "Sure! Here's your quiz:\n```json\n" + json.dumps([question(1), question(2), question(3)])
+    text = text[:text.rindex('{') + 20]  # cut off mid-way through the third question
+    questions, rejected = parse_quiz(text)
+    assert [q['question'] for q in questions] == ['Question 1?', 'Question 2?']
+    assert rejected == ['truncated object']
+
+
+def test_validates_schema():
+    items = [
+        question(1),
+        question(2, options=['A1', 'B1', 'C1']),
+        question(3, answer='Z'),
+        question(4, answer='c'),
+        question(5, answer='d1'),
+        question(1),
+    ]
+    questions, rejected = parse_quiz(json.dumps(items) + "\nHope this helps!")
+    assert [(q['question'], q['answer']) for q in questions] == [
+        ('Question 1?', 'B1'), ('Question 4?', 'C1'), ('Question 5?', 'D1')
+    ]
+    assert len(rejected) == 3
+
+
+def test_incremental_feed_and_python_literals():
+    text = str([question(n, question=f"What's number {n}?") for n in range(4)])
+    parser = QuizStreamParser(limit=3)
+    seen = []
+    for i in range(0, len(text), 7):
+        seen.extend(parser.feed(text[i:i + 7]))
+    assert len(seen) == 3 and parser.full
+    assert seen[0]['question'] == "What's number 0?"
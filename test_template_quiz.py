@@ -0,0 +1,55 @@
+import time
+
+from server.quiz_parser import validate_question
+from server.template_quiz import Template, TemplateQuizGenerator, COURSE_TEMPLATES, course_records, definition_facts
+
+LESSONS = [
+    ('Python for Beginners', 'Introduction', 'Python is a high-level, interpreted programming language. It is fun.'),
+    ('Python for Beginners', 'Variables', 'Variables are containers for storing data values.'),
+    ('Python for Beginners', 'Lists', 'A list is an ordered, mutable collection of items.'),
+    ('Python for Beginners', 'Dictionaries', 'A dictionary is a mapping of keys to values.'),
+    ('Web Basics', 'HTML', 'HTML is the markup language that structures web pages.'),
+    ('Databases 101', 'SQL', 'SQL is a language for querying relational databases.'),
+    ('Networking', 'TCP', 'TCP is a reliable, connection-oriented transport protocol.'),
+]
+
+
+def test_definition_facts():
+    assert definition_facts(LESSONS[0][2]) == [
+        {'term': 'Python', 'definition': 'a high-level, interpreted programming language'}
+    ]
+    assert definition_facts('# Variables\nVariables are containers for storing data values.')[0]['term'] == 'Variables'
+    # Leading articles are not part of the term
+    assert [f['term'] for f in definition_facts(LESSONS[2][2] + ' ' + LESSONS[3][2])] == ['List', 'Dictionary']
+    assert definition_facts('The answer is below the fold, as usual.') == []
+
+
+def test_course_questions_are_valid_and_repeatable():
+    records = course_records(LESSONS)
+    questions = TemplateQuizGenerator(records, COURSE_TEMPLATES, seed=1).generate(10)
+    assert len(questions) == 10
+    assert TemplateQuizGenerator(records, COURSE_TEMPLATES, seed=1).generate(10) == questions
+    for question in questions:
+        assert validate_question(question)['answer'] == question['answer']
+        if question['kind'] == 'definition':
+            # Terms from the same course are preferred as distractors
+            assert {'Python', 'Variables', 'List', 'Dictionary'} <= set(question['options']) or \
+                question['answer'] in ('HTML', 'SQL', 'TCP')
+
+    # Thin data gives fewer questions rather than invalid ones
+    assert TemplateQuizGenerator(course_records(LESSONS[:2]), COURSE_TEMPLATES).generate(5) == []
+
+
+def test_numeric_templates_and_throughput():
+    records = [{'id': i, 'team': f'Team {i % 12}', 'score': 100 + i % 90} for i in range(500)]
+    templates = [
+        Template('score', 'How many runs did {team} score in match {id}?', 'score', near=20, minimum=0, unit='runs'),
+        Template('team', 'Which team scored {score} in match {id}?', 'team'),
+    ]
+    started = time.perf_counter()
+    questions = TemplateQuizGenerator(records, templates, seed=3).generate(1000, keep=('id',))
+    elapsed = time.perf_counter() - started
+    assert len(questions) == 1000 and all(validate_question(q) for q in questions)
+    assert all(q['options'][0].endswith(' runs') for q in questions if q['kind'] == 'score')
+    # Thousands of questions per second, with room to spare on slow CI machines
+    assert elapsed < 2, elapsed